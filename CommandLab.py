@@ -12,7 +12,9 @@ from discord.abc import User
 from discord.ext import commands, tasks
 
 from config.config import config
+from utils.metrics import InstrumentedCommandTree, start_metrics_server, trace_config
 from utils.setup import setup, setup_mcdata
+from utils.watchdog import LoopWatchdog
 
 logger = logging.getLogger("root")
 
@@ -58,8 +60,15 @@ class CommandLabBot(commands.Bot):
             command_prefix=config.prefix,
             intents=discord.Intents.all(),
             owner_ids=config.owner_ids,
+            tree_cls=InstrumentedCommandTree,
+            http_trace=trace_config(),
         )
         self.status_index = 0
+        self.metrics_runner = None
+        self.watchdog = LoopWatchdog(
+            threshold=config.loop_block_threshold, latency=lambda: self.latency
+        )
+        self.tree.error(self.on_tree_error)
 
     async def is_owner(self, user: User) -> bool:
         return user.id in config.owner_ids
@@ -87,6 +96,7 @@ class CommandLabBot(commands.Bot):
         await asyncio.sleep(interval)
 
     async def setup_hook(self) -> None:
+        self.watchdog.start()
         if "*" in config.enabled_features:
             for name in listdir("cogs"):
                 if name != "__pycache__" and not name.startswith("_"):
@@ -99,8 +109,68 @@ class CommandLabBot(commands.Bot):
                 await self.load_extension(f)
                 logger.info(f"機能 [{f}] が正常にロードされました。")
         await self.tree.sync()
+        if config.metrics_port is not None:
+            self.metrics_runner = await start_metrics_server(
+                config.metrics_host, config.metrics_port
+            )
         self.loop.create_task(self.change_status())
 
+    async def on_ready(self):
+        start_embed = discord.Embed(
+            title="BOTが起動しました！",
+            description="BOT has been started!",
+            color=0xFFD700,
+            timestamp=datetime.now(),
+        )
+
+        logger.info("BOTが起動しました")
+        if config.start_notice_channel is not None:
+            start_notice_channel = await self.fetch_channel(config.start_notice_channel)
+            await start_notice_channel.send(embed=start_embed)
+
+    async def on_message(self, message: discord.Message):
+        if not message.author.bot:
+            if message.author.id in self.owner_ids or []:
+                await self.process_commands(message)
+
+        if message.channel.id == 965095619838488576:
+            if message.author.bot:
+                return
+
+            elif message.content.startswith("ぬるぽ"):
+                await message.channel.send("ｶﾞﾌﾞｯ")
+
+            elif message.content.startswith("!d bump"):
+                await message.channel.send("そのコマンドは<t:1648767600:F>にサ終しました(笑)")
+
+            elif message.content.startswith("/bump"):
+                await message.channel.send(
+                    embed=discord.Embed(
+                        title="BUMPを実行出来てないよ!!",
+                        color=0x00BFFF,
+                        timestamp=datetime.now(),
+                    )
+                )
+
+            elif message.content.startswith("oruvanoruvan"):
+                await message.channel.send(ORUVANORUVAN)
+
+        if self.user in message.mentions and message.reference is None:
+            await message.channel.send(
+                f"{message.author.mention}呼んだ？\nわからないことがあったら【/chelp】を実行してね"
+            )
+
+    async def on_tree_error(
+        self, ctx: discord.Interaction, error: app_commands.AppCommandError
+    ):
+        if isinstance(error, app_commands.MissingRole) or isinstance(
+            error, app_commands.MissingPermissions
+        ):
+            await ctx.response.send_message("権限あらへんで(関西弁)", ephemeral=True)
+        else:
+            name = ctx.command.qualified_name if ctx.command else "不明"
+            logger.error(f"/{name} の実行中にエラーが発生しました", exc_info=error)
+
     @classmethod
     async def start(cls, token: str) -> None:
         logging.config.dictConfig(
@@ -114,67 +184,6 @@ class CommandLabBot(commands.Bot):
         client = cls()
 
         async with client:
-
-            @client.event
-            async def on_ready():
-                start_embed = discord.Embed(
-                    title="BOTが起動しました！",
-                    description="BOT has been started!",
-                    color=0xFFD700,
-                    timestamp=datetime.now(),
-                )
-
-                logger.info("BOTが起動しました")
-                if config.start_notice_channel is not None:
-                    start_notice_channel = await client.fetch_channel(
-                        config.start_notice_channel
-                    )
-                    await start_notice_channel.send(embed=start_embed)
-
-            @client.event
-            async def on_message(message: discord.Message):
-                if not message.author.bot:
-                    if message.author.id in client.owner_ids or []:
-                        await client.process_commands(message)
-
-                if message.channel.id == 965095619838488576:
-                    if message.author.bot:
-                        return
-
-                    elif message.content.startswith("ぬるぽ"):
-                        await message.channel.send("ｶﾞﾌﾞｯ")
-
-                    elif message.content.startswith("!d bump"):
-                        await message.channel.send("そのコマンドは<t:1648767600:F>にサ終しました(笑)")
-
-                    elif message.content.startswith("/bump"):
-                        await message.channel.send(
-                            embed=discord.Embed(
-                                title="BUMPを実行出来てないよ!!",
-                                color=0x00BFFF,
-                                timestamp=datetime.now(),
-                            )
-                        )
-
-                    elif message.content.startswith("oruvanoruvan"):
-                        await message.channel.send(ORUVANORUVAN)
-
-                if client.user in message.mentions and message.reference is None:
-                    await message.channel.send(
-                        f"{message.author.mention}呼んだ？\nわからないことがあったら【/chelp】を実行してね"
-                    )
-
-            @client.tree.error
-            async def on_error(
-                ctx: discord.Interaction, error: app_commands.AppCommandError
-            ):
-                if isinstance(error, app_commands.MissingRole) or isinstance(
-                    error, app_commands.MissingPermissions
-                ):
-                    await ctx.response.send_message("権限あらへんで(関西弁)", ephemeral=True)
-                else:
-                    logger.error(error)
-
             return await super().start(client, token=token)
 
     async def close(self) -> None:
@@ -182,6 +191,9 @@ class CommandLabBot(commands.Bot):
         for e in list(self.extensions.keys()):
             await self.unload_extension(e)
         logger.info("機能のアンロードが完了しました。プロセスを終了します")
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        self.watchdog.stop()
         return await super().close()
 
 
@@ -0,0 +1,374 @@
+"""
+コマンドハンドラのオフラインベンチマーク
+
+    python -m benchmarks.bench_commands --output bench_report.json
+    python -m benchmarks.bench_commands --baseline bench_report.json
+
+フィクスチャを一時ディレクトリに生成し、偽のInteraction/Messageで各コグを直接呼び出します。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+import discord
+
+from benchmarks.fixtures import REPO, build_game_data, build_workspace
+from benchmarks.harness import (FakeBot, FakeChannel, FakeGuild, FakeInteraction,
+                                FakeMessage, FakeUser, Recorder, next_id)
+
+Scenario = Callable[[], Awaitable[None]]
+
+# 最新版以外のバージョンを指定したときの計測用
+OLD_VERSION = "1.18.2"
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(
+    scenario: Scenario, recorder: Recorder, iterations: int, warmup: int
+) -> dict:
+    for _ in range(warmup):
+        await scenario()
+
+    samples: list[float] = []
+    recorder.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        await scenario()
+        samples.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "total_s": total,
+        "throughput_per_s": iterations / total,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "responses": len(recorder.calls),
+    }
+
+
+async def build_scenarios(
+    bot: FakeBot, recorder: Recorder, guild: FakeGuild, ids: dict[str, int]
+) -> dict[str, Scenario]:
+    # config.jsonを読み込むので作業ディレクトリに移動してからインポートする
+    from cogs.bump_notifications import BumpNofiticationCog
+    from cogs.ccolor import CColor
+    from cogs.ccommand import CCommandEditionButton, CCommandInfo
+    from cogs.cintro import CIntro
+    from cogs.citem import CItem
+    from cogs.cpackmcmeta import CPackMcMeta
+    from cogs.ctellraw import (COLORS, CTellraw, SectionDataText, TellrawButton,
+                               TellrawImportModal, TellrawSession, sessions,
+                               to_command)
+    from utils.textcomponent import gradient
+    from cogs.link_embedder import CTemplate as LinkEmbedder
+
+    citem = CItem(bot)
+    ccommand = bot.add_cog(CCommandInfo(bot))
+    await ccommand.cog_load()
+    cpack = CPackMcMeta(bot)
+    ccolor = CColor(bot)
+    ctellraw = CTellraw(bot)
+    bump = BumpNofiticationCog(bot)
+    intro = CIntro(bot)
+    link = LinkEmbedder(bot)
+
+    general = guild.get_channel(ids["general"])
+
+    def interaction(**kwargs) -> FakeInteraction:
+        return FakeInteraction(
+            recorder, client=bot, guild=guild, channel=general, **kwargs
+        )
+
+    async def citem_item():
+        await CItem.citem.callback(citem, interaction(), "diamond")
+
+    async def citem_block():
+        await CItem.citem.callback(citem, interaction(), "stone")
+
+    async def citem_old_version():
+        await CItem.citem.callback(citem, interaction(), "diamond", OLD_VERSION)
+
+    async def citem_japanese():
+        await CItem.citem.callback(citem, interaction(), "ダイヤモンド鉱石")
+
+    async def citem_english():
+        await CItem.citem.callback(
+            citem,
+            interaction(locale=discord.Locale.american_english),
+            "Diamond Ore",
+        )
+
+    queries = ["dia", "だいや", "ダイヤモンドの", "stne", "剣"]
+
+    async def citem_autocomplete():
+        for q in queries:
+            recorder.record(
+                "autocomplete", choices=await citem.citem_autocomplete(interaction(), q)
+            )
+
+    async def ccommand_info():
+        await CCommandInfo.ccommand.callback(ccommand, interaction(), "tp")
+
+    async def ccommand_edition():
+        # 再起動後に古いメッセージのボタンが押された場合と同じく、custom_idから復元する
+        match = CCommandEditionButton.__discord_ui_compiled_template__.fullmatch(
+            "ccmd:be:clear"
+        )
+        button = await CCommandEditionButton.from_custom_id(interaction(), None, match)
+        await button.callback(interaction())
+
+    async def ccommand_autocomplete():
+        recorder.record(
+            "autocomplete",
+            choices=await ccommand.ccommand_autocomplete(interaction(), "t"),
+        )
+
+    async def cpack_search():
+        await CPackMcMeta.search.callback(cpack, interaction(), "1.20.4")
+
+    sections = [
+        SectionDataText(text="Hello ", color="gold", bold=True),
+        SectionDataText(text="World", color="aqua", underline=True),
+        SectionDataText(text="!", color="red", strikethrough=True),
+    ]
+
+    def tellraw_session(data: list[SectionDataText]) -> str:
+        return sessions.create(TellrawSession(cmd="/tellraw @a {}", data=data))
+
+    async def ctellraw_preview():
+        session = tellraw_session([s.model_copy() for s in sections])
+        await TellrawButton(session, "preview").callback(interaction())
+
+    edits = iter(range(10**9))
+
+    async def ctellraw_preview_edit():
+        # 1つのセクションだけを変更した場合 (他のセクションの描画結果は使い回される)
+        data = [s.model_copy() for s in sections]
+        data[1].text = f"World {next(edits)}"
+        await TellrawButton(tellraw_session(data), "preview").callback(interaction())
+
+    # 1文字ずつ色を変えた長いタイトルの1セクションだけを編集した場合
+    long_state = TellrawSession(
+        cmd="/title @a title {}",
+        data=[
+            SectionDataText(text=c, color=COLORS[i % 4], bold=i % 8 == 0)
+            for i, c in enumerate("Welcome to the server! " * 8)
+        ],
+    )
+    long_session = sessions.create(long_state)
+
+    async def ctellraw_long_edit():
+        long_state.section = 0
+        long_state.data[0].text = f"W{next(edits) % 10}"
+        await TellrawButton(long_session, "next").callback(interaction())
+
+    gradient_text = "Welcome to the Minecraft Command Laboratory! " * 4
+
+    async def ctellraw_gradient():
+        await CTellraw.gradient.callback(ctellraw, interaction(), gradient_text)
+
+    # グラデーションで生成した長いコマンドを貼り付けた場合
+    import_source = to_command(
+        [
+            SectionDataText(text=text, color=color)
+            for text, color in gradient(gradient_text, [(255, 85, 85), (85, 85, 255)])
+        ],
+        "/tellraw @a {}",
+    )
+
+    # スコアやNBTを指定したセレクタ ({} を含む) のコマンドを貼り付けた場合
+    selector_source = (
+        "/tellraw @a[scores={kills=1..},nbt={Inventory:[{id:\"minecraft:diamond\"}]}] "
+        '["",{"text":"ダイヤを持っています","color":"aqua"},{"score":{"name":"@s","objective":"kills"}}]'
+    )
+
+    async def import_command(source: str):
+        session = tellraw_session([])
+        modal = TellrawImportModal(session, sessions.get(session))
+        modal.source._value = source
+        await modal.on_submit(interaction())
+        # 保存したセッションでボタンを押せることも確かめる
+        sessions.get(session).embed()
+
+    async def ctellraw_import():
+        await import_command(import_source)
+
+    async def ctellraw_import_selector():
+        await import_command(selector_source)
+
+    async def ccolor_preview():
+        await CColor.preview.callback(ccolor, interaction(), "#FF8800")
+
+    bump_channel = guild.get_channel(ids["bump"])
+    author = FakeUser(name="member")
+
+    async def on_message_bump():
+        await bump.on_message(
+            FakeMessage(recorder, "/bump", author=author, channel=bump_channel, guild=guild)
+        )
+
+    target = FakeMessage(recorder, "リンク先のメッセージ", author=author, channel=general)
+    general.messages[target.id] = target
+    link_text = f"これ見て https://discord.com/channels/{guild.id}/{general.id}/{target.id}"
+
+    async def on_message_link():
+        await link.on_message(
+            FakeMessage(recorder, link_text, author=author, channel=general, guild=guild)
+        )
+
+    question = guild.get_channel(ids["question"])
+    for i in range(199):
+        m = FakeMessage(recorder, f"質問{i}", author=FakeUser(), channel=question)
+        question.messages[m.id] = m
+    asker = FakeUser(name="asker")
+    first = FakeMessage(recorder, "初めての質問", author=asker, channel=question)
+    question.messages[first.id] = first
+
+    async def on_message_question():
+        await intro.message(
+            FakeMessage(recorder, "初めての質問", author=asker, channel=question, guild=guild)
+        )
+
+    return {
+        "citem_item": citem_item,
+        "citem_block": citem_block,
+        "citem_old_version": citem_old_version,
+        "citem_japanese": citem_japanese,
+        "citem_english": citem_english,
+        "citem_autocomplete": citem_autocomplete,
+        "ccommand": ccommand_info,
+        "ccommand_edition": ccommand_edition,
+        "ccommand_autocomplete": ccommand_autocomplete,
+        "cpack_mcmeta_search": cpack_search,
+        "ctellraw_preview": ctellraw_preview,
+        "ctellraw_preview_edit": ctellraw_preview_edit,
+        "ctellraw_long_edit": ctellraw_long_edit,
+        "ctellraw_gradient": ctellraw_gradient,
+        "ctellraw_import": ctellraw_import,
+        "ctellraw_import_selector": ctellraw_import_selector,
+        "ccolor_preview": ccolor_preview,
+        "on_message_bump": on_message_bump,
+        "on_message_link_embedder": on_message_link,
+        "on_message_question": on_message_question,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    ok = True
+    print(f"{'scenario':<28}{'p50 (ms)':>22}{'p99 (ms)':>22}")
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or "error" in result or "error" in base:
+            print(f"{name:<28}{'-':>22}{'-':>22}")
+            continue
+        cols = []
+        for key in ("p50_ms", "p99_ms"):
+            ratio = result[key] / base[key] if base[key] else 1.0
+            cols.append(f"{base[key]:.2f}→{result[key]:.2f} x{ratio:.2f}")
+            if ratio > threshold:
+                ok = False
+        print(f"{name:<28}{cols[0]:>22}{cols[1]:>22}")
+    return ok
+
+
+async def main(args: argparse.Namespace) -> int:
+    recorder = Recorder()
+    bot = FakeBot(recorder)
+    guild = FakeGuild(recorder)
+    ids = {
+        "guild": guild.id,
+        "admin_role": next_id(),
+        "disboard": next_id(),
+        "general": guild.add_channel(FakeChannel(recorder, name="general")).id,
+        "bump": guild.add_channel(FakeChannel(recorder, name="bump")).id,
+        "question": guild.add_channel(FakeChannel(recorder, name="question")).id,
+    }
+    bot.add_guild(guild)
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="commandlab-bench-")
+    build_workspace(workdir, ids)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO)
+
+    from config import config
+
+    build_game_data(workdir, config.latest_version)
+    build_game_data(workdir, OLD_VERSION)
+
+    scenarios = await build_scenarios(bot, recorder, guild, ids)
+    if args.only:
+        scenarios = {k: v for k, v in scenarios.items() if k in args.only}
+
+    results = {}
+    for name, scenario in scenarios.items():
+        try:
+            results[name] = await run_scenario(
+                scenario, recorder, args.iterations, args.warmup
+            )
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        r = results[name]
+        if "error" in r:
+            print(f"{name:<28} ERROR {r['error']}")
+        else:
+            print(
+                f"{name:<28} {r['throughput_per_s']:>9.1f}/s"
+                f"  p50 {r['p50_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms"
+            )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "version": config.latest_version,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+    os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        if not compare(report, baseline, args.threshold):
+            print(f"x{args.threshold}を超える劣化があります")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--baseline", help="比較対象の過去の結果")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--only", nargs="*", help="実行するシナリオ名")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,224 @@
+"""
+minecraft-dataの読み込み方法ごとの処理時間の比較
+
+    python -m benchmarks.bench_schemas --data ./minecraft_data/data --version 1.20.4
+
+--data を省略するか存在しない場合は合成したフィクスチャで計測します。
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.bench_commands import percentile
+from benchmarks.fixtures import (REPO, build_lang, build_minecraft_data,
+                                 build_mojang_fixture)
+
+sys.path.insert(0, REPO)
+
+from cogs.ccommand import load_commands  # noqa: E402
+from schemas.data import (BLOCKS_ADAPTER, ITEMS_ADAPTER,  # noqa: E402
+                          BlockEntry, BlockEntryStates, Blocks, DataPaths,
+                          ItemEntry, Items)
+from schemas.game_package import AssetIndex, AssetIndexEntry  # noqa: E402
+from utils import snapshot  # noqa: E402
+from utils.jsonscan import KeyScanner  # noqa: E402
+from utils.lang import LangTable  # noqa: E402
+
+
+def construct_items(raw: bytes) -> list[ItemEntry]:
+    return [ItemEntry.model_construct(**d) for d in json.loads(raw)]
+
+
+def construct_blocks(raw: bytes) -> list[BlockEntry]:
+    return [
+        BlockEntry.model_construct(
+            **{
+                **d,
+                "states": [
+                    BlockEntryStates.model_construct(**s) for s in d.get("states", [])
+                ],
+            }
+        )
+        for d in json.loads(raw)
+    ]
+
+
+def lazy_entry(raw: bytes, key: str) -> AssetIndexEntry:
+    """以前の方法: 全体を検証せずに読み込み、必要なエントリだけを検証する"""
+    return AssetIndexEntry.model_validate(json.loads(raw)["objects"][key])
+
+
+def scan(raw: bytes, key: str) -> object:
+    scanner = KeyScanner(("objects",), [key])
+    for i in range(0, len(raw), 64 * 1024):
+        scanner.feed(raw[i : i + 64 * 1024])
+        if scanner.done:
+            break
+    return scanner.found[key]
+
+
+def snapshot_pair(
+    name: str, path: str, build: Callable[[list[bytes]], object], n: int
+) -> dict:
+    """ファイルの読み込みから、作成し直す場合とスナップショットを使う場合を比べます。"""
+
+    def rebuild():
+        with open(path, "rb") as fp:
+            return build([fp.read()])
+
+    snapshot.load_or_build(name, [path], build)
+    return {
+        "build": measure(f"{name} rebuild", rebuild, n),
+        "snapshot": measure(
+            f"{name} load_or_build", lambda: snapshot.load_or_build(name, [path], build), n
+        ),
+    }
+
+
+def measure(name: str, func: Callable[[], object], iterations: int) -> dict:
+    func()
+    samples = []
+    for _ in range(iterations):
+        t = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t)
+    result = {
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+    }
+    print(f"{name:<32} p50 {result['p50_ms']:>9.3f}ms  p99 {result['p99_ms']:>9.3f}ms")
+    return result
+
+
+def main(args: argparse.Namespace) -> int:
+    data_dir = args.data
+    if data_dir is None or not os.path.exists(data_dir):
+        root = tempfile.mkdtemp(prefix="commandlab-schemas-")
+        build_minecraft_data(root, args.version)
+        data_dir = os.path.join(root, "data")
+        print(f"フィクスチャを使用します: {data_dir}")
+
+    with open(os.path.join(data_dir, "dataPaths.json"), "rb") as fp:
+        entry = DataPaths.model_validate_json(fp.read()).pc[args.version]
+    with open(os.path.join(data_dir, entry.items, "items.json"), "rb") as fp:
+        items_raw = fp.read()
+    with open(os.path.join(data_dir, entry.blocks, "blocks.json"), "rb") as fp:
+        blocks_raw = fp.read()
+
+    items_pickle = pickle.dumps(ITEMS_ADAPTER.validate_json(items_raw), pickle.HIGHEST_PROTOCOL)
+    blocks_pickle = pickle.dumps(BLOCKS_ADAPTER.validate_json(blocks_raw), pickle.HIGHEST_PROTOCOL)
+
+    lang_path = args.lang
+    if lang_path is None or not os.path.exists(lang_path):
+        lang_path = os.path.join(tempfile.mkdtemp(prefix="commandlab-schemas-"), "ja_jp.json")
+        build_lang(
+            lang_path,
+            [b.name for b in BLOCKS_ADAPTER.validate_json(blocks_raw)],
+            [i.name for i in ITEMS_ADAPTER.validate_json(items_raw)],
+        )
+    # 計測用のスナップショットは一時ディレクトリに保存する
+    snapshot.SNAPSHOT_DIR = tempfile.mkdtemp(prefix="commandlab-snapshot-")
+
+    n = args.iterations
+    results = {
+        "items": {
+            "root_model": measure(
+                "items RootModel", lambda: Items.model_validate_json(items_raw), n
+            ),
+            "type_adapter": measure(
+                "items TypeAdapter", lambda: ITEMS_ADAPTER.validate_json(items_raw), n
+            ),
+            "trusted": measure(
+                "items model_construct", lambda: construct_items(items_raw), n
+            ),
+            "snapshot": measure(
+                "items snapshot", lambda: pickle.loads(items_pickle), n
+            ),
+        },
+        "blocks": {
+            "root_model": measure(
+                "blocks RootModel", lambda: Blocks.model_validate_json(blocks_raw), n
+            ),
+            "type_adapter": measure(
+                "blocks TypeAdapter",
+                lambda: BLOCKS_ADAPTER.validate_json(blocks_raw),
+                n,
+            ),
+            "trusted": measure(
+                "blocks model_construct", lambda: construct_blocks(blocks_raw), n
+            ),
+            "snapshot": measure(
+                "blocks snapshot", lambda: pickle.loads(blocks_pickle), n
+            ),
+        },
+    }
+
+    # ハッシュの計算を含めたスナップショットの読み込みと、作成し直す場合の比較
+    items_path = os.path.join(data_dir, entry.items, "items.json")
+    blocks_path = os.path.join(data_dir, entry.blocks, "blocks.json")
+    results["snapshot"] = {
+        "items": snapshot_pair(
+            "items", items_path, lambda s: ITEMS_ADAPTER.validate_json(s[0]), n
+        ),
+        "blocks": snapshot_pair(
+            "blocks", blocks_path, lambda s: BLOCKS_ADAPTER.validate_json(s[0]), n
+        ),
+        "lang": snapshot_pair(
+            "lang", lang_path, lambda s: LangTable("", json.loads(s[0]), len(s[0])), n
+        ),
+        "commands": snapshot_pair(
+            "commands",
+            os.path.join(REPO, "data", "commands.json"),
+            lambda s: load_commands(s[0]),
+            n,
+        ),
+    }
+
+    index_path = args.asset_index
+    if index_path is None:
+        root = tempfile.mkdtemp(prefix="commandlab-schemas-")
+        build_mojang_fixture(root, args.version)
+        index_dir = os.path.join(root, "piston-meta.mojang.com", "v1", "packages")
+        for folder in os.listdir(index_dir):
+            for name in os.listdir(os.path.join(index_dir, folder)):
+                if name[:-5].isdigit():
+                    index_path = os.path.join(index_dir, folder, name)
+    with open(index_path, "rb") as fp:
+        index_raw = fp.read()
+    lang_key = "minecraft/lang/ja_jp.json"
+
+    results["asset_index"] = {
+        "full": measure(
+            "asset index full",
+            lambda: AssetIndex.model_validate_json(index_raw).objects[lang_key],
+            n,
+        ),
+        "lazy": measure(
+            "asset index lazy",
+            lambda: lazy_entry(index_raw, lang_key),
+            n,
+        ),
+        "scan": measure("asset index scan", lambda: scan(index_raw, lang_key), n),
+    }
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump({"version": args.version, "results": results}, fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="./minecraft_data/data")
+    parser.add_argument("--version", default="1.20.4")
+    parser.add_argument("--lang", help="ja_jp.jsonのパス (省略時は合成データ)")
+    parser.add_argument("--asset-index", help="アセットインデックスのJSONファイル")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output")
+    sys.exit(main(parser.parse_args()))
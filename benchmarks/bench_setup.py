@@ -0,0 +1,166 @@
+"""
+起動処理とMojangのサーバーに依存するコマンドのベンチマーク
+
+    python -m benchmarks.bench_setup --latency 0.05 --bandwidth 5000000 --output setup_report.json
+
+benchmarks.mojang_stub をローカルで起動し、config.json の endpoints をそこに向けて計測します。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_commands import percentile
+from benchmarks.fixtures import REPO, build_mojang_fixture, build_workspace
+from benchmarks.harness import FakeBot, FakeInteraction, Recorder, next_id
+from benchmarks.mojang_stub import MojangStub
+
+
+async def measure(name: str, func, iterations: int) -> dict:
+    samples: list[float] = []
+    errors = 0
+    for _ in range(iterations):
+        t = time.perf_counter()
+        try:
+            await func()
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - t)
+
+    result = {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+    print(
+        f"{name:<24} p50 {result['p50_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms"
+        f"  errors {errors}"
+    )
+    return result
+
+
+async def main(args: argparse.Namespace) -> int:
+    fixture = args.fixture
+    if fixture is None:
+        fixture = tempfile.mkdtemp(prefix="mojang-stub-")
+        build_mojang_fixture(fixture, "1.20.4")
+
+    stub = MojangStub(
+        fixture,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    base = await stub.start()
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="commandlab-bench-")
+    ids = {
+        k: next_id()
+        for k in ("guild", "admin_role", "disboard", "bump", "question")
+    }
+    endpoints = {
+        "piston_meta": base,
+        "launcher_content": base,
+        "resources": base,
+        "minecraft_data": f"{base}/PrismarineJS/minecraft-data/master",
+    }
+    build_workspace(workdir, ids, endpoints=endpoints)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO)
+
+    from cogs.cnews import CNews
+    from cogs.cpackmcmeta import CPackMcMeta
+    from cogs.version_watcher import VersionWatcher
+    from utils.setup import setup, setup_mcdata
+
+    recorder = Recorder()
+    bot = FakeBot(recorder)
+    cnews = CNews(bot)
+
+    async def setup_cold():
+        shutil.rmtree("./tmp", ignore_errors=True)
+        await setup()
+
+    async def setup_mcdata_cold():
+        shutil.rmtree("./minecraft_data", ignore_errors=True)
+        await setup_mcdata()
+
+    async def cnews_latest():
+        await CNews.cnews.callback(cnews, FakeInteraction(recorder, client=bot), "1.20.4")
+
+    async def cnews_search():
+        await CNews.cnews_search.callback(
+            cnews, FakeInteraction(recorder, client=bot), "copper bulbs"
+        )
+
+    # 2回目以降は変更がないため304が返る
+    watcher = VersionWatcher(bot)
+
+    async def version_watch_poll():
+        await watcher.check()
+
+    async def cpack_latest():
+        # キャッシュを使わずに毎回client.jarを取得させる
+        await CPackMcMeta.latest.callback(CPackMcMeta(bot), FakeInteraction(recorder))
+
+    results = {
+        "setup_cold": await measure("setup_cold", setup_cold, args.iterations),
+        "setup_warm": await measure("setup_warm", setup, args.iterations),
+        "setup_mcdata_cold": await measure(
+            "setup_mcdata_cold", setup_mcdata_cold, args.iterations
+        ),
+        "setup_mcdata_warm": await measure(
+            "setup_mcdata_warm", setup_mcdata, args.iterations
+        ),
+        "cnews": await measure("cnews", cnews_latest, args.iterations),
+        "cnews_search": await measure("cnews_search", cnews_search, args.iterations),
+        "version_watch_poll": await measure(
+            "version_watch_poll", version_watch_poll, args.iterations
+        ),
+        "cpack_mcmeta_latest": await measure(
+            "cpack_mcmeta_latest", cpack_latest, args.iterations
+        ),
+    }
+    await stub.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "latency": args.latency,
+            "bandwidth": args.bandwidth,
+            "failure_rate": args.failure_rate,
+            "iterations": args.iterations,
+        },
+        "requests": dict(stub.requests),
+        "injected_failures": stub.failures,
+        "results": results,
+    }
+
+    os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixture", help="mojang_stub record で保存したディレクトリ")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=int)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    sys.exit(asyncio.run(main(parser.parse_args())))
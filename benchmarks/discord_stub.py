@@ -0,0 +1,170 @@
+"""
+DiscordのREST APIの代わりになるローカルサーバー
+
+送信されたリクエストは記録するだけで、discord.pyが動作するのに必要な最低限の応答を返します。
+"""
+
+import itertools
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+import discord
+from aiohttp import web
+
+_ids = itertools.count(2_000_000_000_000_000_000)
+
+
+def user_payload(id: int, name: str, bot: bool = False) -> dict:
+    return {
+        "id": str(id),
+        "username": name,
+        "global_name": name,
+        "discriminator": "0",
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user: dict, roles: Optional[list[int]] = None) -> dict:
+    return {
+        "user": user,
+        "roles": [str(r) for r in roles or []],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def message_payload(
+    channel_id: int,
+    author: dict,
+    content: str,
+    *,
+    guild_id: Optional[int] = None,
+    id: Optional[int] = None,
+) -> dict:
+    data = {
+        "id": str(id or next(_ids)),
+        "channel_id": str(channel_id),
+        "author": author,
+        "content": content,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+    if guild_id is not None:
+        data["guild_id"] = str(guild_id)
+        data["member"] = member_payload(author)
+    return data
+
+
+def json_response(data) -> web.Response:
+    # discord.py は charset の付かない application/json しかJSONとして扱わない
+    return web.Response(
+        body=json.dumps(data).encode(), headers={"Content-Type": "application/json"}
+    )
+
+
+class DiscordRESTStub:
+    def __init__(self, bot_user: dict, application_id: int, guild_id: int):
+        self.bot_user = bot_user
+        self.application_id = application_id
+        self.guild_id = guild_id
+        self.requests: Counter[str] = Counter()
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route("*", "/api/v10/{path:.*}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.base_url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.base_url
+
+    def install(self):
+        """discord.pyのリクエスト先をこのサーバーに切り替えます。"""
+        discord.http.Route.BASE = self.base_url + "/api/v10"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _route(self, method: str, path: str) -> str:
+        # IDとトークンを潰して集計する
+        parts = [
+            "{id}" if p.isdigit() else ("{token}" if len(p) > 40 else p)
+            for p in path.split("/")
+        ]
+        return f"{method} /{'/'.join(parts)}"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        self.requests[self._route(request.method, path)] += 1
+        await request.read()
+        parts = path.split("/")
+
+        if path == "users/@me":
+            return json_response(self.bot_user)
+
+        if path == "oauth2/applications/@me":
+            return json_response(
+                {
+                    "id": str(self.application_id),
+                    "name": "CommandLab",
+                    "icon": None,
+                    "description": "",
+                    "bot_public": True,
+                    "bot_require_code_grant": False,
+                    "verify_key": "",
+                    "flags": 0,
+                    "owner": self.bot_user,
+                }
+            )
+
+        if parts[0] == "applications" and parts[-1] == "commands":
+            return json_response([])
+
+        if parts[0] == "interactions" and parts[-1] == "callback":
+            return json_response({"interaction": {"id": parts[1], "type": 2}})
+
+        if parts[0] == "channels" and parts[-1] == "messages":
+            channel_id = int(parts[1])
+            if request.method == "GET":
+                return json_response([])
+            return json_response(message_payload(channel_id, self.bot_user, ""))
+
+        if parts[0] == "channels" and len(parts) == 4 and parts[2] == "messages":
+            channel_id = int(parts[1])
+            return json_response(
+                message_payload(
+                    channel_id, self.bot_user, "リンク先のメッセージ", id=int(parts[3])
+                )
+            )
+
+        if parts[0] == "channels" and len(parts) == 2:
+            return json_response(
+                {
+                    "id": parts[1],
+                    "guild_id": str(self.guild_id),
+                    "type": 0,
+                    "name": "channel",
+                    "position": 0,
+                }
+            )
+
+        if parts[0] == "webhooks":
+            return json_response(message_payload(0, self.bot_user, ""))
+
+        return web.Response(status=204)
@@ -0,0 +1,412 @@
+"""
+ベンチマーク用のフィクスチャを作業ディレクトリに生成します。
+
+minecraft-data、ja_jp.json、client.jarは本物に近い件数の合成データを作るので、
+ネットワークに接続せずに毎回同じ条件で計測できます。
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import zipfile
+
+import numpy as np
+from PIL import Image, ImageFont
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 本物の1.20.4と同程度の件数になるように埋める
+FILLER_ITEMS = 1200
+FILLER_BLOCKS = 900
+FILLER_LANG_KEYS = 4000
+
+BLOCKS: dict[str, tuple[str, str, list[str]]] = {
+    # name: (日本語名, material, drops)
+    "stone": ("石", "mineable/pickaxe", ["cobblestone"]),
+    "cobblestone": ("丸石", "mineable/pickaxe", ["cobblestone"]),
+    "dirt": ("土", "mineable/shovel", ["dirt"]),
+    "grass_block": ("草ブロック", "mineable/shovel", ["dirt"]),
+    "oak_log": ("オークの原木", "mineable/axe", ["oak_log"]),
+    "oak_planks": ("オークの板材", "mineable/axe", ["oak_planks"]),
+    "glass": ("ガラス", "default", []),
+    "diamond_ore": ("ダイヤモンド鉱石", "mineable/pickaxe", ["diamond"]),
+    "iron_ore": ("鉄鉱石", "mineable/pickaxe", ["raw_iron"]),
+    "coal_ore": ("石炭鉱石", "mineable/pickaxe", ["coal"]),
+    "diamond_block": ("ダイヤモンドブロック", "mineable/pickaxe", ["diamond_block"]),
+    "white_wool": ("白色の羊毛", "wool", ["white_wool"]),
+    "cobweb": ("クモの巣", "coweb", ["string"]),
+    "farmland": ("耕地", "mineable/shovel", ["dirt"]),
+    "command_block": ("コマンドブロック", "default", []),
+    "copper_bulb": ("銅の電球", "mineable/pickaxe", ["copper_bulb"]),
+}
+
+ITEMS: dict[str, str] = {
+    "diamond": "ダイヤモンド",
+    "raw_iron": "鉄の原石",
+    "coal": "石炭",
+    "string": "糸",
+    "stick": "棒",
+    "apple": "リンゴ",
+    "diamond_sword": "ダイヤモンドの剣",
+    "diamond_pickaxe": "ダイヤモンドのツルハシ",
+    "iron_ingot": "鉄インゴット",
+    "gold_ingot": "金インゴット",
+    "bread": "パン",
+    "bow": "弓",
+    "arrow": "矢",
+    "ender_pearl": "エンダーパール",
+    "totem_of_undying": "不死のトーテム",
+    "carrot_on_a_stick": "ニンジン付きの棒",
+    "written_book": "記入済みの本",
+    "debug_stick": "デバッグ棒",
+}
+
+
+def _texture(name: str) -> bytes:
+    color = hashlib.sha1(name.encode()).digest()[:3]
+    img = Image.new("RGBA", (16, 16), (*color, 255))
+    stream = io.BytesIO()
+    img.save(stream, "PNG")
+    return stream.getvalue()
+
+
+def build_minecraft_data(root: str, version: str) -> tuple[list[dict], list[dict]]:
+    folder = "pc/" + version
+    os.makedirs(os.path.join(root, "data", folder), exist_ok=True)
+
+    blocks = dict(BLOCKS)
+    for i in range(FILLER_BLOCKS):
+        blocks[f"fixture_block_{i}"] = (f"フィクスチャブロック{i}", "mineable/pickaxe", [])
+
+    items = dict(ITEMS)
+    for i in range(FILLER_ITEMS):
+        items[f"fixture_item_{i}"] = f"フィクスチャアイテム{i}"
+
+    item_entries = []
+    for i, name in enumerate(list(blocks) + list(items)):
+        item_entries.append(
+            {"id": i, "name": name, "displayName": name.title(), "stackSize": 64}
+        )
+    item_ids = {e["name"]: e["id"] for e in item_entries}
+
+    block_entries = []
+    for i, (name, (_, material, drops)) in enumerate(blocks.items()):
+        block_entries.append(
+            {
+                "id": i,
+                "name": name,
+                "displayName": name.title(),
+                "hardness": 1.5,
+                "resistance": 6.0,
+                "stackSize": 64,
+                "diggable": True,
+                "material": material,
+                "transparent": name == "glass",
+                "emitLight": 0,
+                "filterLight": 15,
+                "defaultState": i * 2,
+                "minStateId": i * 2,
+                "maxStateId": i * 2 + 1,
+                "states": [{"name": "lit", "type": "bool", "num_values": 2}],
+                "harvestTools": {"1": True},
+                "drops": [item_ids[d] for d in drops],
+                "boundingBox": "block",
+            }
+        )
+
+    # 複数のバージョンを作る場合は既存のdataPaths.jsonに追加する
+    paths_file = os.path.join(root, "data", "dataPaths.json")
+    data_paths = {"pc": {}, "bedrock": {}}
+    if os.path.exists(paths_file):
+        with open(paths_file) as fp:
+            data_paths = json.load(fp)
+    data_paths["pc"][version] = {"items": folder, "blocks": folder}
+    with open(paths_file, "w") as fp:
+        json.dump(data_paths, fp)
+    with open(os.path.join(root, "data", folder, "items.json"), "w") as fp:
+        json.dump(item_entries, fp)
+    with open(os.path.join(root, "data", folder, "blocks.json"), "w") as fp:
+        json.dump(block_entries, fp)
+
+    return item_entries, block_entries
+
+
+def build_lang(
+    path: str, block_names: list[str], item_names: list[str], locale: str = "ja_jp"
+) -> dict:
+    lang: dict[str, str] = {"language.code": locale}
+    names = {**{k: v[0] for k, v in BLOCKS.items()}, **ITEMS}
+    if locale != "ja_jp":
+        names = {k: k.replace("_", " ").title() for k in names}
+    for name in block_names:
+        lang[f"block.minecraft.{name}"] = names.get(name, name)
+    for name in item_names:
+        if name not in BLOCKS:
+            lang[f"item.minecraft.{name}"] = names.get(name, name)
+    for i in range(FILLER_LANG_KEYS):
+        lang[f"advancements.fixture.{i}.description"] = f"フィクスチャの説明文 {i}"
+
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(lang, fp, ensure_ascii=False)
+    return lang
+
+
+def _font_sheet() -> bytes:
+    """ascii.pngの代わりに、文字ごとに幅と形の違う8x8のグリフを16x16個並べた画像"""
+    sheet = np.zeros((128, 128, 4), dtype=np.uint8)
+    for code in range(0x21, 0x7F):
+        width = 3 + code % 4
+        bits = int(hashlib.sha1(bytes([code])).hexdigest(), 16)
+        y0, x0 = code // 16 * 8, code % 16 * 8
+        for y in range(7):
+            for x in range(width):
+                if bits >> (y * 8 + x) & 1 or x == 0:
+                    sheet[y0 + y, x0 + x] = (255, 255, 255, 255)
+    stream = io.BytesIO()
+    Image.fromarray(sheet, "RGBA").save(stream, "PNG")
+    return stream.getvalue()
+
+
+FONT_CHARS = ["".join(chr(y * 16 + x) for x in range(16)) for y in range(16)]
+
+
+def build_client_jar(path: str, version: str, block_names, item_names):
+    with zipfile.ZipFile(path, "w") as zipfp:
+        zipfp.writestr(
+            "assets/minecraft/font/default.json",
+            json.dumps(
+                {
+                    "providers": [
+                        {"type": "reference", "id": "minecraft:include/space"},
+                        {"type": "reference", "id": "minecraft:include/default"},
+                    ]
+                }
+            ),
+        )
+        zipfp.writestr(
+            "assets/minecraft/font/include/space.json",
+            json.dumps({"providers": [{"type": "space", "advances": {" ": 4}}]}),
+        )
+        zipfp.writestr(
+            "assets/minecraft/font/include/default.json",
+            json.dumps(
+                {
+                    "providers": [
+                        {
+                            "type": "bitmap",
+                            "file": "minecraft:font/ascii.png",
+                            "ascent": 7,
+                            "chars": FONT_CHARS,
+                        }
+                    ]
+                }
+            ),
+        )
+        zipfp.writestr("assets/minecraft/textures/font/ascii.png", _font_sheet())
+        for name in block_names:
+            zipfp.writestr(f"assets/minecraft/textures/block/{name}.png", _texture(name))
+        for name in item_names:
+            if name not in block_names:
+                zipfp.writestr(
+                    f"assets/minecraft/textures/item/{name}.png", _texture(name)
+                )
+        zipfp.writestr(
+            "version.json",
+            json.dumps(
+                {
+                    "id": version,
+                    "name": version,
+                    "world_version": 3700,
+                    "series_id": "main",
+                    "protocol_version": 765,
+                    "pack_version": {"resource": 22, "data": 26},
+                    "build_time": "2023-12-07T08:55:29+00:00",
+                    "java_component": "java-runtime-gamma",
+                    "java_version": 17,
+                    "stable": True,
+                }
+            ),
+        )
+
+
+# raw.githubusercontent.com で配信される minecraft-data のリポジトリ
+MINECRAFT_DATA_HOST = "raw.githubusercontent.com/PrismarineJS/minecraft-data/master"
+
+
+def _write(root: str, url: str, data: bytes) -> str:
+    path = os.path.join(root, url.split("://", 1)[1])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fp:
+        fp.write(data)
+    return hashlib.sha1(data).hexdigest()
+
+
+def build_mojang_fixture(root: str, version: str, snapshot: str = "24w13a"):
+    """
+    Mojangのサーバーを模したファイルを `<root>/<ホスト名>/<パス>` に作成します。
+    benchmarks.mojang_stub がこのディレクトリを配信します。
+    """
+    block_names = list(BLOCKS)
+    item_names = block_names + list(ITEMS)
+
+    versions = []
+    for i, ver in enumerate([version, snapshot]):
+        lang = {}
+        for locale in ("ja_jp", "en_us", "zh_cn", "ko_kr"):
+            tmp = os.path.join(root, f"{locale}.json")
+            build_lang(tmp, block_names, item_names, locale)
+            with open(tmp, "rb") as fp:
+                data = fp.read()
+            os.remove(tmp)
+            h = hashlib.sha1(data).hexdigest()
+            _write(root, f"https://resources.download.minecraft.net/{h[:2]}/{h}", data)
+            lang[f"minecraft/lang/{locale}.json"] = {"hash": h, "size": len(data)}
+
+        objects = dict(lang)
+        for j in range(FILLER_LANG_KEYS):
+            h = hashlib.sha1(f"{ver}/{j}".encode()).hexdigest()
+            objects[f"minecraft/sounds/fixture/{j}.ogg"] = {"hash": h, "size": 1000}
+        index = json.dumps({"objects": objects}).encode()
+        index_id = f"{i + 12}"
+        index_sha1 = hashlib.sha1(index).hexdigest()
+        index_url = f"https://piston-meta.mojang.com/v1/packages/{index_sha1}/{index_id}.json"
+        _write(root, index_url, index)
+
+        jar = os.path.join(root, "client.jar")
+        build_client_jar(jar, ver, block_names, item_names)
+        with open(jar, "rb") as fp:
+            jar_data = fp.read()
+        os.remove(jar)
+        jar_sha1 = hashlib.sha1(jar_data).hexdigest()
+        jar_url = f"https://piston-data.mojang.com/v1/objects/{jar_sha1}/client.jar"
+        _write(root, jar_url, jar_data)
+
+        download = {"sha1": jar_sha1, "size": len(jar_data), "url": jar_url}
+        package = json.dumps(
+            {
+                "assetIndex": {
+                    "id": index_id,
+                    "sha1": index_sha1,
+                    "size": len(index),
+                    "totalSize": len(index) * 10,
+                    "url": index_url,
+                },
+                "assets": index_id,
+                "id": ver,
+                "downloads": {"client": download, "server": download},
+                "libraries": [],
+                "mainClass": "net.minecraft.client.main.Main",
+                "minimumLauncherVersion": 21,
+                "releaseTime": "2023-12-07T12:56:20+00:00",
+                "time": "2023-12-07T12:56:20+00:00",
+                "type": "release" if ver == version else "snapshot",
+            }
+        ).encode()
+        package_sha1 = hashlib.sha1(package).hexdigest()
+        package_url = f"https://piston-meta.mojang.com/v1/packages/{package_sha1}/{ver}.json"
+        _write(root, package_url, package)
+
+        versions.append(
+            {
+                "id": ver,
+                "type": "release" if ver == version else "snapshot",
+                "url": package_url,
+                "time": "2023-12-07T12:56:20+00:00",
+                "releaseTime": "2023-12-07T12:56:20+00:00",
+                "sha1": package_sha1,
+                "complianceLevel": 1,
+            }
+        )
+
+    manifest = {"latest": {"release": version, "snapshot": snapshot}, "versions": versions}
+    _write(
+        root,
+        "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json",
+        json.dumps(manifest).encode(),
+    )
+
+    entries = []
+    for ver in (snapshot, version):
+        body = "".join(
+            f"<h2>Section {j}</h2><p>{ver} changed copper bulbs and command blocks. "
+            + "Lorem ipsum dolor sit amet. " * 20
+            + "</p>"
+            for j in range(30)
+        )
+        entries.append(
+            {
+                "title": f"Minecraft Java Edition {ver}",
+                "type": "release" if ver == version else "snapshot",
+                "version": ver,
+                "image": {"url": "/images/fixture.png", "title": ver},
+                "body": body,
+            }
+        )
+    _write(
+        root,
+        "https://launchercontent.mojang.com/javaPatchNotes.json",
+        json.dumps({"version": 1, "entries": entries}).encode(),
+    )
+
+    build_minecraft_data(os.path.join(root, MINECRAFT_DATA_HOST), version)
+    return root
+
+
+def build_config(path: str, ids: dict[str, int], **extra):
+    with open(os.path.join(REPO, "config", "config.example.json")) as fp:
+        data = json.load(fp)
+    data.update(
+        {
+            "token": "FIXTURE",
+            "guild_id": ids["guild"],
+            "administrater_role_id": ids["admin_role"],
+            "bump": {"channel_id": ids["bump"], "disboard_id": ids["disboard"]},
+            "question_channels": [ids["question"]],
+            "enabled_features": [],
+            **extra,
+        }
+    )
+    with open(path, "w") as fp:
+        json.dump(data, fp, ensure_ascii=False)
+
+
+def build_workspace(root: str, ids: dict[str, int], **config_extra) -> str:
+    """
+    リポジトリと同じ構成の作業ディレクトリを作成します。
+
+    config.config はインポート時に ./config/config.json を読むので、
+    ゲームデータは作業ディレクトリに移動してから build_game_data で作成します。
+    """
+    os.makedirs(os.path.join(root, "config"), exist_ok=True)
+    os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+    shutil.copytree(os.path.join(REPO, "data"), os.path.join(root, "data"))
+    shutil.copytree(os.path.join(REPO, "assets"), os.path.join(root, "assets"))
+
+    # unifontはリポジトリに含まれていないのでPillow同梱のフォントで代用する
+    font = os.path.join(root, "assets", "unifont-15.1.05.otf")
+    if not os.path.exists(font):
+        with open(font, "wb") as fp:
+            fp.write(ImageFont.load_default(14).font_bytes)
+
+    build_config(os.path.join(root, "config", "config.json"), ids, **config_extra)
+    return root
+
+
+def build_game_data(root: str, version: str):
+    items, blocks = build_minecraft_data(os.path.join(root, "minecraft_data"), version)
+    block_names = [b["name"] for b in blocks]
+    item_names = [i["name"] for i in items]
+    lang_dir = os.path.join(root, "tmp", "lang", version)
+    os.makedirs(lang_dir, exist_ok=True)
+    for locale in ("ja_jp", "en_us"):
+        build_lang(
+            os.path.join(lang_dir, f"{locale}.json"), block_names, item_names, locale
+        )
+    build_client_jar(
+        os.path.join(root, "tmp", f"client_{version}.jar"),
+        version,
+        block_names,
+        item_names,
+    )
@@ -0,0 +1,259 @@
+"""
+ベンチマーク用のDiscordオブジェクトの代用品
+
+送信・編集などの呼び出しはDiscordに送らずに `Recorder` に記録します。
+"""
+
+import itertools
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Optional
+
+import discord
+
+_ids = itertools.count(1_000_000_000_000_000_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class Recorder:
+    def __init__(self):
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    def record(self, name: str, **kwargs):
+        self.calls.append((name, kwargs))
+
+    def clear(self):
+        self.calls.clear()
+
+
+class FakeAsset:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeRole:
+    def __init__(self, id: int):
+        self.id = id
+        self.mention = f"<@&{id}>"
+
+
+class FakeUser:
+    def __init__(
+        self, id: Optional[int] = None, name: str = "tester", bot: bool = False
+    ):
+        self.id = id or next_id()
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.roles: list[FakeRole] = []
+        self.mention = f"<@{self.id}>"
+        self.avatar = None
+        self.default_avatar = FakeAsset("https://cdn.discordapp.com/embed/avatars/0.png")
+        self.resolved_permissions = discord.Permissions.none()
+
+    def __eq__(self, other):
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeChannel:
+    def __init__(
+        self,
+        recorder: Recorder,
+        id: Optional[int] = None,
+        name: str = "general",
+        type: discord.ChannelType = discord.ChannelType.text,
+    ):
+        self.recorder = recorder
+        self.id = id or next_id()
+        self.name = name
+        self.type = type
+        self.mention = f"<#{self.id}>"
+        self.messages: dict[int, "FakeMessage"] = {}
+        self.threads: list["FakeChannel"] = []
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self.recorder.record("channel.send", content=content, **kwargs)
+        return FakeMessage(self.recorder, content or "", channel=self)
+
+    async def fetch_message(self, id: int) -> "FakeMessage":
+        return self.messages[id]
+
+    async def history(self, limit: int = 100):
+        for message in list(self.messages.values())[-limit:]:
+            yield message
+
+
+class FakeGuild:
+    def __init__(self, recorder: Recorder, id: Optional[int] = None):
+        self.recorder = recorder
+        self.id = id or next_id()
+        self.channels: dict[int, FakeChannel] = {}
+        self.members: dict[int, FakeUser] = {}
+
+    def add_channel(self, channel: FakeChannel) -> FakeChannel:
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, id: int) -> Optional[FakeChannel]:
+        return self.channels.get(id)
+
+    def get_role(self, id: int) -> FakeRole:
+        return FakeRole(id)
+
+    async def fetch_member(self, id: int) -> Optional[FakeUser]:
+        return self.members.get(id)
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        recorder: Recorder,
+        content: str,
+        *,
+        author: Optional[FakeUser] = None,
+        channel: Optional[FakeChannel] = None,
+        guild: Optional[FakeGuild] = None,
+        embeds: Optional[list[discord.Embed]] = None,
+    ):
+        self.recorder = recorder
+        self.id = next_id()
+        self.content = content
+        self.author = author or FakeUser()
+        self.channel = channel or FakeChannel(recorder)
+        self.guild = guild
+        self.embeds = embeds or []
+        self.mentions: list[FakeUser] = []
+        self.reference = None
+        self.attachments: list[Any] = []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def reply(self, content: Optional[str] = None, **kwargs):
+        self.recorder.record("message.reply", content=content, **kwargs)
+        return FakeMessage(self.recorder, content or "", channel=self.channel)
+
+    async def edit(self, **kwargs):
+        self.recorder.record("message.edit", **kwargs)
+        return self
+
+    async def delete(self):
+        self.recorder.record("message.delete")
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.recorder = interaction.recorder
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def _respond(self, name: str, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(self.interaction)
+        self._done = True
+        self.recorder.record(name, **kwargs)
+
+    async def send_message(self, content: Optional[str] = None, **kwargs):
+        self._respond("response.send_message", content=content, **kwargs)
+
+    async def defer(self, **kwargs):
+        self._respond("response.defer", **kwargs)
+
+    async def edit_message(self, **kwargs):
+        self._respond("response.edit_message", **kwargs)
+
+    async def send_modal(self, modal: discord.ui.Modal):
+        self._respond("response.send_modal", modal=modal)
+
+    async def autocomplete(self, choices):
+        self._respond("response.autocomplete", choices=choices)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.recorder = interaction.recorder
+        self.channel = interaction.channel
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self.recorder.record("followup.send", content=content, **kwargs)
+        return FakeMessage(self.recorder, content or "", channel=self.channel)
+
+
+class FakeNamespace(SimpleNamespace):
+    # app_commands.Namespace と同じく、無い引数はNoneになる
+    def __getattr__(self, name: str) -> Any:
+        return None
+
+
+class FakeInteraction:
+    def __init__(
+        self,
+        recorder: Recorder,
+        *,
+        client: Any = None,
+        user: Optional[FakeUser] = None,
+        guild: Optional[FakeGuild] = None,
+        channel: Optional[FakeChannel] = None,
+        locale: discord.Locale = discord.Locale.japanese,
+        namespace: Optional[dict[str, Any]] = None,
+    ):
+        self.recorder = recorder
+        self.id = next_id()
+        self.client = client
+        self.user = user or FakeUser()
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.channel = channel or FakeChannel(recorder)
+        self.locale = locale
+        self.message: Optional[FakeMessage] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.command_failed = False
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.namespace = FakeNamespace(**(namespace or {}))
+
+
+class FakeBot:
+    def __init__(self, recorder: Recorder):
+        self.recorder = recorder
+        self.user = FakeUser(name="コマ研Bot", bot=True)
+        self.latency = 0.05
+        self.owner_ids: set[int] = set()
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, FakeChannel] = {}
+        self.cogs: dict[str, Any] = {}
+
+    def add_cog(self, cog: Any) -> Any:
+        self.cogs[type(cog).__name__] = cog
+        return cog
+
+    def get_cog(self, name: str) -> Optional[Any]:
+        return self.cogs.get(name)
+
+    def add_guild(self, guild: FakeGuild) -> FakeGuild:
+        self.guilds[guild.id] = guild
+        for channel in guild.channels.values():
+            self.channels[channel.id] = channel
+        return guild
+
+    def get_guild(self, id: int) -> Optional[FakeGuild]:
+        return self.guilds.get(id)
+
+    def get_channel(self, id: int) -> Optional[FakeChannel]:
+        return self.channels.get(id)
+
+    async def fetch_channel(self, id: int) -> FakeChannel:
+        return self.channels[id]
+
+    async def is_owner(self, user: FakeUser) -> bool:
+        return user.id in self.owner_ids
@@ -0,0 +1,490 @@
+"""
+合成したゲートウェイイベントをBotに流し込む負荷試験
+
+    python -m benchmarks.loadgen --rate 200 --duration 30 --output load_report.json
+    python -m benchmarks.loadgen --rate 50 --mix ccommand_autocomplete=5,message=1
+
+本物の CommandLabBot に MESSAGE_CREATE / INTERACTION_CREATE を一定の割合で注入し、
+REST APIへのリクエストは benchmarks.discord_stub で、Mojangのサーバーやminecraft-dataへの
+リクエスト (パッチノートの検索インデックスやバージョンの監視) は benchmarks.mojang_stub で受け止めます。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import discord
+
+from benchmarks.bench_commands import percentile
+from benchmarks.discord_stub import (DiscordRESTStub, member_payload,
+                                     message_payload, user_payload)
+from benchmarks.fixtures import (REPO, build_game_data, build_mojang_fixture,
+                                 build_workspace)
+from benchmarks.harness import next_id
+from benchmarks.mojang_stub import MojangStub
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# イベントの種類ごとの既定の比率
+DEFAULT_MIX = {
+    "message": 40,
+    "message_bump": 5,
+    "message_question": 5,
+    "message_link": 5,
+    "ccommand": 10,
+    "ccommand_autocomplete": 20,
+    "citem": 5,
+    "cpack_mcmeta_search": 5,
+    "ccolor_preview": 5,
+}
+
+COMMANDS = ["tp", "give", "execute", "scoreboard", "summon", "tellraw", "data"]
+ITEMS = ["diamond", "stone", "iron_ingot", "oak_log", "dirt"]
+COLORS = ["#FF8800", "#00BFFF", "#FFD700", "#123456"]
+
+_sequence = itertools.count()
+
+
+def snowflake() -> int:
+    """現在時刻のスノーフレークを作ります (Span の受信遅延の計算に使われます)。"""
+    now = discord.utils.time_snowflake(datetime.now(timezone.utc))
+    return now + next(_sequence) % (1 << 22)
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as fp:
+        return int(fp.read().split()[1]) * PAGE_SIZE
+
+
+class LoadGenerator:
+    def __init__(self, bot, ids: dict[str, int], seed: int = 0):
+        self.bot = bot
+        self.ids = ids
+        self.random = random.Random(seed)
+        self.injected: dict[int, float] = {}
+        self.delays: dict[str, list[float]] = {}
+        self.kinds: dict[int, str] = {}
+        self.window: list[float] = []
+        self.counts: Counter[str] = Counter()
+        self.members = [user_payload(next_id(), f"member{i}") for i in range(50)]
+        self.link_target = next_id()
+        self.builders: dict[str, Callable[[], tuple[str, dict]]] = {
+            "message": self.message,
+            "message_bump": self.message_bump,
+            "message_question": self.message_question,
+            "message_link": self.message_link,
+            "ccommand": self.ccommand,
+            "ccommand_autocomplete": self.ccommand_autocomplete,
+            "citem": self.citem,
+            "cpack_mcmeta_search": self.cpack_mcmeta_search,
+            "ccolor_preview": self.ccolor_preview,
+        }
+
+    def guild_payload(self) -> dict:
+        guild_id = self.ids["guild"]
+        channels = [
+            {"id": str(self.ids[name]), "type": 0, "name": name, "position": i}
+            for i, name in enumerate(("general", "bump", "question"))
+        ]
+        roles = [
+            {
+                "id": str(guild_id),
+                "name": "@everyone",
+                "permissions": str(discord.Permissions.general().value),
+                "position": 0,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+        ]
+        members = [member_payload(u) for u in self.members]
+        members.append(member_payload(self.bot.user._to_minimal_user_json()))
+        return {
+            "id": str(guild_id),
+            "name": "負荷試験",
+            "owner_id": self.members[0]["id"],
+            "roles": roles,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "channels": channels,
+            "threads": [],
+            "members": members,
+            "member_count": len(members),
+            "large": False,
+            "unavailable": False,
+        }
+
+    # --- MESSAGE_CREATE ---
+
+    def _message(self, channel: str, content: str) -> tuple[str, dict]:
+        return "MESSAGE_CREATE", message_payload(
+            self.ids[channel],
+            self.random.choice(self.members),
+            content,
+            guild_id=self.ids["guild"],
+            id=snowflake(),
+        )
+
+    def message(self):
+        return self._message("general", "こんにちは" * self.random.randint(1, 20))
+
+    def message_bump(self):
+        return self._message("bump", "/bump")
+
+    def message_question(self):
+        return self._message("question", "コマンドがうまく動きません")
+
+    def message_link(self):
+        link = (
+            f"https://discord.com/channels/{self.ids['guild']}"
+            f"/{self.ids['general']}/{self.link_target}"
+        )
+        return self._message("general", f"これ見て {link}")
+
+    # --- INTERACTION_CREATE ---
+
+    def _interaction(self, type: int, data: dict) -> tuple[str, dict]:
+        user = self.random.choice(self.members)
+        channel = {
+            "id": str(self.ids["general"]),
+            "guild_id": str(self.ids["guild"]),
+            "type": 0,
+            "name": "general",
+            "position": 0,
+        }
+        return "INTERACTION_CREATE", {
+            "id": str(snowflake()),
+            "application_id": str(self.bot.application_id),
+            "type": type,
+            "token": "T" * 64,
+            "version": 1,
+            "guild_id": str(self.ids["guild"]),
+            "channel_id": str(self.ids["general"]),
+            "channel": channel,
+            "member": {
+                **member_payload(user),
+                "permissions": str(discord.Permissions.general().value),
+            },
+            "data": data,
+            "locale": "ja",
+            "guild_locale": "ja",
+            "app_permissions": str(discord.Permissions.all().value),
+            "entitlements": [],
+            "attachment_size_limit": 10 * 1024 * 1024,
+            "authorizing_integration_owners": {},
+            "context": 0,
+        }
+
+    def _command(self, name: str, options: list[dict], type: int = 2):
+        data = {"id": str(next_id()), "name": name, "type": 1, "options": options}
+        return self._interaction(type, data)
+
+    def ccommand(self):
+        return self._command(
+            "ccommand",
+            [{"name": "command", "type": 3, "value": self.random.choice(COMMANDS)}],
+        )
+
+    def ccommand_autocomplete(self):
+        # 入力途中の文字列を1文字ずつ送ってくるのを再現する
+        command = self.random.choice(COMMANDS)
+        prefix = command[: self.random.randint(0, len(command))]
+        return self._command(
+            "ccommand",
+            [{"name": "command", "type": 3, "value": prefix, "focused": True}],
+            type=4,
+        )
+
+    def citem(self):
+        return self._command(
+            "citem", [{"name": "id", "type": 3, "value": self.random.choice(ITEMS)}]
+        )
+
+    def cpack_mcmeta_search(self):
+        return self._command(
+            "cpack-mcmeta",
+            [
+                {
+                    "name": "search",
+                    "type": 1,
+                    "options": [{"name": "version", "type": 3, "value": "1.20.4"}],
+                }
+            ],
+        )
+
+    def ccolor_preview(self):
+        return self._command(
+            "ccolor",
+            [
+                {
+                    "name": "preview",
+                    "type": 1,
+                    "options": [
+                        {"name": "color", "type": 3, "value": self.random.choice(COLORS)}
+                    ],
+                }
+            ],
+        )
+
+    # --- 計測 ---
+
+    def install_probes(self):
+        async def on_message(message: discord.Message):
+            self._probe(message.id)
+
+        async def on_interaction(interaction: discord.Interaction):
+            self._probe(interaction.id)
+
+        self.bot.add_listener(on_message)
+        self.bot.add_listener(on_interaction)
+
+    def _probe(self, id: int):
+        injected = self.injected.pop(id, None)
+        if injected is not None:
+            delay = time.perf_counter() - injected
+            self.delays.setdefault(self.kinds.pop(id), []).append(delay)
+            self.window.append(delay)
+
+    def inject(self, kind: str):
+        event, payload = self.builders[kind]()
+        id = int(payload["id"])
+        self.kinds[id] = kind
+        self.injected[id] = time.perf_counter()
+        self.counts[kind] += 1
+        self.bot._connection.parsers[event](payload)
+
+    async def run(
+        self,
+        rate: float,
+        duration: float,
+        mix: dict[str, int],
+        sample_interval: float = 1.0,
+        on_sample: Optional[Callable[[dict], None]] = None,
+    ) -> list[dict]:
+        kinds = list(mix.keys())
+        weights = list(mix.values())
+        timeline: list[dict] = []
+
+        start = time.perf_counter()
+        next_sample = start + sample_interval
+        window_injected = 0
+        sent = 0
+
+        while True:
+            now = time.perf_counter()
+            elapsed = now - start
+            if elapsed >= duration:
+                break
+
+            # 遅れた分はまとめて注入して目標のレートを維持する
+            due = int(elapsed * rate) - sent
+            for kind in self.random.choices(kinds, weights, k=max(0, due)):
+                self.inject(kind)
+            sent += max(0, due)
+            window_injected += max(0, due)
+
+            if now >= next_sample:
+                window, self.window = self.window, []
+                sample = {
+                    "t": round(elapsed, 3),
+                    "injected_per_s": window_injected / sample_interval,
+                    "handled_per_s": len(window) / sample_interval,
+                    "backlog": len(self.injected),
+                    "pending_handlers": pending_handlers(),
+                    "rss_mb": rss_bytes() / 1024 / 1024,
+                    "p99_delay_ms": percentile(window, 0.99) * 1000 if window else 0.0,
+                }
+                if tracemalloc.is_tracing():
+                    sample["traced_mb"] = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+                timeline.append(sample)
+                if on_sample is not None:
+                    on_sample(sample)
+                window_injected = 0
+                next_sample += sample_interval
+
+            await asyncio.sleep(1 / rate if rate < 1000 else 0)
+
+        return timeline
+
+
+def pending_handlers() -> int:
+    # discord.py がイベントごとに作るタスクだけを数える
+    return sum(
+        1
+        for t in asyncio.all_tasks()
+        if not t.done()
+        and t.get_name().startswith(("discord.py: ", "CommandTree-invoker"))
+    )
+
+
+async def drain(timeout: float) -> float:
+    """注入したイベントの処理がすべて終わるまでの時間を返します。"""
+    start = time.perf_counter()
+    while pending_handlers() and time.perf_counter() - start < timeout:
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+
+def parse_mix(text: Optional[str]) -> dict[str, int]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"不明なイベントの種類です: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    ids = {
+        k: next_id()
+        for k in ("guild", "admin_role", "disboard", "general", "bump", "question")
+    }
+    features = [
+        f"cogs.{name[:-3]}"
+        for name in sorted(os.listdir(os.path.join(REPO, "cogs")))
+        if name.endswith(".py") and not name.startswith("_")
+    ]
+    features = [f for f in features if f not in args.exclude]
+
+    # 外部のサーバーには接続しない
+    fixture = tempfile.mkdtemp(prefix="mojang-stub-")
+    build_mojang_fixture(fixture, "1.20.4")
+    mojang = MojangStub(fixture, seed=args.seed)
+    base = await mojang.start()
+    endpoints = {
+        "piston_meta": base,
+        "launcher_content": base,
+        "resources": base,
+        "minecraft_data": f"{base}/PrismarineJS/minecraft-data/master",
+    }
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="commandlab-load-")
+    build_workspace(workdir, ids, enabled_features=features, endpoints=endpoints)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO)
+
+    from config import config
+
+    build_game_data(workdir, config.latest_version)
+
+    bot_user = user_payload(next_id(), "CommandLab", bot=True)
+    stub = DiscordRESTStub(bot_user, next_id(), ids["guild"])
+    await stub.start()
+    stub.install()
+
+    from CommandLab import CommandLabBot
+
+    bot = CommandLabBot()
+    # ゲートウェイには接続せず、ログインとsetup_hookだけを行う
+    await bot.login("FIXTURE")
+
+    generator = LoadGenerator(bot, ids, seed=args.seed)
+    bot._connection._add_guild_from_data(generator.guild_payload())
+    generator.install_probes()
+
+    rss_start = rss_bytes()
+    mix = parse_mix(args.mix)
+
+    def show(sample: dict):
+        print(
+            f"{sample['t']:>7.1f}s  in {sample['injected_per_s']:>7.1f}/s"
+            f"  handled {sample['handled_per_s']:>7.1f}/s  backlog {sample['backlog']:>6}"
+            f"  pending {sample['pending_handlers']:>6}  rss {sample['rss_mb']:>7.1f}MB"
+        )
+
+    timeline = await generator.run(args.rate, args.duration, mix, on_sample=show)
+    drain_s = await drain(args.drain_timeout)
+    rss_end = rss_bytes()
+
+    delays = {}
+    for kind, samples in sorted(generator.delays.items()):
+        delays[kind] = {
+            "handled": len(samples),
+            "p50_ms": percentile(samples, 0.5) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "max_ms": max(samples) * 1000,
+        }
+    handled = sum(len(v) for v in generator.delays.values())
+    # 最初の区間は立ち上がりなので除く
+    steady = [s["handled_per_s"] for s in timeline[1:] or timeline] or [0.0]
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "rate": args.rate,
+            "duration": args.duration,
+            "mix": mix,
+            "features": features,
+        },
+        "summary": {
+            "injected": sum(generator.counts.values()),
+            "handled": handled,
+            "unhandled": len(generator.injected),
+            "sustained_per_s": sum(steady) / len(steady),
+            "drain_s": drain_s,
+            "rss_start_mb": rss_start / 1024 / 1024,
+            "rss_end_mb": rss_end / 1024 / 1024,
+            "rss_growth_mb": (rss_end - rss_start) / 1024 / 1024,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "queueing_delay": delays,
+        "rest_requests": dict(stub.requests.most_common()),
+        "mojang_requests": dict(mojang.requests.most_common()),
+        "timeline": timeline,
+    }
+
+    print(
+        f"sustained {report['summary']['sustained_per_s']:.1f}/s"
+        f"  drain {drain_s:.2f}s  rss +{report['summary']['rss_growth_mb']:.1f}MB"
+    )
+    for kind, d in delays.items():
+        print(f"{kind:<24} p50 {d['p50_ms']:>8.2f}ms  p99 {d['p99_ms']:>8.2f}ms")
+
+    await bot.close()
+    await stub.stop()
+    await mojang.stop()
+    os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+    shutil.rmtree(fixture, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="1秒あたりのイベント数")
+    parser.add_argument("--duration", type=float, default=30, help="注入する時間(秒)")
+    parser.add_argument("--mix", help="種類=比率 をカンマ区切りで指定")
+    parser.add_argument("--exclude", nargs="*", default=[], help="読み込まない機能")
+    parser.add_argument("--drain-timeout", type=float, default=60)
+    parser.add_argument("--tracemalloc", action="store_true", help="Pythonのヒープも記録する")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    sys.exit(asyncio.run(main(parser.parse_args())))
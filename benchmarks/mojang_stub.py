@@ -0,0 +1,226 @@
+"""
+Mojangのサーバー (piston-meta / piston-data / launchercontent / resources) と
+minecraft-data (raw.githubusercontent.com) の代わりになるローカルサーバー
+
+    python -m benchmarks.mojang_stub serve --port 8080 --latency 0.05 --bandwidth 2000000
+    python -m benchmarks.mojang_stub record ./mojang_fixture --jar
+
+config.json の endpoints をすべて http://127.0.0.1:8080 に向けて使います。
+(minecraft_data は http://127.0.0.1:8080/PrismarineJS/minecraft-data/master)
+ディレクトリを指定しない場合は合成したフィクスチャを配信します。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+from collections import Counter
+from typing import Optional
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.fixtures import build_mojang_fixture
+
+HOSTS = [
+    "piston-meta.mojang.com",
+    "piston-data.mojang.com",
+    "launchercontent.mojang.com",
+    "resources.download.minecraft.net",
+    "raw.githubusercontent.com",
+]
+
+
+class MojangStub:
+    def __init__(
+        self,
+        root: str,
+        *,
+        latency: float = 0.0,
+        bandwidth: Optional[int] = None,
+        failure_rate: float = 0.0,
+        failure_mode: str = "503",
+        seed: int = 0,
+    ):
+        self.root = root
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.random = random.Random(seed)
+        self.requests: Counter[str] = Counter()
+        self.failures = 0
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _find(self, path: str) -> Optional[str]:
+        for host in HOSTS:
+            file = os.path.join(self.root, host, path.lstrip("/"))
+            if os.path.isfile(file):
+                return file
+        return None
+
+    def _rewrite(self, data: bytes) -> bytes:
+        for host in HOSTS:
+            data = data.replace(f"https://{host}".encode(), self.base_url.encode())
+        return data
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests[request.path] += 1
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        if self.failure_rate > 0 and self.random.random() < self.failure_rate:
+            self.failures += 1
+            if self.failure_mode == "reset" and request.transport is not None:
+                request.transport.close()
+            return web.Response(status=503, text="injected failure")
+
+        file = self._find(request.path)
+        if file is None:
+            return web.Response(status=404)
+
+        with open(file, "rb") as fp:
+            data = fp.read()
+        if file.endswith(".json"):
+            data = self._rewrite(data)
+            content_type = "application/json"
+        else:
+            content_type = "application/octet-stream"
+
+        # GitHubと同じく内容のハッシュをETagにして条件付きリクエストに応答する
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+
+        if self.bandwidth is None:
+            return web.Response(
+                body=data, content_type=content_type, headers={"ETag": etag}
+            )
+
+        resp = web.StreamResponse(headers={"Content-Type": content_type, "ETag": etag})
+        resp.content_length = len(data)
+        await resp.prepare(request)
+        chunk = max(1024, self.bandwidth // 20)
+        for i in range(0, len(data), chunk):
+            part = data[i : i + chunk]
+            await resp.write(part)
+            await asyncio.sleep(len(part) / self.bandwidth)
+        await resp.write_eof()
+        return resp
+
+
+async def record(root: str, version: Optional[str], jar: bool, locales: list[str]):
+    """本物のサーバーから必要なファイルだけをダウンロードして保存します。"""
+
+    async def fetch(client: aiohttp.ClientSession, url: str) -> bytes:
+        async with client.get(url) as resp:
+            resp.raise_for_status()
+            data = await resp.read()
+        path = os.path.join(root, url.split("://", 1)[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fp:
+            fp.write(data)
+        print(f"{len(data):>10} {url}")
+        return data
+
+    async with aiohttp.ClientSession() as client:
+        manifest = json.loads(
+            await fetch(
+                client, "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+            )
+        )
+        await fetch(client, "https://launchercontent.mojang.com/javaPatchNotes.json")
+
+        mcdata = "https://raw.githubusercontent.com/PrismarineJS/minecraft-data/master/data"
+        data_paths = json.loads(await fetch(client, f"{mcdata}/dataPaths.json"))
+
+        targets = [version] if version else list(manifest["latest"].values())
+        for target in targets:
+            entry = data_paths["pc"].get(target, {})
+            for kind in ("items", "blocks"):
+                if kind in entry:
+                    await fetch(client, f"{mcdata}/{entry[kind]}/{kind}.json")
+
+        for entry in manifest["versions"]:
+            if entry["id"] not in targets:
+                continue
+            package = json.loads(await fetch(client, entry["url"]))
+            index = json.loads(await fetch(client, package["assetIndex"]["url"]))
+            for locale in locales:
+                obj = index["objects"].get(f"minecraft/lang/{locale}.json")
+                if obj is not None:
+                    h = obj["hash"]
+                    await fetch(
+                        client, f"https://resources.download.minecraft.net/{h[:2]}/{h}"
+                    )
+            if jar:
+                await fetch(client, package["downloads"]["client"]["url"])
+
+
+async def serve(args: argparse.Namespace):
+    root = args.root
+    if root is None:
+        root = tempfile.mkdtemp(prefix="mojang-stub-")
+        build_mojang_fixture(root, args.version or "1.20.4")
+
+    stub = MojangStub(
+        root,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        failure_rate=args.failure_rate,
+        failure_mode=args.failure_mode,
+        seed=args.seed,
+    )
+    print(f"{await stub.start(args.host, args.port)} で {root} を配信しています")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("serve")
+    p.add_argument("root", nargs="?")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--version")
+    p.add_argument("--latency", type=float, default=0.0, help="応答までの遅延(秒)")
+    p.add_argument("--bandwidth", type=int, help="帯域制限(バイト/秒)")
+    p.add_argument("--failure-rate", type=float, default=0.0, help="失敗させる割合")
+    p.add_argument("--failure-mode", choices=["503", "reset"], default="503")
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("record")
+    p.add_argument("root")
+    p.add_argument("--version")
+    p.add_argument("--jar", action="store_true", help="client.jarも保存する")
+    p.add_argument("--locales", nargs="*", default=["ja_jp", "en_us"])
+
+    args = parser.parse_args()
+    if args.mode == "serve":
+        asyncio.run(serve(args))
+    else:
+        asyncio.run(record(args.root, args.version, args.jar, args.locales))
@@ -20,13 +20,15 @@ DESCRIPTIONS = [
 
 class CNoticeConfirm(discord.ui.View):
     def __init__(self, embed: discord.Embed):
-        super().__init__(timeout=None)
+        # 確認用のメッセージはephemeralなので、放置されたら破棄する
+        super().__init__(timeout=600)
         self.embed = embed
 
     @discord.ui.button(label="OK")
     async def ok(self, interaction: discord.Interaction, item: discord.ui.Item):
         await interaction.response.edit_message(content="送信しました", view=None, embed=None)
         await interaction.channel.send(embed=self.embed)
+        self.stop()
 
 
 class CAdminCog(commands.Cog):
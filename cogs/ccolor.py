@@ -6,6 +6,7 @@ from discord import app_commands
 from discord.ext import commands
 from PIL import Image, ImageColor, ImageDraw
 
+from utils.metrics import measure_render
 from utils.util import create_codeblock, create_embed
 
 
@@ -23,12 +24,13 @@ class CColor(app_commands.Group):
         try:
             c_color = int(color.replace("#", ""), base=16)
             cc_color = ImageColor.getrgb(color)
-            image = Image.new("RGB", (1024, 300), color=cc_color)
-            d = ImageDraw.Draw(image)
-            d.rectangle((0, 0, 1024, 300), fill=cc_color)
+            with measure_render():
+                image = Image.new("RGB", (1024, 300), color=cc_color)
+                d = ImageDraw.Draw(image)
+                d.rectangle((0, 0, 1024, 300), fill=cc_color)
 
-            data = io.BytesIO()
-            image.save(data, format="PNG")
+                data = io.BytesIO()
+                image.save(data, format="PNG")
             file = discord.File(io.BytesIO(data.getvalue()), filename="color.png")
 
             embed = discord.Embed(
@@ -55,12 +57,13 @@ class CColor(app_commands.Group):
             color = "#" + randhex()[2:] + randhex()[2:] + randhex()[2:]
             c_color = int(color.replace("#", ""), base=16)
             cc_color = ImageColor.getrgb(color)
-            image = Image.new("RGB", (1024, 300), color=cc_color)
-            d = ImageDraw.Draw(image)
-            d.rectangle((0, 0, 1024, 300), fill=cc_color)
+            with measure_render():
+                image = Image.new("RGB", (1024, 300), color=cc_color)
+                d = ImageDraw.Draw(image)
+                d.rectangle((0, 0, 1024, 300), fill=cc_color)
 
-            data = io.BytesIO()
-            image.save(data, format="PNG")
+                data = io.BytesIO()
+                image.save(data, format="PNG")
             file = discord.File(io.BytesIO(data.getvalue()), filename="color.png")
 
             embed = discord.Embed(
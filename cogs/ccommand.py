@@ -1,4 +1,6 @@
+import asyncio
 import json
+import re
 from datetime import datetime
 from typing import Any, Optional
 
@@ -10,108 +12,155 @@ from discord.ext import commands
 from schemas.data import CommandEntry
 from utils.util import create_codeblock, create_embed
 
+COMMANDS_PATH = "./data/commands.json"
+
+
+EDITIONS = {"je": "Java Edition", "be": "Bedrock Edition"}
+
+
+def create_command_embed(
+    command: str, d: CommandEntry, edition: str
+) -> Optional[Embed]:
+    if getattr(d.ver, edition) is None:
+        return None
+    options = getattr(d.options, edition)
+    example = getattr(d.exmp, edition)
+
+    embed = Embed(
+        color=0xAA00BB,
+        title=f"/{command}",
+        description=d.desc,
+        timestamp=datetime.now(),
+    )
+    embed.set_author(name=EDITIONS[edition])
+    embed.add_field(
+        name="使用法",
+        value=create_codeblock("/" + options if options != "-" else f"/{command}"),
+        inline=False,
+    )
+    embed.add_field(
+        name="例",
+        value=create_codeblock(example if example != "-" else f"/{command}"),
+        inline=False,
+    )
+    return embed
+
+
+class CCommandEditionButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"ccmd:(?P<edition>je|be):(?P<command>[^:]+)",
+):
+    """
+    JE/BEを切り替えるボタン
+
+    custom_id にコマンド名とエディションを含めているので、メッセージごとの状態を持たず、
+    再起動前に送ったメッセージのボタンもそのまま使えます。
+    """
+
+    def __init__(
+        self, command: str, edition: str, active: bool = False, disabled: bool = False
+    ):
+        super().__init__(
+            discord.ui.Button(
+                label=edition.upper(),
+                style=discord.ButtonStyle.primary if active else discord.ButtonStyle.secondary,
+                custom_id=f"ccmd:{edition}:{command}",
+                disabled=disabled,
+            )
+        )
+        self.command = command
+        self.edition = edition
 
-class CCommandInfoButtons(discord.ui.View):
-    def __init__(self, je: Optional[Embed] = None, be: Optional[Embed] = None):
-        super().__init__(timeout=None)
-        if je is None:
-            self.je.disabled = True
-        if be is None:
-            self.be.disabled = True
-        self.je_embed = je
-        self.be_embed = be
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]
+    ):
+        return cls(match["command"], match["edition"])
+
+    async def callback(self, interaction: discord.Interaction):
+        cog: Optional[CCommandInfo] = interaction.client.get_cog("CCommandInfo")
+        d = cog.entries.get(self.command) if cog is not None else None
+        embed = (
+            create_command_embed(self.command, d, self.edition) if d is not None else None
+        )
+        if embed is None:
+            await interaction.response.send_message(
+                embed=create_embed(title="エラー", description="コマンドが不明です"),
+                ephemeral=True,
+            )
+            return
+
+        await interaction.response.edit_message(
+            embed=embed, view=edition_view(self.command, d, self.edition)
+        )
+
+
+def edition_view(command: str, d: CommandEntry, active: str) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    for edition in EDITIONS:
+        view.add_item(
+            CCommandEditionButton(
+                command,
+                edition,
+                active=edition == active,
+                disabled=getattr(d.ver, edition) is None,
+            )
+        )
+    return view
 
-    @discord.ui.button(label="JE")
-    async def je(self, interaction: discord.Interaction, item: discord.ui.Item):
-        await interaction.response.edit_message(embed=self.je_embed)
 
-    @discord.ui.button(label="BE")
-    async def be(self, interaction: discord.Interaction, item: discord.ui.Item):
-        await interaction.response.edit_message(embed=self.be_embed)
+def load_commands(raw: bytes) -> dict[str, CommandEntry]:
+    data: dict[str, Any] = json.loads(raw)["command_data"]
+    return {k: CommandEntry.model_validate(v) for k, v in data.items()}
 
 
 class CCommandInfo(commands.Cog):
+    entries: dict[str, CommandEntry]
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.entries = {}
+
+    async def cog_load(self):
+        async with aiofiles.open(COMMANDS_PATH, mode="rb") as fp:
+            raw = await fp.read()
+        self.entries = await asyncio.to_thread(load_commands, raw)
 
     @app_commands.command(name="ccommand", description="コマンドの情報を表示します")
     async def ccommand(self, interaction: discord.Interaction, command: str):
-        async with aiofiles.open("./data/commands.json", mode="rb") as fp:
-            data: dict[str, Any] = json.loads(await fp.read())["command_data"]
-            if command not in data:
-                await interaction.response.send_message(
-                    embed=create_embed(title="エラー", description="コマンドが不明です")
-                )
-                return
-            d = CommandEntry.model_validate(data[command])
-
-        je_embed = None
-        be_embed = None
-        if d.ver.je is not None:
-            je_embed = Embed(
-                color=0xAA00BB,
-                title=f"/{command}",
-                description=d.desc,
-                timestamp=datetime.now(),
-            )
-            je_embed.set_author(name="Java Edition")
-            je_embed.add_field(
-                name="使用法",
-                value=create_codeblock(
-                    "/" + d.options.je if d.options.je != "-" else f"/{command}"
-                ),
-                inline=False,
-            )
-            je_embed.add_field(
-                name="例",
-                value=create_codeblock(
-                    d.exmp.je if d.exmp.je != "-" else f"/{command}"
-                ),
-                inline=False,
+        d = self.entries.get(command)
+        if d is None:
+            await interaction.response.send_message(
+                embed=create_embed(title="エラー", description="コマンドが不明です")
             )
+            return
 
-        if d.ver.be is not None:
-            be_embed = Embed(
-                color=0xAA00BB,
-                title=f"/{command}",
-                description=d.desc,
-                timestamp=datetime.now(),
-            )
-            be_embed.set_author(name="Bedrock Edition")
-            be_embed.add_field(
-                name="使用法",
-                value=create_codeblock(
-                    "/" + d.options.be if d.options.be != "-" else f"/{command}"
-                ),
-                inline=False,
-            )
-            be_embed.add_field(
-                name="例",
-                value=create_codeblock(
-                    d.exmp.be if d.exmp.be != "-" else f"/{command}"
-                ),
-                inline=False,
-            )
-
-        view = None
-        if d.is_diff:
-            view = CCommandInfoButtons(je_embed, be_embed)
+        edition = "je" if d.ver.je is not None else "be"
+        embed = create_command_embed(command, d, edition)
 
-        await interaction.response.send_message(embed=(je_embed or be_embed), view=view)
+        # custom_id は100文字まで
+        if d.is_diff and len(f"ccmd:je:{command}") <= 100:
+            await interaction.response.send_message(
+                embed=embed, view=edition_view(command, d, edition)
+            )
+        else:
+            await interaction.response.send_message(embed=embed)
 
     @ccommand.autocomplete("command")
     async def ccommand_autocomplete(
         self, interaction: discord.Interaction, current: str
     ):
-        async with aiofiles.open("./data/commands.json", mode="rb") as fp:
-            data: dict[str, Any] = json.loads(await fp.read())["command_data"]
-
-            return [
-                app_commands.Choice(name=k, value=k)
-                for k in data.keys()
-                if k.startswith(current)
-            ][:25]
+        return [
+            app_commands.Choice(name=k, value=k)
+            for k in self.entries.keys()
+            if k.startswith(current)
+        ][:25]
 
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(CCommandInfo(bot))
+    bot.add_dynamic_items(CCommandEditionButton)
+
+
+async def teardown(bot: commands.Bot):
+    bot.remove_dynamic_items(CCommandEditionButton)
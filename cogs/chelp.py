@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import partial
 from typing import Optional
 
 import discord
@@ -10,35 +11,54 @@ from utils.paginator import EmbedPaginator
 from utils.util import create_codeblock
 
 
+PAGE_SIZE = 5
+
+
+def create_help_embed(cmds: list[tuple[str, str]]) -> discord.Embed:
+    emb = discord.Embed(title="ヘルプ", timestamp=datetime.now(), color=0x00AA00)
+    for name, description in cmds:
+        emb.add_field(name=name, value=create_codeblock(description), inline=False)
+    return emb
+
+
 class CHelpCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # (コマンドツリーのリビジョン, 運営かどうか) -> ページごとのコマンド
+        self._pages: dict[tuple[int, bool], list[list[tuple[str, str]]]] = {}
+
+    def build_pages(self, admin: bool) -> list[list[tuple[str, str]]]:
+        cmds = [
+            ("/" + cmd.qualified_name, cmd.description)
+            for cmd in self.bot.tree.walk_commands()
+            if not isinstance(cmd, app_commands.Group)
+            and (admin or "運営" not in cmd.description)
+        ]
+        return [cmds[i : i + PAGE_SIZE] for i in range(0, len(cmds), PAGE_SIZE)]
+
+    def help_pages(self, admin: bool) -> list[list[tuple[str, str]]]:
+        """
+        /chelp の各ページに表示するコマンドの名前と説明を返します。
+
+        運営向けと一般向けで1回ずつ作成し、コマンドツリーが変わるまで使い回します。
+        リビジョンを持たないコマンドツリーの場合は毎回作成します。
+        """
+        revision = getattr(self.bot.tree, "revision", None)
+        if revision is None:
+            return self.build_pages(admin)
+        key = (revision, admin)
+        if key not in self._pages:
+            self._pages = {k: v for k, v in self._pages.items() if k[0] == revision}
+            self._pages[key] = self.build_pages(admin)
+        return self._pages[key]
 
     @app_commands.command(name="chelp", description="このBotができること一覧")
     @app_commands.guild_only()
     async def chelp(self, interaction: discord.Interaction):
-        embeds: list[discord.Embed] = []
-        cmds: list[app_commands.Command] = []
-        roles = [r.id for r in interaction.user.roles]
-
-        for cmd in self.bot.tree.walk_commands():
-            if cmd.description in "運営":
-                if config.administrater_role_id not in roles:
-                    continue
-            if not isinstance(cmd, app_commands.Group):
-                cmds.append(cmd)
-
-        for i in range(0, len(cmds), 5):
-            emb = discord.Embed(title="ヘルプ", timestamp=datetime.now(), color=0x00AA00)
-            for command in cmds[i : i + 5]:
-                c_name = "/" + command.qualified_name
-                c_desc = create_codeblock(command.description)
-
-                emb.add_field(name=f"{c_name}", value=c_desc, inline=False)
-
-            embeds.append(emb)
+        admin = any(r.id == config.administrater_role_id for r in interaction.user.roles)
+        pages = [partial(create_help_embed, cmds) for cmds in self.help_pages(admin)]
 
-        await EmbedPaginator(timeout=None).start(interaction, embeds)
+        await EmbedPaginator(timeout=600).start(interaction, pages)
 
     @app_commands.command(name="cping", description="pingを計測します")
     @app_commands.guild_only()
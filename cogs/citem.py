@@ -1,196 +1,217 @@
 import io
-import json
-import zipfile
+import logging
 from datetime import datetime
+from typing import Optional
 
-import aiofiles
 import discord
 from discord import app_commands
 from discord.ext import commands
 from PIL import Image
 
 from config import config
-from schemas.data import Blocks, DataPaths, Items
-from utils.util import create_codeblock
+from utils.mcdata import datasets
+from utils.metrics import measure_render
+from utils.util import create_codeblock, create_embed
+
+logger = logging.getLogger(__name__)
 
 
 class CItem(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # 最初の入力補完が遅くならないように検索インデックスを先に作っておく
+        try:
+            (await datasets.get()).search_index()
+        except Exception as e:
+            logger.warning(f"検索インデックスを作成できませんでした: {e}")
+
     @app_commands.command(name="citem", description="アイテムを検索します")
-    @app_commands.describe(id="アイテムまたはブロックID")
+    @app_commands.describe(
+        id="アイテムまたはブロックのIDか名前", version="バージョン (省略すると最新版)"
+    )
     @app_commands.guild_only()
-    async def citem(self, interaction: discord.Interaction, id: str):
-        async with aiofiles.open("./minecraft_data/data/dataPaths.json") as fp:
-            dataPath = DataPaths.model_validate_json(await fp.read())
-
-            async with aiofiles.open(
-                "./minecraft_data/data/"
-                + dataPath.pc[config.latest_version].items
-                + "/items.json"
-            ) as fp:
-                async with aiofiles.open(
-                    "./minecraft_data/data/"
-                    + dataPath.pc[config.latest_version].blocks
-                    + "/blocks.json"
-                ) as fp2:
-                    items = Items.model_validate_json(await fp.read())
-                    blocks = Blocks.model_validate_json(await fp2.read())
-                    for item in items.root:
-                        if item.name == id.replace("minecraft:", ""):
-
-                            is_item = id not in [b.name for b in blocks.root]
-                            block = next(
-                                iter([b for b in blocks.root if b.name == item.name]),
-                                None,
-                            )
-
-                            async with aiofiles.open(
-                                "./tmp/ja_jp.json", mode="rb"
-                            ) as lang_fp:
-                                with zipfile.ZipFile(
-                                    f"./tmp/client_{config.latest_version}.jar"
-                                ) as zipfp:
-                                    tn = "item" if is_item else "block"
-                                    lang_data = json.loads(await lang_fp.read())
-                                    lang_text = lang_data[f"{tn}.minecraft.{item.name}"]
-                                    with zipfp.open(
-                                        f"assets/minecraft/textures/{tn}/{id}.png"
-                                    ) as imgfp:
-                                        img = Image.open(imgfp).resize(
-                                            (256, 256), Image.Resampling.NEAREST
-                                        )
-                                        streamimg = io.BytesIO()
-                                        img.save(streamimg, "WEBP")
-                                        file = discord.File(
-                                            io.BytesIO(streamimg.getvalue()),
-                                            filename=f"{id}.webp",
-                                        )
-                                        files = [file]
-                                        embed = discord.Embed(
-                                            title=lang_text,
-                                            description=create_codeblock(
-                                                "minecraft:" + item.name
-                                            ),
-                                            timestamp=datetime.now(),
-                                        )
-                                        embed.add_field(
-                                            name="最大スタック数",
-                                            value=create_codeblock(f"{item.stackSize}"),
-                                        )
-
-                                        if block is not None:
-                                            if block.boundingBox != "empty":
-                                                embed.add_field(
-                                                    name="爆破耐性",
-                                                    value=create_codeblock(
-                                                        block.resistance
-                                                    ),
-                                                )
-                                                embed.add_field(
-                                                    name="硬度",
-                                                    value=create_codeblock(
-                                                        block.hardness
-                                                    ),
-                                                )
-
-                                            if block.material == "mineable/pickaxe":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("ピッケル"),
-                                                )
-                                            elif block.material == "mineable/axe":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("斧"),
-                                                )
-                                            elif block.material == "mineable/shovel":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("シャベル"),
-                                                )
-                                            elif block.material == "mineable/hoe":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("クワ"),
-                                                )
-                                            elif block.material == "wool":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("ハサミ"),
-                                                )
-                                            elif block.material == "coweb":
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("剣"),
-                                                )
-                                            else:
-                                                embed.add_field(
-                                                    name="適正ツール",
-                                                    value=create_codeblock("素手"),
-                                                )
-
-                                            di_imgs = Image.new(
-                                                "RGBA", (1000, 64), 0x000000FF
-                                            )
-                                            for d in block.drops:
-                                                if drop_item := next(
-                                                    iter(
-                                                        [
-                                                            di
-                                                            for di in items.root
-                                                            if di.id == d
-                                                        ]
-                                                    ),
-                                                    None,
-                                                ):
-                                                    di_is_item = drop_item.name not in [
-                                                        b.name for b in blocks.root
-                                                    ]
-                                                    ci = 8
-                                                    di_typename = (
-                                                        "item"
-                                                        if di_is_item
-                                                        else "block"
-                                                    )
-                                                    with zipfp.open(
-                                                        f"assets/minecraft/textures/{di_typename}/{drop_item.name}.png"
-                                                    ) as imgfp2:
-                                                        ci += 68
-                                                        di_imgs.paste(
-                                                            Image.open(imgfp2).resize(
-                                                                (64, 64),
-                                                                Image.Resampling.NEAREST,
-                                                            ),
-                                                            (ci, 0),
-                                                        )
-
-                                            di_imgs_stream = io.BytesIO()
-                                            di_imgs.save(di_imgs_stream, "WEBP")
-                                            file2 = discord.File(
-                                                io.BytesIO(di_imgs_stream.getvalue()),
-                                                filename=f"{id}_loot.webp",
-                                            )
-                                            files.append(file2)
-                                            embed.add_field(
-                                                name="ドロップアイテム", value="", inline=False
-                                            )
-                                            embed.set_image(
-                                                url=f"attachment://{id}_loot.webp"
-                                            )
-
-                                        embed.set_thumbnail(
-                                            url=f"attachment://{id}.webp"
-                                        )
-
-                                        typename_jp = "アイテム" if is_item else "ブロック"
-                                        embed.set_author(name=typename_jp)
-
-                                        await interaction.response.send_message(
-                                            embed=embed, files=files
-                                        )
-                            return
+    async def citem(
+        self,
+        interaction: discord.Interaction,
+        id: str,
+        version: Optional[str] = None,
+    ):
+        version = version or config.latest_version
+        if version not in await datasets.versions():
+            await interaction.response.send_message(
+                embed=create_embed("エラー", "バージョンが見つかりませんでした"),
+                ephemeral=True,
+            )
+            return
+        if version not in datasets.datasets:
+            # 古いバージョンはダウンロードに時間がかかることがある
+            await interaction.response.defer()
+
+        try:
+            data = await datasets.get(version)
+        except KeyError:
+            await interaction.followup.send(
+                embed=create_embed("エラー", "このバージョンのデータを取得できませんでした")
+            )
+            return
+
+        id = id.replace("minecraft:", "")
+        user_lang = data.lang_for(interaction.locale)
+        if (found := user_lang.lookup(id) or data.lang.lookup(id)) is not None:
+            id = found[1]
+
+        item = data.item(id)
+        if item is None:
+            embed = create_embed("エラー", "アイテムが見つかりませんでした")
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        is_item = not data.is_block(id)
+        block = data.block(item.name)
+
+        tn = "item" if is_item else "block"
+        lang_text = (
+            user_lang.name(tn, item.name)
+            or data.lang.name(tn, item.name)
+            or item.displayName
+        )
+        files = []
+        if (texture := data.texture(tn, id)) is not None:
+            with measure_render():
+                img = Image.open(io.BytesIO(texture)).resize(
+                    (256, 256), Image.Resampling.NEAREST
+                )
+                streamimg = io.BytesIO()
+                img.save(streamimg, "WEBP")
+            files.append(
+                discord.File(io.BytesIO(streamimg.getvalue()), filename=f"{id}.webp")
+            )
+
+        embed = discord.Embed(
+            title=lang_text,
+            description=create_codeblock("minecraft:" + item.name),
+            timestamp=datetime.now(),
+        )
+        embed.add_field(
+            name="最大スタック数",
+            value=create_codeblock(f"{item.stackSize}"),
+        )
+
+        if block is not None:
+            if block.boundingBox != "empty":
+                embed.add_field(
+                    name="爆破耐性",
+                    value=create_codeblock(block.resistance),
+                )
+                embed.add_field(
+                    name="硬度",
+                    value=create_codeblock(block.hardness),
+                )
+
+            if block.material == "mineable/pickaxe":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("ピッケル"),
+                )
+            elif block.material == "mineable/axe":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("斧"),
+                )
+            elif block.material == "mineable/shovel":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("シャベル"),
+                )
+            elif block.material == "mineable/hoe":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("クワ"),
+                )
+            elif block.material == "wool":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("ハサミ"),
+                )
+            elif block.material == "coweb":
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("剣"),
+                )
+            else:
+                embed.add_field(
+                    name="適正ツール",
+                    value=create_codeblock("素手"),
+                )
+
+            di_imgs = Image.new("RGBA", (1000, 64), 0x000000FF)
+            for d in block.drops:
+                if drop_item := data.items_by_id.get(d):
+                    di_is_item = not data.is_block(drop_item.name)
+                    ci = 8
+                    di_typename = "item" if di_is_item else "block"
+                    drop_texture = data.texture(di_typename, drop_item.name)
+                    if drop_texture is None:
+                        continue
+                    with measure_render():
+                        ci += 68
+                        di_imgs.paste(
+                            Image.open(io.BytesIO(drop_texture)).resize(
+                                (64, 64),
+                                Image.Resampling.NEAREST,
+                            ),
+                            (ci, 0),
+                        )
+
+            di_imgs_stream = io.BytesIO()
+            with measure_render():
+                di_imgs.save(di_imgs_stream, "WEBP")
+            file2 = discord.File(
+                io.BytesIO(di_imgs_stream.getvalue()),
+                filename=f"{id}_loot.webp",
+            )
+            files.append(file2)
+            embed.add_field(name="ドロップアイテム", value="", inline=False)
+            embed.set_image(url=f"attachment://{id}_loot.webp")
+
+        if texture is not None:
+            embed.set_thumbnail(url=f"attachment://{id}.webp")
+
+        typename_jp = "アイテム" if is_item else "ブロック"
+        embed.set_author(name=typename_jp)
+
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, files=files)
+        else:
+            await interaction.response.send_message(embed=embed, files=files)
+
+    @citem.autocomplete("id")
+    async def citem_autocomplete(self, interaction: discord.Interaction, current: str):
+        version = interaction.namespace.version
+        if version not in datasets.datasets:
+            # 読み込まれていないバージョンは最新版の候補で代用する
+            version = config.latest_version
+        index = (await datasets.get(version)).search_index()
+        return [
+            app_commands.Choice(name=entry.label[:100], value=entry.id)
+            for entry in index.search(current)
+        ]
+
+    @citem.autocomplete("version")
+    async def version_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ):
+        versions = await datasets.versions()
+        return [
+            app_commands.Choice(name=v, value=v)
+            for v in reversed(versions)
+            if v.startswith(current)
+        ][:25]
 
 
 async def setup(bot: commands.Bot):
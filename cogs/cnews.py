@@ -1,51 +1,142 @@
+import asyncio
+import logging
 from datetime import datetime
+from functools import partial
 from typing import Optional
 
 import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
-from markdownify import markdownify as md
 
-from schemas.patch_note import PatchNote
+from config.config import config
 from schemas.version_manifest import VersionManifest
+from utils.metrics import trace_config
+from utils.newsindex import news_index
+from utils.paginator import EmbedPaginator
+from utils.patchnotes import patch_notes
 
-JAVA_PATCH_NOTES = "https://launchercontent.mojang.com/javaPatchNotes.json"
 JAVA_VERSION_MANIFESTS = (
-    "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+    config.endpoints.piston_meta + "/mc/game/version_manifest_v2.json"
 )
 SPLIT_LINE = "--------------------------"
+SEARCH_PAGE_SIZE = 5
+
+
+logger = logging.getLogger(__name__)
+
+
+def article_url(version: str) -> str:
+    """minecraft.netの更新情報の記事のURL"""
+    slug = version.replace(".", "-")
+    if "-pre" in version:
+        slug = slug.replace("-pre", "-pre-release-")
+    elif "-rc" in version:
+        slug = slug.replace("-rc", "-release-candidate-")
+    elif "." in version:
+        slug = "java-edition-" + slug
+    else:
+        slug = "snapshot-" + slug
+    return f"https://www.minecraft.net/en-us/article/minecraft-{slug}"
+
+
+def changelog_links(version: str) -> list[tuple[str, str]]:
+    return [
+        ("【English References】", article_url(version)),
+        ("【English Wiki】", f"https://minecraft.wiki/w/Java_Edition_{version}"),
+        ("【Japanese Wiki】", f"https://ja.minecraft.wiki/w/Java_Edition_{version}"),
+    ]
+
+
+def add_changelog_fields(embed: discord.Embed, version: str):
+    for name, url in changelog_links(version):
+        embed.add_field(name=name, value=url, inline=False)
 
 
 class CNews(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.warmup: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        # 最初の検索で検索インデックスの作成を待たないようにする
+        self.warmup = asyncio.create_task(self.build_index())
+
+    async def cog_unload(self):
+        if self.warmup is not None:
+            self.warmup.cancel()
+
+    async def build_index(self):
+        try:
+            await news_index.get()
+        except Exception as e:
+            logger.warning(f"パッチノートの検索インデックスを作成できませんでした: {e}")
 
     @app_commands.command(name="cnews", description="更新情報の詳細を表示します")
     @app_commands.guild_only()
     async def cnews(self, interaction: discord.Interaction, version: str):
         await interaction.response.defer()
         try:
-            async with aiohttp.ClientSession(JAVA_PATCH_NOTES) as client:
-                async with client.get("") as resp:
-                    data = PatchNote.model_validate(await resp.json())
-                    for entry in data.entries:
-                        if entry.version == version:
-                            embed = discord.Embed(
-                                title=entry.title,
-                                description=md(entry.body[:4000])
-                                + ("..." if len(entry.body) > 4000 else ""),
-                            )
-                            embed.set_thumbnail(
-                                url="https://launchercontent.mojang.com{}".format(
-                                    entry.image.url
-                                )
-                            )
-                            await interaction.followup.send(embed=embed)
-                            return
+            result = await patch_notes.get_pages(version)
+        except Exception:
+            await interaction.followup.send("エラーが発生しました")
+            return
+        if result is None:
             await interaction.followup.send("バージョンが見つかりませんでした")
+            return
+
+        entry, pages = result
+
+        def create_page(index: int) -> discord.Embed:
+            embed = discord.Embed(title=entry.title, description=pages[index])
+            # Discordから見えるURLなので常に本物のサーバーを指す
+            embed.set_thumbnail(
+                url="https://launchercontent.mojang.com{}".format(entry.image.url)
+            )
+            return embed
+
+        if len(pages) == 1:
+            await interaction.followup.send(embed=create_page(0))
+            return
+        await EmbedPaginator(timeout=600).start(
+            interaction, [partial(create_page, i) for i in range(len(pages))]
+        )
+
+    @app_commands.command(
+        name="cnews-search", description="更新情報をキーワードで検索します"
+    )
+    @app_commands.describe(query="検索するキーワード (例: copper bulb)")
+    @app_commands.guild_only()
+    async def cnews_search(self, interaction: discord.Interaction, query: str):
+        await interaction.response.defer()
+        try:
+            hits = await news_index.search(query)
         except Exception:
             await interaction.followup.send("エラーが発生しました")
+            return
+        if not hits:
+            await interaction.followup.send("見つかりませんでした")
+            return
+
+        def create_page(start: int) -> discord.Embed:
+            embed = discord.Embed(
+                title=f"「{query}」の検索結果 ({len(hits)}件)", color=0x00AA00
+            )
+            for hit in hits[start : start + SEARCH_PAGE_SIZE]:
+                embed.add_field(
+                    name=f"{hit.title} ({hit.version})",
+                    value=discord.utils.escape_markdown(hit.snippet),
+                    inline=False,
+                )
+            return embed
+
+        starts = range(0, len(hits), SEARCH_PAGE_SIZE)
+        if len(starts) == 1:
+            await interaction.followup.send(embed=create_page(0))
+            return
+        await EmbedPaginator(timeout=600).start(
+            interaction, [partial(create_page, i) for i in starts]
+        )
 
     @app_commands.command(name="creference", description="更新情報を表示します")
     @app_commands.guild_only()
@@ -54,94 +145,34 @@ class CNews(commands.Cog):
     ):
         await interaction.response.defer()
         try:
-            async with aiohttp.ClientSession() as client:
+            async with aiohttp.ClientSession(trace_configs=[trace_config()]) as client:
                 async with client.get(JAVA_VERSION_MANIFESTS) as resp:
                     data = VersionManifest.model_validate(await resp.json())
 
-                    clsv = data.latest.snapshot
-                    clrv = version or data.latest.release
-                    cclrv = clrv.replace(".", "-")
-                    cclsv = "" if "pre" in clsv else "snapshot-"
-                    +clsv.replace(".", "-").replace("-pre", "-pre-release-")
-
-                    clsv2 = f"{clsv} & {clrv}" if version == "" else clrv
-                    latest_embed = discord.Embed(
-                        title=f"【 {clsv2} 】のchangelog",
-                        color=discord.Color.orange(),
-                        timestamp=datetime.now(),
-                    )
-                    if version == "":
-                        latest_embed.add_field(
-                            name=f"{SPLIT_LINE}\nLatest Snapshot Version\n{SPLIT_LINE}",
-                            value="",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【English References】",
-                            value=f"https://www.minecraft.net/en-us/article/minecraft-{cclsv}",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【English Wiki】",
-                            value=f"https://minecraft.wiki/w/Java_Edition_{clsv}",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【Japanese Wiki】",
-                            value=f"https://ja.minecraft.wiki/w/Java_Edition_{clsv}",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name=f"{SPLIT_LINE}\nLatest Release Version\n{SPLIT_LINE}",
-                            value="",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【English References】",
-                            value="https://www.minecraft.net/en-us/article/minecraft-java-edition-{cclrv}",
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【English Wiki】",
-                            value="https://minecraft.wiki/w/Java_Edition_{}".format(
-                                clrv
-                            ),
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【Japanese Wiki】",
-                            value="https://ja.minecraft.wiki/w/Java_Edition_{}".format(
-                                clrv
-                            ),
-                            inline=False,
-                        )
-                    else:
-                        if clrv.count(".") >= 1:
-                            latest_embed.add_field(
-                                name="【English References】",
-                                value="https://www.minecraft.net/en-us/article/minecraft-java-edition-"
-                                + cclrv,
-                                inline=False,
-                            )
-                        else:
-                            latest_embed.add_field(
-                                name="【English References】",
-                                value="https://www.minecraft.net/en-us/article/minecraft-snapshot-"
-                                + cclrv,
-                                inline=False,
-                            )
-                        latest_embed.add_field(
-                            name="【English Wiki】",
-                            value="https://minecraft.wiki/w/Java_Edition_" + clrv,
-                            inline=False,
-                        )
-                        latest_embed.add_field(
-                            name="【Japanese Wiki】",
-                            value="https://ja.minecraft.wiki/w/Java_Edition_" + clrv,
-                            inline=False,
-                        )
-
-                    await interaction.followup.send(embed=latest_embed)
+            clsv = data.latest.snapshot
+            clrv = version or data.latest.release
+
+            clsv2 = f"{clsv} & {clrv}" if version == "" else clrv
+            latest_embed = discord.Embed(
+                title=f"【 {clsv2} 】のchangelog",
+                color=discord.Color.orange(),
+                timestamp=datetime.now(),
+            )
+            if version == "":
+                latest_embed.add_field(
+                    name=f"{SPLIT_LINE}\nLatest Snapshot Version\n{SPLIT_LINE}",
+                    value="",
+                    inline=False,
+                )
+                add_changelog_fields(latest_embed, clsv)
+                latest_embed.add_field(
+                    name=f"{SPLIT_LINE}\nLatest Release Version\n{SPLIT_LINE}",
+                    value="",
+                    inline=False,
+                )
+            add_changelog_fields(latest_embed, clrv)
+
+            await interaction.followup.send(embed=latest_embed)
         except Exception:
             await interaction.followup.send("エラーが発生しました")
 
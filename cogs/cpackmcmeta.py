@@ -10,9 +10,11 @@ from discord import app_commands
 from discord.ext import commands
 from pydantic import BaseModel
 
+from cogs.cnews import JAVA_VERSION_MANIFESTS
 from config.config import PackVersionEntry, pack_versions
 from schemas.game_package import GamePackage
 from schemas.version_manifest import VersionManifest
+from utils.metrics import trace_config
 from utils.setup import VersionData
 from utils.util import create_codeblock
 
@@ -122,10 +124,8 @@ class CPackMcMeta(app_commands.Group):
     @app_commands.command(name="latest", description="最新バージョンのformatを出力します")
     @app_commands.guild_only()
     async def latest(self, interaction: discord.Interaction):
-        async with aiohttp.ClientSession() as client:
-            async with client.get(
-                "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
-            ) as resp1:
+        async with aiohttp.ClientSession(trace_configs=[trace_config()]) as client:
+            async with client.get(JAVA_VERSION_MANIFESTS) as resp1:
                 version_manifest = VersionManifest.model_validate(await resp1.json())
                 lv_embed = discord.Embed(
                     title="Latest Version pack_format", color=discord.Color.yellow()
@@ -0,0 +1,107 @@
+import math
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.metrics import INTERACTION_DEADLINE, Histogram, metrics
+from utils.util import create_codeblock
+
+
+def format_quantile(histogram: Optional[Histogram], q: float) -> str:
+    """分位点を表示用にします。最大のバケットを超えた場合は「>最大値」にします。"""
+    value = histogram.quantile(q) if histogram is not None else 0.0
+    if math.isinf(value):
+        return f">{histogram.buckets[-1]}s"
+    return f"≦{value}s"
+
+
+class CStatsCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="cstats", description="【運営】コマンドの応答時間を表示します")
+    @app_commands.guild_only()
+    async def cstats(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("権限あらへんで(関西弁)", ephemeral=True)
+            return
+
+        rows = []
+        for name in metrics.label_values("commandlab_command_handler_seconds", "command"):
+            for kind in ("command", "autocomplete"):
+                handler = metrics.get_histogram(
+                    "commandlab_command_handler_seconds", command=name, kind=kind
+                )
+                if handler is None:
+                    continue
+                first = metrics.get_histogram(
+                    "commandlab_command_first_response_seconds", command=name, kind=kind
+                )
+                rows.append(
+                    (
+                        first.quantile(0.99) if first is not None else 0.0,
+                        name,
+                        kind,
+                        first,
+                        handler,
+                        metrics.get_counter(
+                            "commandlab_command_deadline_miss_total",
+                            command=name,
+                            kind=kind,
+                        ),
+                        metrics.get_counter(
+                            "commandlab_command_errors_total", command=name, kind=kind
+                        ),
+                    )
+                )
+
+        # 3秒の締め切りに近い順に並べる
+        rows.sort(key=lambda r: r[0], reverse=True)
+
+        embed = discord.Embed(
+            title="コマンド統計",
+            description=f"初回応答の締め切り: {INTERACTION_DEADLINE}秒",
+            color=0x400080,
+            timestamp=datetime.now(),
+        )
+        watchdog = getattr(self.bot, "watchdog", None)
+        if watchdog is not None:
+            lag = metrics.get_histogram("commandlab_event_loop_lag_seconds")
+            recent = "\n".join(
+                f"{r.duration:.3f}s {r.source}" for r in list(watchdog.reports)[-3:]
+            )
+            embed.add_field(
+                name="イベントループ",
+                value=create_codeblock(
+                    f"遅延 p99: {format_quantile(lag, 0.99)} "
+                    f"最大: {watchdog.max_lag:.3f}s\n"
+                    f"ブロック回数: {watchdog.blocked_total}\n"
+                    f"ハートビート: {round(self.bot.latency * 1000)}ms"
+                    + (f"\n{recent}" if recent else "")
+                ),
+                inline=False,
+            )
+
+        for _, name, kind, first, handler, misses, errors in rows[:24]:
+            suffix = " (補完)" if kind == "autocomplete" else ""
+            embed.add_field(
+                name=f"/{name}{suffix}",
+                value=create_codeblock(
+                    f"回数: {handler.count}\n"
+                    f"初回応答 p99: {format_quantile(first, 0.99)}\n"
+                    f"処理 p50/p99: {format_quantile(handler, 0.5)} / {format_quantile(handler, 0.99)}\n"
+                    f"締め切り超過: {int(misses)}  エラー: {int(errors)}"
+                ),
+                inline=False,
+            )
+        if not rows:
+            embed.description += "\nまだ記録がありません"
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(CStatsCog(bot))
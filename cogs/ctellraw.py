@@ -1,14 +1,24 @@
+import asyncio
+import hashlib
 import io
+import re
+from collections import OrderedDict
+from typing import Optional
 
 import discord
 from discord import (ButtonStyle, Embed, Interaction, SelectOption, TextStyle,
                      app_commands)
-from discord.ext import commands
-from discord.ui import Button, Modal, Select, TextInput, View, button, select
-from PIL import Image, ImageDraw, ImageFont
-from pydantic import BaseModel
-
-from utils.util import create_codeblock
+from discord.ext import commands, tasks
+from discord.ui import Button, DynamicItem, Modal, Select, TextInput, View
+from pydantic import BaseModel, TypeAdapter
+
+from config import config
+from utils.metrics import measure_render
+from utils.sessions import SessionStore
+from utils.textcomponent import (CHAT_LIMIT, COMMAND_BLOCK_LIMIT, Style,
+                                 compile_component, gradient, parse_component)
+from utils.textrender import Segment, fonts
+from utils.util import create_codeblock, create_embed
 
 COLORS: list[str] = [
     "black",
@@ -30,8 +40,17 @@ COLORS: list[str] = [
 ]
 
 
+# /ctellraw-gradient で colors を省略した場合の色
+RAINBOW = ["#FF5555", "#FFAA00", "#FFFF55", "#55FF55", "#55FFFF", "#5555FF", "#FF55FF"]
+HEX_COLOR = re.compile(r"#?([0-9a-fA-F]{6})")
+# グラデーションにできる文字数
+GRADIENT_MAX_LENGTH = 1000
+
+
 def get_color(color: str) -> int | None:
-    if color == "black":
+    if color.startswith("#"):
+        return int(color[1:], 16)
+    elif color == "black":
         return 0x000000
     elif color == "dark_blue":
         return 0x0000AA
@@ -77,13 +96,30 @@ class SectionDataText(BaseModel):
     strikethrough: bool = False
 
 
+def to_style(data: SectionDataText) -> Style:
+    return Style(
+        data.color,
+        data.bold,
+        data.italic,
+        data.underline,
+        data.strikethrough,
+        data.obfuscated,
+    )
+
+
 def to_command(data: list[SectionDataText], cmd: str) -> str:
-    result: list[str] = []
-    for e in data:
-        e.text = e.text.replace("\n", "\\n")
-        result.append(e.model_dump_json(exclude_defaults=True))
+    # セレクタに {} が含まれる場合があるため、末尾のプレースホルダーだけを置き換える
+    prefix, _, suffix = cmd.rpartition("{}")
+    return prefix + compile_component((e.text, to_style(e)) for e in data) + suffix
 
-    return cmd.format(f"[{','.join(result)}]")
+
+def describe_length(length: int) -> str:
+    if length <= CHAT_LIMIT:
+        return f"{length}文字 (チャット欄から実行できます)"
+    elif length <= COMMAND_BLOCK_LIMIT:
+        return f"{length}文字 (チャット欄の上限{CHAT_LIMIT}文字を超えているため、コマンドブロックで実行してください)"
+    else:
+        return f"{length}文字 (コマンドブロックの上限{COMMAND_BLOCK_LIMIT}文字を超えています)"
 
 
 def create_tellraw_embed(
@@ -103,255 +139,474 @@ def create_tellraw_embed(
         title = f"__{title}__"
 
     c = get_color(data.color)
-    embed = Embed(color=c, title=title)
-    embed.add_field(name="出力", value=create_codeblock(cmd))
+    # 長いコマンドはフィールドに収まらないため説明文に表示する
+    embed = Embed(color=c, title=title, description=create_codeblock(cmd[:4000]))
+    embed.add_field(name="文字数", value=describe_length(len(cmd)))
     embed.set_footer(text=f"Section {section[0] + 1}/{section[1]}")
 
     return embed
 
 
-def create_preview(datas: list[SectionDataText]):
-    img = Image.new("RGBA", (512, 100), color=0x000000)
-    d = ImageDraw.Draw(img)
+PREVIEW_CACHE_SIZE = 128
+
+_previews: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+
+
+# 貼り付けられたコマンドの対象 (@a[tag=x, ...] のように空白を含む場合がある)
+# nbt={Inventory:[{...}]} のような入れ子の角括弧は2段まで対応する
+_BRACKETS = r"\[(?:[^\[\]]|\[(?:[^\[\]]|\[[^\[\]]*\])*\])*\]"
+_TARGET = r"(@[a-z](?:" + _BRACKETS + r")?|[^\s@]\S*)"
+TELLRAW_COMMAND = re.compile(r"/?tellraw\s+" + _TARGET + r"\s+(.+)", re.DOTALL)
+TITLE_COMMAND = re.compile(
+    r"/?title\s+" + _TARGET + r"\s+(title|subtitle|actionbar)\s+(.+)", re.DOTALL
+)
+# インポートできるテキストの長さ (モーダルの入力欄の上限)
+IMPORT_MAX_LENGTH = 4000
+
 
-    font = ImageFont.truetype("./assets/unifont-15.1.05.otf", 14)
+def parse_color(value: str) -> int | None:
+    """色の名前か #RRGGBB 形式の色を返します。"""
+    match = HEX_COLOR.fullmatch(value)
+    if match is not None:
+        return int(match[1], 16)
+    if value.lower() in COLORS:
+        return get_color(value.lower())
+    return None
 
-    cursor = 10
-    cursor_y = 10
+
+def get_rgb(color: str) -> tuple[int, int, int]:
+    value = get_color(color)
+    if value is None:
+        value = 0xFFFFFF
+    return (value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF)
+
+
+def to_segments(datas: list[SectionDataText]) -> list[Segment]:
+    return [
+        Segment(
+            text=data.text,
+            color=get_rgb(data.color),
+            bold=data.bold,
+            italic=data.italic,
+            underline=data.underline,
+            strikethrough=data.strikethrough,
+            obfuscated=data.obfuscated,
+        )
+        for data in datas
+    ]
+
+
+def preview_key(datas: list[SectionDataText]) -> str:
+    h = hashlib.blake2b(config.latest_version.encode(), digest_size=16)
     for data in datas:
-        value = get_color(data.color)
-        R = value % 256
-        value = value // 256
-        G = value % 256
-        value = value // 256
-        B = value % 256
-
-        d.multiline_text((cursor, cursor_y), data.text, fill=(B, G, R, 255), font=font)
-        if data.bold:
-            d.text((cursor + 1, cursor_y), data.text, fill=(B, G, R, 255), font=font)
-            cursor += 1
-        if data.underline:
-            twidth = d.textlength(data.text, font=font)
-            lx, ly = cursor, 14 + cursor_y
-            d.line((lx, ly, lx + twidth, ly), fill=(B, G, R, 255), width=1)
-        if data.underline:
-            twidth = d.textlength(data.text, font=font)
-            lx, ly = cursor, 7 + cursor_y
-            d.line((lx, ly, lx + twidth, ly), fill=(B, G, R, 255), width=1)
-
-        if "\n" in "data.text":
-            cursor_y += 14
-            cursor = 10
-
-        cursor += d.textlength(data.text.split("\n")[0], font=font)
-
-    stream = io.BytesIO()
-    img.resize((1024, 200), resample=Image.Resampling.NEAREST).save(stream, "WEBP")
-    file = discord.File(io.BytesIO(stream.getvalue()), filename="preview.webp")
-
-    return file
+        h.update(data.model_dump_json().encode())
+    return h.hexdigest()
+
+
+def render_preview(datas: list[SectionDataText]) -> tuple[bytes, str]:
+    """プレビュー画像と拡張子を返します。内容が同じ場合は前回の画像を使い回します。"""
+    key = preview_key(datas)
+    if key in _previews:
+        _previews.move_to_end(key)
+        return _previews[key]
+
+    _previews[key] = fonts.get(config.latest_version).render(to_segments(datas))
+    if len(_previews) > PREVIEW_CACHE_SIZE:
+        _previews.popitem(last=False)
+    return _previews[key]
+
+
+def create_preview(datas: list[SectionDataText]) -> discord.File:
+    data, ext = render_preview(datas)
+    return discord.File(io.BytesIO(data), filename=f"preview.{ext}")
+
+
+def parse_import(value: str) -> tuple[str, list[SectionDataText]]:
+    """
+    tellraw/titleコマンドかJSONテキストコンポーネントを読み込み、コマンドとセクションを返します。
+
+    読み込めない場合はValueErrorを送出します。
+    """
+    value = value.strip()
+    if match := TELLRAW_COMMAND.fullmatch(value):
+        cmd, raw = f"/tellraw {match[1]} {{}}", match[2]
+    elif match := TITLE_COMMAND.fullmatch(value):
+        cmd, raw = f"/title {match[1]} {match[2]} {{}}", match[3]
+    else:
+        cmd, raw = "/tellraw @a {}", value
+
+    data = []
+    for text, style in parse_component(raw):
+        color = style.color
+        if (match := HEX_COLOR.fullmatch(color)) is not None:
+            color = f"#{match[1]}"
+        elif color not in COLORS:
+            color = "reset"
+        data.append(
+            SectionDataText(
+                text=text,
+                color=color,
+                bold=style.bold,
+                italic=style.italic,
+                underline=style.underline,
+                strikethrough=style.strikethrough,
+                obfuscated=style.obfuscated,
+            )
+        )
+    if not data:
+        raise ValueError("テキストが含まれていません")
+    return cmd, data
+
+
+class TellrawSession(BaseModel):
+    cmd: str
+    section: int = 0
+    data: list[SectionDataText] = []
+
+    def embed(self) -> Embed:
+        return create_tellraw_embed(
+            datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
+        )
+
+
+# 最後に操作されてから1日経った編集画面は破棄する
+sessions: SessionStore[TellrawSession] = SessionStore(
+    "tellraw", TypeAdapter(TellrawSession), max_sessions=1000, idle_timeout=24 * 60 * 60
+)
+
+EXPIRED_MESSAGE = "この編集画面は期限切れです。もう一度コマンドを実行してください。"
 
 
 class TellrawModal(Modal):
-    def __init__(
-        self, data: list[SectionDataText], section: int, view: View, cmd: str
-    ) -> None:
-        super().__init__(title="内容を設定", timeout=None)
-        self.data = data
-        self.section = section
+    def __init__(self, session: str, state: TellrawSession) -> None:
+        super().__init__(title="内容を設定", timeout=600)
+        self.session = session
+        self.state = state
         self.text = TextInput(
             label="名前",
             placeholder="名前がありません",
             style=TextStyle.long,
-            default=data[section].text,
+            default=state.data[state.section].text,
             required=False,
         )
-        self.view = view
-        self.cmd = cmd
 
         self.add_item(self.text)
 
     async def on_submit(self, interaction: Interaction):
-        self.data[self.section].text = self.text.value or ""
+        self.state.data[self.state.section].text = self.text.value or ""
+        sessions.put(self.session, self.state)
 
         await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self.view,
+            embed=self.state.embed(), view=TellrawSection(self.session, self.state)
         )
 
 
-class TellrawSection(View):
-    def __init__(self, index: int, length: int, cmd: str):
-        super().__init__(timeout=None)
-        self.section = index
-        self.data: list[SectionDataText] = []
-        self.length = 0
-        self.cmd = cmd
-
-    @button(label="-", style=ButtonStyle.danger, disabled=True)
-    async def remove_section(self, interaction: Interaction, item: Button):
-        self.data.pop(self.section)
-        self.section = len(self.data) - 1
-        if self.section <= 0:
-            self.remove_section.disabled = True
-
-        await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
+class TellrawImportModal(Modal):
+    def __init__(self, session: str, state: TellrawSession) -> None:
+        super().__init__(title="インポート", timeout=600)
+        self.session = session
+        self.state = state
+        self.source = TextInput(
+            label="tellraw/titleコマンドまたはJSON",
+            placeholder='/tellraw @a ["",{"text":"Hello","color":"gold"}]',
+            style=TextStyle.long,
+            max_length=IMPORT_MAX_LENGTH,
         )
 
-    @button(label="<", style=ButtonStyle.secondary, disabled=True)
-    async def prev_section(self, interaction: Interaction, item: Button):
-        self.section -= 1
-        if self.section <= 0:
-            self.prev_section.disabled = True
-        if self.section < len(self.data) - 1:
-            self.next_section.disabled = False
+        self.add_item(self.source)
 
-        await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
-        )
-
-    @button(label="Edit", style=ButtonStyle.primary, disabled=True)
-    async def edit_section(self, interaction: Interaction, item: Button):
-        await interaction.response.send_modal(
-            TellrawModal(self.data, self.section, self, self.cmd)
-        )
+    async def on_submit(self, interaction: Interaction):
+        try:
+            cmd, data = parse_import(self.source.value)
+        except ValueError as e:
+            await interaction.response.send_message(
+                embed=create_embed("エラー", f"読み込めませんでした: {e}"), ephemeral=True
+            )
+            return
 
-    @button(label=">", style=ButtonStyle.secondary, disabled=True)
-    async def next_section(self, interaction: Interaction, item: Button):
-        self.section += 1
-        if self.section > 0:
-            self.prev_section.disabled = False
-        if self.section >= len(self.data) - 1:
-            self.next_section.disabled = True
+        self.state.cmd = cmd
+        self.state.data = data
+        self.state.section = 0
+        # 表示できることを確かめてからセッションを保存する
+        embed = self.state.embed()
+        sessions.put(self.session, self.state)
 
-        self.prev_section.disabled = False
         await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
+            embed=embed, view=TellrawSection(self.session, self.state)
         )
 
-    @button(label="+", style=ButtonStyle.success)
-    async def add_section(self, interaction: Interaction, item: Button):
-        self.data.append(SectionDataText(text="", color="white"))
-        self.section = len(self.data) - 1
-        self.edit_section.disabled = False
-        self.set_color.disabled = False
-        self.set_style.disabled = False
-        if len(self.data) >= 2:
-            self.remove_section.disabled = False
-            self.prev_section.disabled = False
-
-        await interaction.response.send_modal(
-            TellrawModal(self.data, self.section, self, self.cmd)
-        )
 
-    @select(
-        placeholder="色",
-        options=[SelectOption(label=c, value=c) for c in COLORS],
-        disabled=True,
-    )
-    async def set_color(self, interaction: Interaction, item: Select):
-        self.data[self.section].color = item.values[0]
-        await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
-        )
+class TellrawButton(
+    DynamicItem[Button], template=r"tellraw:(?P<session>[0-9a-f]+):(?P<action>[a-z]+)"
+):
+    def __init__(self, session: str, action: str, **kwargs) -> None:
+        super().__init__(Button(custom_id=f"tellraw:{session}:{action}", **kwargs))
+        self.session = session
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: Interaction, item: Button, match: re.Match[str]
+    ):
+        return cls(match["session"], match["action"])
+
+    async def callback(self, interaction: Interaction):
+        state = sessions.get(self.session)
+        if state is None:
+            await interaction.response.send_message(EXPIRED_MESSAGE, ephemeral=True)
+            return
 
-    @select(
-        placeholder="装飾",
-        options=[
-            SelectOption(label="太字", value="bold"),
-            SelectOption(label="斜体", value="italic"),
-            SelectOption(label="下線", value="underline"),
-            SelectOption(label="取消線", value="strikethrough"),
-            SelectOption(label="隠し", value="obfuscated"),
-        ],
-        disabled=True,
-        max_values=5,
-        min_values=0,
-    )
-    async def set_style(self, interaction: Interaction, item: Select):
-        for i in item.values:
-            if i == "bold":
-                self.data[self.section].bold = not self.data[self.section].bold
-            if i == "italic":
-                self.data[self.section].italic = not self.data[self.section].italic
-            if i == "underline":
-                self.data[self.section].underline = not self.data[
-                    self.section
-                ].underline
-            if i == "obfuscated":
-                self.data[self.section].obfuscated = not self.data[
-                    self.section
-                ].obfuscated
-            if i == "strikethrough":
-                self.data[self.section].strikethrough = not self.data[
-                    self.section
-                ].strikethrough
+        if self.action == "add":
+            state.data.append(SectionDataText(text="", color="white"))
+            state.section = len(state.data) - 1
+            sessions.put(self.session, state)
+            await interaction.response.send_modal(TellrawModal(self.session, state))
+            return
+        if self.action == "edit":
+            await interaction.response.send_modal(TellrawModal(self.session, state))
+            return
+        if self.action == "import":
+            await interaction.response.send_modal(
+                TellrawImportModal(self.session, state)
+            )
+            return
+        if self.action == "preview":
+            embed = Embed(
+                title="プレビュー", description="※あくまでイメージです。実際は異なる場合があります。"
+            )
+
+            with measure_render():
+                file = create_preview(state.data)
+            embed.set_image(url=f"attachment://{file.filename}")
+
+            await interaction.response.send_message(
+                embed=embed, file=file, ephemeral=True
+            )
+            return
+
+        if self.action == "remove":
+            state.data.pop(state.section)
+            state.section = len(state.data) - 1
+        elif self.action == "prev":
+            state.section = max(state.section - 1, 0)
+        elif self.action == "next":
+            state.section = min(state.section + 1, len(state.data) - 1)
+        sessions.put(self.session, state)
+
+        view = TellrawSection(self.session, state)
+        if len(state.data) <= 0:
+            await interaction.response.edit_message(view=view)
+            return
+        await interaction.response.edit_message(embed=state.embed(), view=view)
+
+
+class TellrawSelect(
+    DynamicItem[Select], template=r"tellraw:(?P<session>[0-9a-f]+):(?P<kind>color|style)"
+):
+    def __init__(self, session: str, kind: str, disabled: bool = False) -> None:
+        if kind == "color":
+            select = Select(
+                custom_id=f"tellraw:{session}:{kind}",
+                placeholder="色",
+                options=[SelectOption(label=c, value=c) for c in COLORS],
+                disabled=disabled,
+                row=1,
+            )
+        else:
+            select = Select(
+                custom_id=f"tellraw:{session}:{kind}",
+                placeholder="装飾",
+                options=[
+                    SelectOption(label="太字", value="bold"),
+                    SelectOption(label="斜体", value="italic"),
+                    SelectOption(label="下線", value="underline"),
+                    SelectOption(label="取消線", value="strikethrough"),
+                    SelectOption(label="隠し", value="obfuscated"),
+                ],
+                disabled=disabled,
+                max_values=5,
+                min_values=0,
+                row=2,
+            )
+        super().__init__(select)
+        self.session = session
+        self.kind = kind
+
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: Interaction, item: Select, match: re.Match[str]
+    ):
+        return cls(match["session"], match["kind"])
+
+    async def callback(self, interaction: Interaction):
+        state = sessions.get(self.session)
+        if state is None or not state.data:
+            await interaction.response.send_message(EXPIRED_MESSAGE, ephemeral=True)
+            return
+
+        data = state.data[state.section]
+        if self.kind == "color":
+            data.color = self.item.values[0]
+        else:
+            for i in self.item.values:
+                if i in ("bold", "italic", "underline", "obfuscated", "strikethrough"):
+                    setattr(data, i, not getattr(data, i))
+        sessions.put(self.session, state)
 
         await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
+            embed=state.embed(), view=TellrawSection(self.session, state)
         )
 
-    @button(label="プレビュー")
-    async def preview(self, interaction: Interaction, item: Button):
-        embed = Embed(
-            title="プレビュー", description="※斜体と隠し文字は非対応です。\n※あくまでイメージです。実際は異なる場合があります。"
-        )
-        embed.set_image(url="attachment://preview.webp")
 
-        await interaction.response.send_message(
-            embed=embed, file=create_preview(self.data), ephemeral=True
-        )
+class TellrawSection(View):
+    """
+    tellraw/titleの編集画面
 
-    @button(label="更新")
-    async def refresh(self, interaction: Interaction, item: Button):
-        if len(self.data) <= 0:
-            await interaction.response.edit_message(view=self)
-            return
+    ボタンとセレクトメニューは全てDynamicItemなので、discord.py側にはViewが保持されません。
+    状態はセッションIDをキーに sessions に保存されます。
+    """
 
-        await interaction.response.edit_message(
-            embed=create_tellraw_embed(
-                datas=self.data, section=(self.section, len(self.data)), cmd=self.cmd
-            ),
-            view=self,
+    def __init__(self, session: str, state: TellrawSession):
+        super().__init__(timeout=None)
+        empty = len(state.data) == 0
+        self.add_item(
+            TellrawButton(
+                session,
+                "remove",
+                label="-",
+                style=ButtonStyle.danger,
+                disabled=len(state.data) < 2,
+                row=0,
+            )
         )
+        self.add_item(
+            TellrawButton(
+                session,
+                "prev",
+                label="<",
+                style=ButtonStyle.secondary,
+                disabled=state.section <= 0,
+                row=0,
+            )
+        )
+        self.add_item(
+            TellrawButton(
+                session,
+                "edit",
+                label="Edit",
+                style=ButtonStyle.primary,
+                disabled=empty,
+                row=0,
+            )
+        )
+        self.add_item(
+            TellrawButton(
+                session,
+                "next",
+                label=">",
+                style=ButtonStyle.secondary,
+                disabled=state.section >= len(state.data) - 1,
+                row=0,
+            )
+        )
+        self.add_item(
+            TellrawButton(
+                session, "add", label="+", style=ButtonStyle.success, row=0
+            )
+        )
+        self.add_item(TellrawSelect(session, "color", disabled=empty))
+        self.add_item(TellrawSelect(session, "style", disabled=empty))
+        self.add_item(TellrawButton(session, "preview", label="プレビュー", row=3))
+        self.add_item(TellrawButton(session, "refresh", label="更新", row=3))
+        self.add_item(TellrawButton(session, "import", label="インポート", row=3))
 
 
 class CTellraw(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # 最初のプレビューでフォントの読み込みを待たないようにする
+        await asyncio.to_thread(fonts.get, config.latest_version)
+        await asyncio.to_thread(sessions.load)
+        self.save_sessions.start()
+
+    async def cog_unload(self):
+        self.save_sessions.cancel()
+        sessions.save()
+
+    @tasks.loop(minutes=5)
+    async def save_sessions(self):
+        sessions.expire()
+        await asyncio.to_thread(sessions.save)
+
+    async def start(
+        self,
+        interaction: Interaction,
+        cmd: str,
+        data: Optional[list[SectionDataText]] = None,
+    ):
+        state = TellrawSession(cmd=cmd, data=data or [])
+        session = sessions.create(state)
+        if not data:
+            await interaction.response.send_message(view=TellrawSection(session, state))
+            return
+        await interaction.response.send_message(
+            embed=state.embed(), view=TellrawSection(session, state)
+        )
+
     @app_commands.command(name="ctellraw", description="tellrawコマンドを作成します")
     @app_commands.guild_only()
     async def tellraw(self, interaction: Interaction):
-        await interaction.response.send_message(
-            view=TellrawSection(0, 1, "/tellraw @a {}")
-        )
+        await self.start(interaction, "/tellraw @a {}")
 
     @app_commands.command(name="ctitle", description="titleコマンドを作成します")
     @app_commands.guild_only()
     async def title(self, interaction: Interaction):
-        await interaction.response.send_message(
-            view=TellrawSection(0, 1, "/title @a title {}")
-        )
+        await self.start(interaction, "/title @a title {}")
+
+    @app_commands.command(
+        name="ctellraw-gradient", description="グラデーションのtellrawコマンドを作成します"
+    )
+    @app_commands.describe(
+        text="テキスト",
+        colors="空白区切りの色 (例: #FF0000 #0000FF gold)。省略すると虹色になります",
+        bold="太字にするか",
+    )
+    @app_commands.guild_only()
+    async def gradient(
+        self,
+        interaction: Interaction,
+        text: str,
+        colors: Optional[str] = None,
+        bold: bool = False,
+    ):
+        if len(text) > GRADIENT_MAX_LENGTH:
+            await interaction.response.send_message(
+                embed=create_embed("エラー", f"テキストは{GRADIENT_MAX_LENGTH}文字までです"),
+                ephemeral=True,
+            )
+            return
+
+        stops = [parse_color(c) for c in (colors or " ".join(RAINBOW)).split()]
+        if not stops or None in stops:
+            await interaction.response.send_message(
+                embed=create_embed("エラー", "色が無効です"), ephemeral=True
+            )
+            return
+
+        rgb = [(c >> 16 & 0xFF, c >> 8 & 0xFF, c & 0xFF) for c in stops]
+        data = [
+            SectionDataText(text=part, color=color, bold=bold)
+            for part, color in gradient(text, rgb)
+        ]
+        await self.start(interaction, "/tellraw @a {}", data)
 
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(CTellraw(bot))
+    bot.add_dynamic_items(TellrawButton, TellrawSelect)
+
+
+async def teardown(bot: commands.Bot):
+    bot.remove_dynamic_items(TellrawButton, TellrawSelect)
@@ -1,42 +1,67 @@
+import asyncio
+import re
+
 import discord
 from discord import app_commands
 from discord.ext import commands
+from pydantic import TypeAdapter
 
+from utils.sessions import SessionStore
 from utils.util import create_codeblock, create_embed
 
 
-class ConvertView(discord.ui.View):
-    def __init__(self, text: str):
-        super().__init__(timeout=None)
-        self.text = text
+# 変換元の文字列は最後に使われてから1日保持する
+sessions: SessionStore[str] = SessionStore(
+    "cunicode", TypeAdapter(str), max_sessions=1000, idle_timeout=24 * 60 * 60
+)
 
-    @discord.ui.button(label="titleに変換", style=discord.ButtonStyle.green)
-    async def convert_title(
-        self, interaction: discord.Interaction, item: discord.ui.Item
-    ):
-        await interaction.response.send_message(
-            embed=create_embed(
-                title="コマンド",
-                description=create_codeblock(
-                    '/title @a title {"text":"' + self.text + '"}'
-                ),
+
+class ConvertButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"cunicode:(?P<session>[0-9a-f]+):(?P<kind>title|tellraw)",
+):
+    def __init__(self, session: str, kind: str) -> None:
+        super().__init__(
+            discord.ui.Button(
+                label=f"{kind}に変換",
+                style=discord.ButtonStyle.green,
+                custom_id=f"cunicode:{session}:{kind}",
             )
         )
+        self.session = session
+        self.kind = kind
 
-    @discord.ui.button(label="tellrawに変換", style=discord.ButtonStyle.green)
-    async def convert_tellraw(
-        self, interaction: discord.Interaction, item: discord.ui.Item
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]
     ):
-        await interaction.response.send_message(
-            embed=create_embed(
-                title="コマンド",
-                description=create_codeblock(
-                    '/tellraw @a {"text":"' + self.text + '"}'
-                ),
+        return cls(match["session"], match["kind"])
+
+    async def callback(self, interaction: discord.Interaction):
+        text = sessions.get(self.session)
+        if text is None:
+            await interaction.response.send_message(
+                "このボタンは期限切れです。もう一度コマンドを実行してください。", ephemeral=True
             )
+            return
+
+        if self.kind == "title":
+            command = '/title @a title {"text":"' + text + '"}'
+        else:
+            command = '/tellraw @a {"text":"' + text + '"}'
+        await interaction.response.send_message(
+            embed=create_embed(title="コマンド", description=create_codeblock(command))
         )
 
 
+class ConvertView(discord.ui.View):
+    def __init__(self, text: str):
+        super().__init__(timeout=None)
+        session = sessions.create(text)
+        self.add_item(ConvertButton(session, "title"))
+        self.add_item(ConvertButton(session, "tellraw"))
+
+
 @app_commands.guild_only()
 class CUnicode(app_commands.Group):
     def __init__(self, bot: commands.Bot):
@@ -71,4 +96,11 @@ class CUnicode(app_commands.Group):
 
 
 async def setup(bot: commands.Bot):
+    await asyncio.to_thread(sessions.load)
     bot.tree.add_command(CUnicode(bot))
+    bot.add_dynamic_items(ConvertButton)
+
+
+async def teardown(bot: commands.Bot):
+    bot.remove_dynamic_items(ConvertButton)
+    sessions.save()
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+import os
+import zipfile
+from typing import Optional
+
+import aiofiles
+import aiohttp
+import discord
+from discord.ext import commands, tasks
+from pydantic import BaseModel
+
+from cogs.cnews import JAVA_VERSION_MANIFESTS, add_changelog_fields
+from config import config
+from schemas.version_manifest import VersionManifest, VersionManifestEntry
+from utils.download import CHUNK_SIZE, client_path, fetch_package, sync_mcdata
+from utils.mcdata import datasets
+from utils.metrics import trace_config
+from utils.patchnotes import patch_notes
+from utils.setup import VersionData, download_release
+from utils.textrender import fonts
+from utils.util import create_codeblock
+
+logger = logging.getLogger(__name__)
+
+VERSION_WATCH_STATE = "./tmp/version_watch.json"
+
+
+class VersionWatchState(BaseModel):
+    release: Optional[str] = None
+    snapshot: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def read_version_data(path: str) -> VersionData:
+    with zipfile.ZipFile(path) as jar:
+        return VersionData.model_validate(json.loads(jar.read("version.json")))
+
+
+async def fetch_version_data(
+    client: aiohttp.ClientSession, manifest: VersionManifest, version: str
+) -> Optional[VersionData]:
+    """
+    client.jarの version.json を読み込みます。
+
+    保存済みでないバージョン (スナップショットなど) のclient.jarは一時ファイルに取得し、読み込んだら削除します。
+    """
+    path = client_path(version)
+    if os.path.exists(path):
+        return await asyncio.to_thread(read_version_data, path)
+
+    game_package = await fetch_package(client, manifest, version)
+    if game_package is None:
+        return None
+    temp = f"./tmp/version_{version}.jar.part"
+    try:
+        async with client.get(game_package.downloads.client.url) as resp:
+            resp.raise_for_status()
+            async with aiofiles.open(temp, mode="wb") as fp:
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    await fp.write(chunk)
+        return await asyncio.to_thread(read_version_data, temp)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+class VersionWatcher(commands.Cog):
+    """
+    version_manifest_v2.json を定期的に確認し、新しいバージョンが出たらお知らせします。
+
+    リリースとスナップショットの両方を1回のリクエストで確認し、変更がない場合は304が返る条件付きリクエストを使います。
+    新しいリリースの場合は言語ファイルやminecraft-dataを取得し直し、config.latest_version を更新します。
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.state = VersionWatchState()
+
+    async def cog_load(self):
+        if os.path.exists(VERSION_WATCH_STATE):
+            self.state = VersionWatchState.model_validate_json(
+                open(VERSION_WATCH_STATE, mode="rb").read()
+            )
+        self.poll.change_interval(seconds=config.config.version_watch_interval)
+        self.poll.start()
+
+    async def cog_unload(self):
+        self.poll.cancel()
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(VERSION_WATCH_STATE), exist_ok=True)
+        with open(VERSION_WATCH_STATE, mode="w") as fp:
+            fp.write(self.state.model_dump_json())
+
+    @tasks.loop(seconds=300)
+    async def poll(self):
+        try:
+            await self.check()
+        except Exception as e:
+            logger.warning(f"新しいバージョンを確認できませんでした: {e}")
+
+    async def fetch_manifest(
+        self, client: aiohttp.ClientSession, state: VersionWatchState
+    ) -> Optional[VersionManifest]:
+        """前回から変更がない場合はNoneを返します。"""
+        headers = {}
+        if state.etag is not None:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified is not None:
+            headers["If-Modified-Since"] = state.last_modified
+
+        async with client.get(JAVA_VERSION_MANIFESTS, headers=headers) as resp:
+            if resp.status == 304:
+                return None
+            resp.raise_for_status()
+            manifest = VersionManifest.model_validate_json(await resp.read())
+            state.etag = resp.headers.get("ETag")
+            state.last_modified = resp.headers.get("Last-Modified")
+        return manifest
+
+    async def check(self):
+        state = self.state.model_copy()
+        async with aiohttp.ClientSession(trace_configs=[trace_config()]) as client:
+            manifest = await self.fetch_manifest(client, state)
+            if manifest is None:
+                return
+
+            latest = manifest.latest
+            # 初回は現在のバージョンを記録するだけにする
+            first = self.state.release is None and self.state.snapshot is None
+            new_release = not first and latest.release != self.state.release
+            new_snapshot = not first and latest.snapshot not in (
+                latest.release,
+                self.state.snapshot,
+            )
+
+            # 前回データの取得だけ終わっていた場合は取得し直さない
+            if new_release and config.latest_version != latest.release:
+                await self.refresh(client, manifest)
+
+            # お知らせしたものから保存し、途中で失敗した場合は残りだけを次回お知らせする
+            entries = {e.id: e for e in manifest.versions}
+            if new_snapshot:
+                if latest.snapshot in entries:
+                    await self.announce(client, manifest, entries[latest.snapshot])
+                self.state.snapshot = latest.snapshot
+                self.save()
+            if new_release:
+                if latest.release in entries:
+                    await self.announce(client, manifest, entries[latest.release])
+                self.state.release = latest.release
+                self.save()
+
+        # 条件付きリクエストの情報は最後まで終わってから保存する
+        state.release = latest.release
+        state.snapshot = latest.snapshot
+        self.state = state
+        self.save()
+
+    async def refresh(self, client: aiohttp.ClientSession, manifest: VersionManifest):
+        """
+        新しいリリースのデータを取得してから config.latest_version を切り替えます。
+
+        取得の途中や失敗した場合は、コマンドは前のバージョンのデータを使い続けます。
+        """
+        previous = config.latest_version
+        release = manifest.latest.release
+        logger.info(f"新しいリリース{release}のデータを取得しています...")
+        if not await download_release(client, manifest, release):
+            raise ValueError(f"バージョン{release}の情報が見つかりませんでした")
+        if await sync_mcdata([release]):
+            datasets.invalidate()
+        # 最初のプレビューでclient.jarからフォントを読み込んでイベントループを止めないようにする
+        await asyncio.to_thread(fonts.get, release)
+
+        config.latest_version = release
+        if previous != release:
+            # tellrawのプレビューは最新版のフォントしか使わない
+            fonts.invalidate(previous)
+        patch_notes.invalidate()
+        logger.info(f"最新バージョンを{previous}から{release}に更新しました")
+
+    async def announce(
+        self,
+        client: aiohttp.ClientSession,
+        manifest: VersionManifest,
+        entry: VersionManifestEntry,
+    ):
+        if config.config.version_watch_channel is None:
+            return
+
+        release = entry.type == "release"
+        embed = discord.Embed(
+            title=f"新しい{'リリース' if release else 'スナップショット'}: {entry.id}",
+            color=discord.Color.green() if release else discord.Color.orange(),
+            timestamp=entry.releaseTime,
+        )
+
+        try:
+            data = await fetch_version_data(client, manifest, entry.id)
+            if data is not None:
+                embed.add_field(
+                    name="Data Pack",
+                    value=create_codeblock(data.pack_version.data),
+                    inline=True,
+                )
+                embed.add_field(
+                    name="Resource Pack",
+                    value=create_codeblock(data.pack_version.resource),
+                    inline=True,
+                )
+        except Exception as e:
+            logger.warning(f"バージョン{entry.id}のpack_formatを取得できませんでした: {e}")
+
+        try:
+            items, blocks = await datasets.entry_counts(entry.id)
+            embed.add_field(
+                name="アイテム / ブロック",
+                value=create_codeblock(f"{items} / {blocks}"),
+                inline=True,
+            )
+        except KeyError:
+            # minecraft-dataが対応するまではデータがない
+            pass
+        except Exception as e:
+            logger.warning(f"バージョン{entry.id}のデータを読み込めませんでした: {e}")
+
+        add_changelog_fields(embed, entry.id)
+
+        channel = self.bot.get_channel(
+            config.config.version_watch_channel
+        ) or await self.bot.fetch_channel(config.config.version_watch_channel)
+        await channel.send(embed=embed)
+        logger.info(f"新しいバージョン{entry.id}をお知らせしました")
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(VersionWatcher(bot))
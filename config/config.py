@@ -10,6 +10,15 @@ class BumpNofitication(BaseModel):
     disboard_id: int
 
 
+class Endpoints(BaseModel):
+    piston_meta: str = "https://piston-meta.mojang.com"
+    launcher_content: str = "https://launchercontent.mojang.com"
+    resources: str = "https://resources.download.minecraft.net"
+    minecraft_data: str = (
+        "https://raw.githubusercontent.com/PrismarineJS/minecraft-data/master"
+    )
+
+
 class Config(BaseModel):
     token: str
     guild_id: int
@@ -21,6 +30,14 @@ class Config(BaseModel):
     owner_ids: list[int] = []
     prefix: Optional[str] = "cm!"
     question_channels: list[int] = []
+    metrics_host: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+    loop_block_threshold: float = 0.25
+    endpoints: Endpoints = Endpoints()
+    dataset_cache_mb: int = 256
+    locales: list[str] = ["ja_jp", "en_us", "zh_cn", "ko_kr"]
+    version_watch_channel: Optional[int] = None
+    version_watch_interval: int = 300
 
 
 # -----------------------------------------------------------
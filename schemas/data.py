@@ -1,6 +1,6 @@
 from typing import Literal, Optional
 
-from pydantic import BaseModel, RootModel
+from pydantic import BaseModel, RootModel, TypeAdapter
 from typing_extensions import Any
 
 
@@ -78,6 +78,10 @@ class Items(RootModel):
     root: list[ItemEntry]
 
 
+ITEMS_ADAPTER = TypeAdapter(list[ItemEntry])
+BLOCKS_ADAPTER = TypeAdapter(list[BlockEntry])
+
+
 class CommandEntryJEBE(BaseModel):
     je: Optional[str] = None
     be: Optional[str] = None
@@ -0,0 +1,23 @@
+from discord import app_commands
+
+
+class RevisionedCommandTree(app_commands.CommandTree):
+    """コマンドの追加・削除・同期のたびに revision が増えるコマンドツリー (キャッシュの無効化に使う)"""
+
+    revision = 0
+
+    def add_command(self, *args, **kwargs):
+        self.revision += 1
+        return super().add_command(*args, **kwargs)
+
+    def remove_command(self, *args, **kwargs):
+        self.revision += 1
+        return super().remove_command(*args, **kwargs)
+
+    def clear_commands(self, *args, **kwargs):
+        self.revision += 1
+        return super().clear_commands(*args, **kwargs)
+
+    async def sync(self, *args, **kwargs):
+        self.revision += 1
+        return await super().sync(*args, **kwargs)
@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import zipfile
+from typing import Optional
+
+import aiofiles
+import aiohttp
+
+from cogs.cnews import JAVA_VERSION_MANIFESTS, VersionManifest
+from config.config import config
+from schemas.data import DataPaths
+from schemas.game_package import (AssetIndexEntry, GamePackage,
+                                  GamePackageAssetIndex)
+from utils.jsonscan import KeyScanner
+from utils.lang import lang_path
+
+logger = logging.getLogger("Download")
+
+MCDATA_ROOT = "./minecraft_data"
+MCDATA_DIR = f"{MCDATA_ROOT}/data"
+MCDATA_SYNC_STATE = f"{MCDATA_ROOT}/sync.json"
+# dataPaths.json のうちBotが使う種類
+MCDATA_KINDS = ("items", "blocks")
+ASSET_INDEX_DIR = "./tmp/assets/indexes"
+CHUNK_SIZE = 64 * 1024
+# 言語ファイルを同時にダウンロードする数
+LANG_CONCURRENCY = 4
+
+
+def client_path(version: str) -> str:
+    return f"./tmp/client_{version}.jar"
+
+
+async def fetch_manifest(client: aiohttp.ClientSession) -> VersionManifest:
+    async with client.get(JAVA_VERSION_MANIFESTS) as resp:
+        return VersionManifest.model_validate(await resp.json())
+
+
+async def fetch_package(
+    client: aiohttp.ClientSession, manifest: VersionManifest, version: str
+) -> Optional[GamePackage]:
+    for ver in manifest.versions:
+        if ver.id == version:
+            async with client.get(url=ver.url) as resp:
+                return GamePackage.model_validate(await resp.json())
+    return None
+
+
+def asset_index_path(asset_index: GamePackageAssetIndex) -> str:
+    return f"{ASSET_INDEX_DIR}/{asset_index.sha1}.json"
+
+
+async def fetch_asset_entries(
+    client: aiohttp.ClientSession, asset_index: GamePackageAssetIndex, names: list[str]
+) -> dict[str, AssetIndexEntry]:
+    """
+    アセットインデックスから指定したファイルのエントリだけを取り出します。
+
+    インデックス全体は読み込まずに少しずつ走査します。取得したインデックスはsha1をファイル名にして保存し、
+    同じインデックスを使うバージョンでは再取得しません。
+    """
+    scanner = KeyScanner(("objects",), names)
+    path = asset_index_path(asset_index)
+
+    if os.path.exists(path):
+        async with aiofiles.open(path, mode="rb") as fp:
+            while not scanner.done and (chunk := await fp.read(CHUNK_SIZE)):
+                scanner.feed(chunk)
+    else:
+        os.makedirs(ASSET_INDEX_DIR, exist_ok=True)
+        sha1 = hashlib.sha1()
+        async with client.get(url=asset_index.url) as resp:
+            resp.raise_for_status()
+            async with aiofiles.open(path + ".part", mode="wb") as fp:
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    sha1.update(chunk)
+                    scanner.feed(chunk)
+                    await fp.write(chunk)
+        if sha1.hexdigest() != asset_index.sha1:
+            os.remove(path + ".part")
+            raise ValueError(f"アセットインデックス{asset_index.id}のハッシュが一致しません")
+        os.replace(path + ".part", path)
+
+    return {
+        name: AssetIndexEntry.model_validate(entry)
+        for name, entry in scanner.found.items()
+    }
+
+
+async def _file_sha1(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    async with aiofiles.open(path, mode="rb") as fp:
+        return hashlib.sha1(await fp.read()).hexdigest()
+
+
+async def download_langs(
+    client: aiohttp.ClientSession, game_package: GamePackage, locales: list[str]
+) -> list[str]:
+    """
+    複数の言語ファイルを ./tmp/lang/<バージョン>/<言語>.json に並行して保存します。
+
+    ハッシュが一致するファイルはダウンロードしません。
+    アセットインデックスに含まれない言語 (en_usなど) を返します。
+    """
+    names = {locale: f"minecraft/lang/{locale}.json" for locale in locales}
+    entries = await fetch_asset_entries(
+        client, game_package.assetIndex, list(names.values())
+    )
+    semaphore = asyncio.Semaphore(LANG_CONCURRENCY)
+
+    async def download(locale: str, entry: AssetIndexEntry):
+        path = lang_path(game_package.id, locale)
+        if await _file_sha1(path) == entry.hash:
+            return
+        async with semaphore:
+            async with client.get(
+                f"{config.endpoints.resources}/{entry.hash[0:2]}/{entry.hash}"
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.read()
+        if hashlib.sha1(data).hexdigest() != entry.hash:
+            raise ValueError(f"言語ファイル{locale}のハッシュが一致しません")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        async with aiofiles.open(path + ".part", mode="wb") as fp:
+            await fp.write(data)
+        os.replace(path + ".part", path)
+
+    await asyncio.gather(
+        *(
+            download(locale, entries[name])
+            for locale, name in names.items()
+            if name in entries
+        )
+    )
+    return [locale for locale, name in names.items() if name not in entries]
+
+
+def extract_jar_lang(version: str, locale: str) -> bool:
+    """client.jarに含まれる言語ファイル (en_us) を取り出します。"""
+    try:
+        with zipfile.ZipFile(client_path(version)) as jar:
+            data = jar.read(f"assets/minecraft/lang/{locale}.json")
+    except KeyError:
+        return False
+    path = lang_path(version, locale)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, mode="wb") as fp:
+        fp.write(data)
+    return True
+
+
+async def download_assets(client: aiohttp.ClientSession, game_package: GamePackage):
+    """config.locales の言語ファイルとclient.jarを取得します。"""
+    missing = await download_langs(client, game_package, config.locales)
+    await download_client(client, game_package)
+    for locale in missing:
+        if not await asyncio.to_thread(extract_jar_lang, game_package.id, locale):
+            logger.warning(
+                f"バージョン{game_package.id}の言語ファイル{locale}が見つかりませんでした"
+            )
+
+
+async def download_client(client: aiohttp.ClientSession, game_package: GamePackage) -> str:
+    """client.jarを保存します。ハッシュが一致する場合はダウンロードしません。"""
+    path = client_path(game_package.id)
+    if os.path.exists(path):
+        async with aiofiles.open(path, mode="rb") as fp:
+            hash = hashlib.sha1(await fp.read()).hexdigest()
+
+        if hash == game_package.downloads.client.sha1:
+            logger.info("client.jarは既にダウンロードされているため、ダウンロードをスキップします。")
+            return path
+        else:
+            logger.info("client.jarのハッシュがサーバー上と同期されていません! 再ダウンロードを行います。")
+
+    async with client.get(url=game_package.downloads.client.url) as resp:
+        async with aiofiles.open(path, mode="wb") as fp:
+            await fp.write(await resp.read())
+    logger.info(f"バージョン{game_package.id}のclient.jarのダウンロードが完了しました!")
+    return path
+
+
+async def download_version(version: str) -> bool:
+    """最新版以外のバージョンの言語ファイルとclient.jarを取得します。"""
+    async with aiohttp.ClientSession() as client:
+        game_package = await fetch_package(client, await fetch_manifest(client), version)
+        if game_package is None:
+            return False
+        logger.info(f"バージョン{version}のデータをダウンロードしています...")
+        await download_assets(client, game_package)
+    return True
+
+
+async def _sync_file(
+    client: aiohttp.ClientSession, path: str, etags: dict[str, str]
+) -> bool:
+    """ETagが変わっていればファイルを取得します。更新した場合はTrueを返します。"""
+    local = f"{MCDATA_DIR}/{path}"
+    headers = {}
+    if path in etags and os.path.exists(local):
+        headers["If-None-Match"] = etags[path]
+
+    async with client.get(
+        f"{config.endpoints.minecraft_data}/data/{path}", headers=headers
+    ) as resp:
+        if resp.status == 304:
+            return False
+        resp.raise_for_status()
+        data = await resp.read()
+        etag = resp.headers.get("ETag")
+
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    async with aiofiles.open(local + ".part", mode="wb") as fp:
+        await fp.write(data)
+    os.replace(local + ".part", local)
+    if etag is not None:
+        etags[path] = etag
+    return True
+
+
+async def sync_mcdata(versions: list[str]) -> list[str]:
+    """
+    minecraft-dataからdataPaths.jsonと指定したバージョンのファイルだけを取得します。
+
+    前回のETagを保存しておき、変更のないファイルはダウンロードしません。
+    更新したファイルのパスを返します。
+    """
+    etags: dict[str, str] = {}
+    if os.path.exists(MCDATA_SYNC_STATE):
+        async with aiofiles.open(MCDATA_SYNC_STATE, mode="rb") as fp:
+            etags = json.loads(await fp.read())
+
+    changed = []
+    synced = ["dataPaths.json"]
+    async with aiohttp.ClientSession() as client:
+        if await _sync_file(client, "dataPaths.json", etags):
+            changed.append("dataPaths.json")
+        async with aiofiles.open(f"{MCDATA_DIR}/dataPaths.json", mode="rb") as fp:
+            data_paths = DataPaths.model_validate_json(await fp.read())
+
+        for version in versions:
+            entry = data_paths.pc.get(version)
+            if entry is None:
+                logger.warning(f"minecraft-dataにバージョン{version}のデータがありません")
+                continue
+            for kind in MCDATA_KINDS:
+                folder = getattr(entry, kind)
+                if folder is None:
+                    continue
+                path = f"{folder}/{kind}.json"
+                synced.append(path)
+                if await _sync_file(client, path, etags):
+                    changed.append(path)
+
+    async with aiofiles.open(MCDATA_SYNC_STATE, mode="w") as fp:
+        await fp.write(json.dumps(etags))
+    if os.path.isdir(f"{MCDATA_ROOT}/.git"):
+        await asyncio.to_thread(remove_legacy_clone, [*etags, *synced])
+    if changed:
+        logger.info(f"minecraft-dataのファイルを{len(changed)}件更新しました")
+    return changed
+
+
+def remove_legacy_clone(keep: list[str]):
+    """
+    以前のバージョンがgit cloneで取得したminecraft-dataのうち、同期したファイル以外を削除します。
+
+    keep は MCDATA_DIR からのパスです。削除したファイルが後で必要になった場合は改めて同期します。
+    """
+    root = os.path.normpath(MCDATA_ROOT)
+    keep_paths = {os.path.normpath(f"{MCDATA_DIR}/{path}") for path in keep}
+    keep_paths.add(os.path.normpath(MCDATA_SYNC_STATE))
+    try:
+        shutil.rmtree(f"{MCDATA_ROOT}/.git")
+        for dirpath, _, filenames in os.walk(MCDATA_ROOT, topdown=False):
+            for name in filenames:
+                path = os.path.normpath(os.path.join(dirpath, name))
+                if path not in keep_paths:
+                    os.remove(path)
+            if os.path.normpath(dirpath) != root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    except OSError as e:
+        logger.warning(f"以前のminecraft-dataのcloneを削除できませんでした: {e}")
+        return
+    logger.info("以前のminecraft-dataのcloneを削除しました")
@@ -0,0 +1,154 @@
+import json
+import re
+from typing import Any, Iterable, Optional
+
+# 文字列の外で意味を持つ文字
+_STRUCTURAL = re.compile(rb'["{}\[\]:,]')
+# 文字列の中で意味を持つ文字
+_STRING = re.compile(rb'["\\]')
+# 入れ子もエスケープも含まない値 (アセットインデックスの各エントリなど) はまとめて読み飛ばす
+_FLAT = rb'\s*(?:\{[^{}\[\]"]*(?:"[^"\\]*"[^{}\[\]"]*)*\}|"[^"\\]*"|[^{}\[\]",]+)\s*'
+_FLAT_VALUE = re.compile(_FLAT)
+# エスケープを含まないキーとその値
+_FLAT_MEMBER = re.compile(rb'\s*"([^"\\]*)"\s*:' + _FLAT + rb'(?=[,}])')
+
+
+class KeyScanner:
+    """
+    JSONを少しずつ読み込みながら、指定したオブジェクトのうち必要なキーの値だけを取り出します。
+
+    例えばアセットインデックスから "objects" の中の "minecraft/lang/ja_jp.json" だけを取り出す場合:
+
+        scanner = KeyScanner(("objects",), ["minecraft/lang/ja_jp.json"])
+        for chunk in chunks:
+            scanner.feed(chunk)
+            if scanner.done:
+                break
+        scanner.found["minecraft/lang/ja_jp.json"]  # {"hash": ..., "size": ...}
+
+    保持するのは読み込み中のキーと取り出し中の値だけなので、全体の大きさに関係なくメモリ使用量は一定です。
+    """
+
+    def __init__(self, path: tuple[str, ...], keys: Iterable[str]):
+        self.path = list(path)
+        self.wanted = set(keys)
+        self.found: dict[str, Any] = {}
+        # 開いているコンテナ ("{" か "[") と、それぞれの現在のキー
+        self._containers = bytearray()
+        self._keys: list[Optional[str]] = []
+        self._expect_key = False
+        self._in_string = False
+        self._escape = False
+        # 読み込み中のキー (Noneの場合は読み飛ばす)
+        self._key: Optional[bytearray] = None
+        # 取り出し中の値
+        self._capture: Optional[bytearray] = None
+        self._capture_key = ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.found) == len(self.wanted)
+
+    def _in_target(self) -> bool:
+        depth = len(self.path)
+        return (
+            len(self._containers) == depth + 1
+            and self._containers[-1] == ord("{")
+            and self._keys[:depth] == self.path
+        )
+
+    def _finish_capture(self, chunk: bytes, end: int, start: int):
+        assert self._capture is not None
+        self._capture += chunk[start:end]
+        self.found[self._capture_key] = json.loads(self._capture)
+        self._capture = None
+
+    def feed(self, chunk: bytes):
+        pos = 0
+        # 取り出し中の値のうち、このチャンクに含まれる部分の開始位置
+        capture_start = 0
+        length = len(chunk)
+
+        while pos < length:
+            if self._expect_key and self._capture is None and self._in_target():
+                # 対象のオブジェクトの中では不要なメンバーを1つずつ正規表現で読み飛ばす
+                member = _FLAT_MEMBER.match(chunk, pos)
+                while member is not None and member[1].decode() not in self.wanted:
+                    pos = member.end()
+                    if chunk[pos] != ord(","):
+                        break
+                    pos += 1
+                    member = _FLAT_MEMBER.match(chunk, pos)
+                if pos >= length:
+                    break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    if self._key is not None:
+                        self._key += chunk[pos : pos + 1]
+                    pos += 1
+                    continue
+                match = _STRING.search(chunk, pos)
+                end = match.start() if match else length
+                if self._key is not None:
+                    self._key += chunk[pos:end]
+                if match is None:
+                    break
+                pos = end + 1
+                if chunk[end] == ord("\\"):
+                    self._escape = True
+                    if self._key is not None:
+                        self._key += b"\\"
+                    continue
+                self._in_string = False
+                if self._key is not None:
+                    key = bytes(self._key)
+                    self._keys[-1] = (
+                        json.loads(b'"' + key + b'"') if b"\\" in key else key.decode()
+                    )
+                    self._key = None
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            c = chunk[match.start()]
+
+            if c == ord('"'):
+                self._in_string = True
+                if self._expect_key:
+                    self._expect_key = False
+                    # 対象のオブジェクトまでのキーだけを読み込む
+                    if len(self._containers) <= len(self.path) + 1:
+                        self._key = bytearray()
+            elif c == ord("{") or c == ord("["):
+                self._containers.append(c)
+                self._keys.append(None)
+                self._expect_key = c == ord("{")
+            elif c == ord(":"):
+                if self._capture is None and self._in_target():
+                    if self._keys[-1] in self.wanted:
+                        self._capture = bytearray()
+                        self._capture_key = self._keys[-1]
+                        capture_start = pos
+                    else:
+                        skip = _FLAT_VALUE.match(chunk, pos)
+                        # 値がチャンクの途中で終わっている場合だけ読み飛ばせる
+                        if skip is not None and skip.end() < length:
+                            pos = skip.end()
+            elif c == ord(","):
+                if self._capture is not None and self._in_target():
+                    self._finish_capture(chunk, match.start(), capture_start)
+                if self._containers and self._containers[-1] == ord("{"):
+                    self._expect_key = True
+            else:
+                if self._capture is not None and self._in_target():
+                    self._finish_capture(chunk, match.start(), capture_start)
+                self._containers.pop()
+                self._keys.pop()
+                self._expect_key = False
+
+        if self._capture is not None:
+            self._capture += chunk[capture_start:]
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import logging
+import sys
+import unicodedata
+from typing import Optional
+
+from utils import snapshot
+
+logger = logging.getLogger("Lang")
+
+LANG_DIR = "./tmp/lang"
+DEFAULT_LOCALE = "ja_jp"
+
+# Discordの言語設定 (discord.Locale の値) とMinecraftの言語ファイルの対応
+DISCORD_LOCALES = {
+    "ja": "ja_jp",
+    "en-US": "en_us",
+    "en-GB": "en_gb",
+    "zh-CN": "zh_cn",
+    "zh-TW": "zh_tw",
+    "ko": "ko_kr",
+    "de": "de_de",
+    "es-ES": "es_es",
+    "fr": "fr_fr",
+    "it": "it_it",
+    "pt-BR": "pt_br",
+    "ru": "ru_ru",
+}
+
+# 使用する名前空間 (前にあるものほど逆引きで優先されます)
+NAMESPACES = ("item", "block", "entity", "enchantment", "effect")
+
+
+def lang_path(version: str, locale: str = DEFAULT_LOCALE) -> str:
+    return f"{LANG_DIR}/{version}/{locale}.json"
+
+
+def minecraft_locale(locale: object) -> str:
+    """discord.Locale をMinecraftの言語名に変換します。 例: Locale.american_english -> "en_us" """
+    return DISCORD_LOCALES.get(str(locale), DEFAULT_LOCALE)
+
+
+def normalize(text: str) -> str:
+    """全角英数字や大文字小文字の違いを吸収します。"""
+    return unicodedata.normalize("NFKC", text).strip().lower()
+
+
+class LangTable:
+    """言語ファイルのうち必要な名前空間だけを持つ表"""
+
+    def __init__(
+        self,
+        version: str,
+        data: dict[str, str],
+        size: int = 0,
+        locale: str = DEFAULT_LOCALE,
+    ):
+        self.version = version
+        self.locale = locale
+        # 元のファイルのサイズ (メモリ使用量の目安)
+        self.size = size
+        self.entries: dict[str, str] = {}
+        self.reverse: dict[str, tuple[str, str]] = {}
+
+        priorities: dict[str, int] = {}
+        for key, text in data.items():
+            namespace, _, rest = key.partition(".")
+            if namespace not in NAMESPACES or not isinstance(text, str):
+                continue
+            key = sys.intern(key)
+            text = sys.intern(text)
+            self.entries[key] = text
+
+            # "item.minecraft.diamond" のように名前空間とIDだけのキーを逆引きに登録する
+            domain, _, id = rest.partition(".")
+            if domain != "minecraft" or not id or "." in id:
+                continue
+            name = normalize(text)
+            priority = NAMESPACES.index(namespace)
+            if priorities.get(name, len(NAMESPACES)) > priority:
+                priorities[name] = priority
+                self.reverse[name] = (namespace, sys.intern(id))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.entries.get(key, default)
+
+    def name(self, namespace: str, id: str) -> Optional[str]:
+        """IDの表示名を返します。 例: ("item", "diamond") -> "ダイヤモンド" """
+        return self.entries.get(f"{namespace}.minecraft.{id}")
+
+    def lookup(self, text: str) -> Optional[tuple[str, str]]:
+        """表示名から (名前空間, ID) を返します。 例: "ダイヤモンド" -> ("item", "diamond")"""
+        return self.reverse.get(normalize(text))
+
+
+class LangService:
+    """バージョン・言語ごとに言語ファイルを一度だけ読み込みます。"""
+
+    def __init__(self):
+        self.tables: dict[tuple[str, str], LangTable] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, version: str, locale: str = DEFAULT_LOCALE) -> LangTable:
+        key = (version, locale)
+        table = self.tables.get(key)
+        if table is not None:
+            return table
+
+        async with self._lock:
+            if key not in self.tables:
+                self.tables[key] = await snapshot.cached(
+                    f"lang-{version}-{locale}",
+                    [lang_path(version, locale)],
+                    lambda sources: LangTable(
+                        version, json.loads(sources[0]), len(sources[0]), locale
+                    ),
+                )
+                logger.info(
+                    f"バージョン{version}の言語ファイル{locale}を読み込みました ({len(self.tables[key])}件)"
+                )
+            return self.tables[key]
+
+    def invalidate(self, version: Optional[str] = None):
+        if version is None:
+            self.tables.clear()
+        else:
+            for key in [k for k in self.tables if k[0] == version]:
+                del self.tables[key]
+
+
+lang = LangService()
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import logging
+import os
+import weakref
+import zipfile
+from collections import OrderedDict
+from typing import Optional
+
+import aiofiles
+from pydantic import TypeAdapter
+
+from config import config
+from schemas.data import (BLOCKS_ADAPTER, ITEMS_ADAPTER, BlockEntry, DataPaths,
+                          ItemEntry)
+from utils.download import (MCDATA_DIR, MCDATA_KINDS, client_path, download_version,
+                            sync_mcdata)
+from utils.lang import (DEFAULT_LOCALE, LangTable, lang, lang_path,
+                        minecraft_locale)
+from utils.search import SearchIndex, build_item_index
+
+logger = logging.getLogger("McData")
+
+
+class EntryTable:
+    """items.json / blocks.json 1ファイル分のエントリ"""
+
+    def __init__(self, path: str, entries: list, size: int):
+        self.path = path
+        self.entries = entries
+        self.size = size
+
+
+class Texture:
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class Dataset:
+    """1バージョン分のアイテム・ブロック・言語ファイル・テクスチャ"""
+
+    def __init__(
+        self,
+        version: str,
+        items: EntryTable,
+        blocks: EntryTable,
+        langs: dict[str, LangTable],
+        pool: "weakref.WeakValueDictionary[str, Texture]",
+    ):
+        self.version = version
+        self._items = items
+        self._blocks = blocks
+        self.langs = langs
+        self.lang = langs[DEFAULT_LOCALE]
+        self.items: list[ItemEntry] = items.entries
+        self.blocks: list[BlockEntry] = blocks.entries
+        self.items_by_name = {i.name: i for i in self.items}
+        self.items_by_id = {i.id: i for i in self.items}
+        self.blocks_by_name = {b.name: b for b in self.blocks}
+        self.textures: dict[str, Optional[Texture]] = {}
+        self._pool = pool
+        self._jar: Optional[zipfile.ZipFile] = None
+        self._index: Optional[SearchIndex] = None
+
+    def item(self, name: str) -> Optional[ItemEntry]:
+        return self.items_by_name.get(name)
+
+    def block(self, name: str) -> Optional[BlockEntry]:
+        return self.blocks_by_name.get(name)
+
+    def is_block(self, name: str) -> bool:
+        return name in self.blocks_by_name
+
+    def lang_for(self, locale: object) -> LangTable:
+        """Discordの言語設定に対応する言語ファイル (無い場合は日本語) を返します。"""
+        return self.langs.get(minecraft_locale(locale), self.lang)
+
+    def search_index(self) -> SearchIndex:
+        if self._index is None:
+            self._index = build_item_index(self)
+        return self._index
+
+    def texture(self, kind: str, name: str) -> Optional[bytes]:
+        """client.jarからテクスチャを読み込みます。同じ内容の画像はバージョン間で共有します。"""
+        path = f"assets/minecraft/textures/{kind}/{name}.png"
+        if path not in self.textures:
+            if self._jar is None:
+                self._jar = zipfile.ZipFile(client_path(self.version))
+            try:
+                data = self._jar.read(path)
+            except KeyError:
+                self.textures[path] = None
+            else:
+                key = hashlib.sha1(data).hexdigest()
+                texture = self._pool.get(key)
+                if texture is None:
+                    texture = Texture(data)
+                    self._pool[key] = texture
+                self.textures[path] = texture
+        texture = self.textures[path]
+        return texture.data if texture is not None else None
+
+    def close(self):
+        if self._jar is not None:
+            self._jar.close()
+            self._jar = None
+
+
+class DatasetManager:
+    """
+    複数バージョンのデータを保持します。
+
+    使われていないバージョンから順に、メモリ使用量の目安が
+    config.dataset_cache_mb を下回るまで破棄します。最新バージョンは破棄しません。
+    """
+
+    def __init__(self, root: str = MCDATA_DIR):
+        self.root = root
+        self.datasets: OrderedDict[str, Dataset] = OrderedDict()
+        self.tables: weakref.WeakValueDictionary[str, EntryTable] = (
+            weakref.WeakValueDictionary()
+        )
+        self.textures: weakref.WeakValueDictionary[str, Texture] = (
+            weakref.WeakValueDictionary()
+        )
+        self._paths: Optional[DataPaths] = None
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _read(self, path: str) -> bytes:
+        async with aiofiles.open(f"{self.root}/{path}", mode="rb") as fp:
+            return await fp.read()
+
+    async def data_paths(self) -> DataPaths:
+        if self._paths is None:
+            self._paths = DataPaths.model_validate_json(
+                await self._read("dataPaths.json")
+            )
+        return self._paths
+
+    async def versions(self) -> list[str]:
+        """minecraft-dataに含まれるJava版のバージョン一覧"""
+        return list((await self.data_paths()).pc.keys())
+
+    async def _table(
+        self, path: str, adapter: TypeAdapter
+    ) -> EntryTable:
+        # 別のバージョンと同じファイルを参照している場合はそのまま共有する
+        table = self.tables.get(path)
+        if table is not None:
+            return table
+
+        raw = await self._read(path)
+        entries = await asyncio.to_thread(adapter.validate_json, raw)
+        table = EntryTable(path, entries, len(raw))
+        self.tables[path] = table
+        return table
+
+    async def entry_counts(self, version: str) -> tuple[int, int]:
+        """アイテムとブロックの数を返します。言語ファイルやclient.jarは取得しません。"""
+        entry = (await self.data_paths()).pc.get(version)
+        if entry is None or entry.items is None or entry.blocks is None:
+            raise KeyError(version)
+        if not all(
+            os.path.exists(f"{self.root}/{getattr(entry, kind)}/{kind}.json")
+            for kind in MCDATA_KINDS
+        ):
+            await sync_mcdata([version])
+        items = await self._table(f"{entry.items}/items.json", ITEMS_ADAPTER)
+        blocks = await self._table(f"{entry.blocks}/blocks.json", BLOCKS_ADAPTER)
+        return len(items.entries), len(blocks.entries)
+
+    async def get(self, version: Optional[str] = None) -> Dataset:
+        version = version or config.latest_version
+        dataset = self.datasets.get(version)
+        if dataset is not None:
+            self.datasets.move_to_end(version)
+            return dataset
+
+        lock = self._locks.setdefault(version, asyncio.Lock())
+        async with lock:
+            if version not in self.datasets:
+                self.datasets[version] = await self._load(version)
+                self.evict()
+            self.datasets.move_to_end(version)
+            return self.datasets[version]
+
+    async def _load(self, version: str) -> Dataset:
+        entry = (await self.data_paths()).pc.get(version)
+        if entry is None or entry.items is None or entry.blocks is None:
+            raise KeyError(version)
+
+        # 最新版以外のファイルは初めて使うときに取得する
+        if not all(
+            os.path.exists(f"{self.root}/{getattr(entry, kind)}/{kind}.json")
+            for kind in MCDATA_KINDS
+        ):
+            await sync_mcdata([version])
+
+        if not os.path.exists(lang_path(version)) or not os.path.exists(
+            client_path(version)
+        ):
+            if not await download_version(version):
+                raise KeyError(version)
+
+        items = await self._table(f"{entry.items}/items.json", ITEMS_ADAPTER)
+        blocks = await self._table(f"{entry.blocks}/blocks.json", BLOCKS_ADAPTER)
+        # 言語ファイルはまとめて読み込んでおき、コマンドの実行時には読み込まない
+        langs = {DEFAULT_LOCALE: await lang.get(version)}
+        for locale in config.config.locales:
+            if locale not in langs and os.path.exists(lang_path(version, locale)):
+                langs[locale] = await lang.get(version, locale)
+        dataset = Dataset(version, items, blocks, langs, self.textures)
+        logger.info(f"バージョン{version}のデータを読み込みました")
+        return dataset
+
+    def memory_usage(self) -> int:
+        """保持しているデータのおおよそのバイト数 (共有しているものは1回だけ数えます)"""
+        tables = sum(t.size for t in list(self.tables.values()))
+        textures = sum(len(t.data) for t in list(self.textures.values()))
+        langs = sum(
+            t.size for d in self.datasets.values() for t in d.langs.values()
+        )
+        return tables + textures + langs
+
+    def evict(self):
+        budget = config.config.dataset_cache_mb * 1024 * 1024
+        # 今読み込んだばかりのバージョン (末尾) は残す
+        for version in list(self.datasets.keys())[:-1]:
+            if self.memory_usage() <= budget:
+                break
+            if version == config.latest_version:
+                continue
+            self.invalidate(version)
+            logger.info(f"バージョン{version}のデータをキャッシュから破棄しました")
+
+    def invalidate(self, version: Optional[str] = None):
+        versions = list(self.datasets.keys()) if version is None else [version]
+        for v in versions:
+            dataset = self.datasets.pop(v, None)
+            if dataset is not None:
+                dataset.close()
+            lang.invalidate(v)
+        if version is None:
+            self._paths = None
+
+
+datasets = DatasetManager()
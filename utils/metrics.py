@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import aiohttp
+import discord
+from aiohttp import web
+
+from utils.commandtree import RevisionedCommandTree
+
+logger = logging.getLogger("Metrics")
+
+# インタラクションは3秒以内に応答しないと失敗扱いになる
+INTERACTION_DEADLINE = 3.0
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 2.5, 3.0, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, b in enumerate(self.buckets):
+            if value <= b:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """バケットの上限値から分位点を概算します。"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        total = 0
+        for i, c in enumerate(self.counts[:-1]):
+            total += c
+            if total >= target:
+                return self.buckets[i]
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self.counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self.gauges: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self.help: dict[str, str] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def get_histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def label_values(self, name: str, label: str) -> list[str]:
+        values = set()
+        for n, labels in list(self.histograms) + list(self.counters):
+            if n == name:
+                values.update(v for k, v in labels if k == label)
+        return sorted(values)
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式で出力します。"""
+        lines: list[str] = []
+        typed: set[str] = set()
+
+        def header(name: str, type: str):
+            if name in typed:
+                return
+            typed.add(name)
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {type}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), value in sorted(self.gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), h in sorted(self.histograms.items()):
+            header(name, "histogram")
+            total = 0
+            for b, c in zip(h.buckets, h.counts):
+                total += c
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels + (('le', str(b)),))} {total}"
+                )
+            lines.append(
+                f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {h.count}"
+            )
+            lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+metrics = MetricsRegistry()
+metrics.help.update(
+    {
+        "commandlab_command_first_response_seconds": "コマンド受信から最初の応答(response.*)までの時間",
+        "commandlab_command_handler_seconds": "コマンドハンドラ全体の処理時間",
+        "commandlab_command_http_seconds": "ハンドラ内のHTTP通信にかかった時間",
+        "commandlab_command_render_seconds": "ハンドラ内の画像生成などにかかった時間",
+        "commandlab_command_deadline_miss_total": "3秒以内に応答できなかった回数",
+        "commandlab_command_errors_total": "エラーで終了した回数",
+    }
+)
+
+
+class Span:
+    """1回のコマンド/オートコンプリート実行の計測値"""
+
+    def __init__(self, command: str, kind: str, created: float):
+        self.command = command
+        self.kind = kind
+        # Discord側でインタラクションが作成された時刻 (time.time基準)
+        self.created = created
+        self.start = time.perf_counter()
+        self.first_response: Optional[float] = None
+        self.http = 0.0
+        self.render = 0.0
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+# 実行中のタスク → Span (ウォッチドッグが別スレッドから参照する)
+running_spans: "weakref.WeakKeyDictionary[asyncio.Task, Span]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _on_request_start(session, ctx, params: aiohttp.TraceRequestStartParams):
+    ctx.start = time.perf_counter()
+
+
+async def _on_request_end(session, ctx, params: aiohttp.TraceRequestEndParams):
+    span = current_span.get()
+    if span is None:
+        return
+    now = time.perf_counter()
+    span.http += now - ctx.start
+    if span.first_response is None and params.url.path.endswith("/callback"):
+        span.first_response = now
+
+
+async def _on_request_exception(
+    session, ctx, params: aiohttp.TraceRequestExceptionParams
+):
+    span = current_span.get()
+    if span is not None:
+        span.http += time.perf_counter() - ctx.start
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """HTTP通信時間を現在のコマンドに加算するTraceConfigを作成します。"""
+    tc = aiohttp.TraceConfig()
+    tc.on_request_start.append(_on_request_start)
+    tc.on_request_end.append(_on_request_end)
+    tc.on_request_exception.append(_on_request_exception)
+    return tc
+
+
+@contextmanager
+def measure_render():
+    """画像生成などの時間を現在のコマンドに加算します。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span = current_span.get()
+        if span is not None:
+            span.render += time.perf_counter() - start
+
+
+def record_span(span: Span, failed: bool):
+    end = time.perf_counter()
+    labels = {"command": span.command, "kind": span.kind}
+
+    # Discordがインタラクションを作成してからBotが受信するまでの遅延も含める
+    received_delay = max(0.0, time.time() - span.created - (end - span.start))
+
+    metrics.observe("commandlab_command_handler_seconds", end - span.start, **labels)
+    metrics.observe("commandlab_command_http_seconds", span.http, **labels)
+    metrics.observe("commandlab_command_render_seconds", span.render, **labels)
+
+    if span.first_response is not None:
+        first = received_delay + span.first_response - span.start
+        metrics.observe("commandlab_command_first_response_seconds", first, **labels)
+    else:
+        first = None
+
+    if first is None or first > INTERACTION_DEADLINE:
+        metrics.inc("commandlab_command_deadline_miss_total", **labels)
+    if failed:
+        metrics.inc("commandlab_command_errors_total", **labels)
+
+
+class InstrumentedCommandTree(RevisionedCommandTree):
+    async def _call(self, interaction: discord.Interaction) -> None:
+        kind = (
+            "autocomplete"
+            if interaction.type is discord.InteractionType.autocomplete
+            else "command"
+        )
+        span = Span(
+            _command_name(interaction), kind, interaction.created_at.timestamp()
+        )
+        token = current_span.set(span)
+        task = asyncio.current_task()
+        if task is not None:
+            running_spans[task] = span
+        failed = True
+        try:
+            await super()._call(interaction)
+            failed = interaction.command_failed
+        finally:
+            current_span.reset(token)
+            if task is not None:
+                running_spans.pop(task, None)
+            record_span(span, failed)
+
+
+def _command_name(interaction: discord.Interaction) -> str:
+    data = interaction.data or {}
+    names = [data.get("name", "unknown")]
+    options = data.get("options", [])
+    # サブコマンド (/cpack-mcmeta latest など) は名前を連結する
+    while options and options[0].get("type") in (1, 2):
+        names.append(options[0]["name"])
+        options = options[0].get("options", [])
+    return " ".join(names)
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    async def handle(request: web.Request):
+        return web.Response(
+            text=metrics.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"メトリクスを http://{host}:{port}/metrics で公開しています。")
+    return runner
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import html
+import logging
+import math
+import os
+import pickle
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+from schemas.patch_note import PatchNote, PatchNoteEntry
+from utils.patchnotes import patch_notes
+
+logger = logging.getLogger("NewsIndex")
+
+NEWS_INDEX_PATH = "./tmp/news_index.pickle"
+# 保存する形式を変えたら上げる
+NEWS_INDEX_FORMAT = 1
+MAX_HITS = 50
+SNIPPET_LENGTH = 160
+
+# BM25のパラメータ
+K1 = 1.2
+B = 0.75
+
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+
+def html_to_text(body: str) -> str:
+    return _SPACE.sub(" ", html.unescape(_TAG.sub(" ", body))).strip()
+
+
+def _stem(word: str) -> str:
+    # 複数形程度の違いだけを吸収する (bulbs -> bulb)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """英数字は単語ごと、日本語・中国語・韓国語は2文字ずつに区切ります。"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = [_stem(w) for w in _WORD.findall(text)]
+    for run in _CJK.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class NewsDocument(NamedTuple):
+    version: str
+    title: str
+    hash: str
+    text: str
+    terms: dict[str, int]
+    length: int
+
+
+class NewsHit(NamedTuple):
+    version: str
+    title: str
+    snippet: str
+    score: float
+
+
+def _body_hash(entry: PatchNoteEntry) -> str:
+    return hashlib.blake2b(
+        f"{entry.title}\0{entry.body}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def build_document(entry: PatchNoteEntry) -> NewsDocument:
+    text = html_to_text(entry.body)
+    tokens = tokenize(text)
+    return NewsDocument(
+        version=entry.version,
+        title=entry.title,
+        hash=_body_hash(entry),
+        text=text,
+        terms=Counter(tokens),
+        length=len(tokens),
+    )
+
+
+class NewsIndex:
+    """パッチノートの本文の転置インデックス。作成後は変更しないので別スレッドで作り直せます。"""
+
+    def __init__(self, docs: Iterable[NewsDocument] = ()):
+        self.docs = list(docs)
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for i, doc in enumerate(self.docs):
+            for term, count in doc.terms.items():
+                self.postings[term].append((i, count))
+        self.average = (
+            sum(d.length for d in self.docs) / len(self.docs) if self.docs else 0
+        )
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def updated(self, entries: list[PatchNoteEntry]) -> "NewsIndex":
+        """変更のあったパッチノートだけを読み直した新しいインデックスを返します。"""
+        current = {doc.version: doc for doc in self.docs}
+        docs = []
+        changed = 0
+        for entry in entries:
+            doc = current.get(entry.version)
+            if doc is None or doc.hash != _body_hash(entry):
+                doc = build_document(entry)
+                changed += 1
+            docs.append(doc)
+        if changed == 0 and len(docs) == len(self.docs):
+            return self
+        logger.info(f"パッチノートの検索インデックスを更新しました ({changed}/{len(docs)}件)")
+        return NewsIndex(docs)
+
+    def _snippet(self, doc: NewsDocument, words: list[str]) -> str:
+        lower = doc.text.lower()
+        positions = [p for p in (lower.find(w) for w in words) if p >= 0]
+        start = max(min(positions, default=0) - SNIPPET_LENGTH // 3, 0)
+        snippet = doc.text[start : start + SNIPPET_LENGTH]
+        return ("…" if start > 0 else "") + snippet + (
+            "…" if start + SNIPPET_LENGTH < len(doc.text) else ""
+        )
+
+    def search(self, query: str, limit: int = MAX_HITS) -> list[NewsHit]:
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+
+        scores: dict[int, float] = defaultdict(float)
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+            for i, count in postings:
+                norm = K1 * (1 - B + B * self.docs[i].length / self.average)
+                scores[i] += idf * count * (K1 + 1) / (count + norm)
+
+        # 抜粋は元の表記 (空白区切り) で探す
+        words = unicodedata.normalize("NFKC", query).lower().split()
+        ranked = sorted(scores.items(), key=lambda s: (-s[1], s[0]))[:limit]
+        return [
+            NewsHit(
+                self.docs[i].version,
+                self.docs[i].title,
+                self._snippet(self.docs[i], words),
+                score,
+            )
+            for i, score in ranked
+        ]
+
+
+def load_index() -> NewsIndex:
+    try:
+        with open(NEWS_INDEX_PATH, mode="rb") as fp:
+            if pickle.load(fp) == NEWS_INDEX_FORMAT:
+                return NewsIndex(NewsDocument(*d) for d in pickle.load(fp))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"パッチノートの検索インデックスを読み込めませんでした: {e}")
+    return NewsIndex()
+
+
+def save_index(index: NewsIndex):
+    os.makedirs(os.path.dirname(NEWS_INDEX_PATH), exist_ok=True)
+    with open(NEWS_INDEX_PATH + ".part", mode="wb") as fp:
+        pickle.dump(NEWS_INDEX_FORMAT, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(
+            [tuple(d) for d in index.docs], fp, protocol=pickle.HIGHEST_PROTOCOL
+        )
+    os.replace(NEWS_INDEX_PATH + ".part", NEWS_INDEX_PATH)
+
+
+class NewsSearchService:
+    """
+    パッチノートの検索インデックスを保持します。
+
+    作成と保存は別スレッドで行い、パッチノートの一覧が更新されたときは変更のあったものだけを読み直します。
+    """
+
+    def __init__(self):
+        self.index: Optional[NewsIndex] = None
+        self._notes: Optional[PatchNote] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> NewsIndex:
+        notes = await patch_notes.fetch()
+        if self.index is not None and notes is self._notes:
+            return self.index
+
+        async with self._lock:
+            if self.index is None:
+                self.index = await asyncio.to_thread(load_index)
+            if notes is not self._notes:
+                index = await asyncio.to_thread(self.index.updated, notes.entries)
+                if index is not self.index:
+                    await asyncio.to_thread(save_index, index)
+                self.index = index
+                self._notes = notes
+            return self.index
+
+    async def search(self, query: str, limit: int = MAX_HITS) -> list[NewsHit]:
+        return (await self.get()).search(query, limit)
+
+
+news_index = NewsSearchService()
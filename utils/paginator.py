@@ -1,9 +1,63 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence
+
 import discord
 from discord.ext import commands
 
 
+class PageSource:
+    """
+    ページを表示するときに初めて作成するための元データ
+
+    ページ数が分からない場合は length が None を返し、get_page が None を返したページの手前を最後とみなします。
+    """
+
+    def length(self) -> Optional[int]:
+        return None
+
+    async def get_page(self, index: int) -> Optional[discord.Embed]:
+        raise NotImplementedError
+
+
+class ListPageSource(PageSource):
+    """Embedか、Embedを返す関数のリスト"""
+
+    def __init__(self, pages: Sequence[discord.Embed | Callable[[], discord.Embed]]):
+        self.pages = pages
+
+    def length(self) -> Optional[int]:
+        return len(self.pages)
+
+    async def get_page(self, index: int) -> Optional[discord.Embed]:
+        if not 0 <= index < len(self.pages):
+            return None
+        page = self.pages[index]
+        return page() if callable(page) else page
+
+
+class FunctionPageSource(PageSource):
+    """ページ番号からEmbedを作成する非同期関数"""
+
+    def __init__(
+        self,
+        factory: Callable[[int], Awaitable[Optional[discord.Embed]]],
+        length: Optional[int] = None,
+    ):
+        self.factory = factory
+        self._length = length
+
+    def length(self) -> Optional[int]:
+        return self._length
+
+    async def get_page(self, index: int) -> Optional[discord.Embed]:
+        if index < 0 or (self._length is not None and index >= self._length):
+            return None
+        return await self.factory(index)
+
+
 class EmbedPaginator(discord.ui.View):
     """
     Embed Paginator.
@@ -22,49 +76,56 @@ class EmbedPaginator(discord.ui.View):
         Page to start the pagination on.
     AllowExtInput: bool
         Overrides ability for 3rd party to interract with button.
+    cache_size: int
+        How many recently rendered pages to keep.
     """
 
     def __init__(
         self,
         *,
         timeout: int = 60,
-        PreviousButton: discord.ui.Button = discord.ui.Button(
-            emoji=discord.PartialEmoji(name="\U000025c0")
-        ),
-        NextButton: discord.ui.Button = discord.ui.Button(
-            emoji=discord.PartialEmoji(name="\U000025b6")
-        ),
+        PreviousButton: Optional[discord.ui.Button] = None,
+        NextButton: Optional[discord.ui.Button] = None,
         PageCounterStyle: discord.ButtonStyle = discord.ButtonStyle.grey,
         InitialPage: int = 0,
         AllowExtInput: bool = False,
         ephemeral: bool = False,
+        cache_size: int = 5,
     ) -> None:
-
-        self.PreviousButton = PreviousButton
-        self.NextButton = NextButton
+        # ボタンはインスタンスごとに作成する (共有するとコールバックが上書きされる)
+        self.PreviousButton = PreviousButton or discord.ui.Button(
+            emoji=discord.PartialEmoji(name="\U000025c0")
+        )
+        self.NextButton = NextButton or discord.ui.Button(
+            emoji=discord.PartialEmoji(name="\U000025b6")
+        )
         self.PageCounterStyle = PageCounterStyle
         self.InitialPage = InitialPage
         self.AllowExtInput = AllowExtInput
         self.ephemeral = ephemeral
+        self.cache_size = cache_size
 
-        self.pages = None
+        self.source: Optional[PageSource] = None
         self.ctx = None
+        self.author = None
         self.message = None
         self.current_page = None
         self.page_counter = None
-        self.total_page_count = None
+        self.total_page_count: Optional[int] = None
+        # 作成済みのページ。最後に使われたものが末尾
+        self._cache: OrderedDict[int, discord.Embed] = OrderedDict()
+        self._prefetch: Optional[asyncio.Task] = None
 
         super().__init__(timeout=timeout)
 
     async def start(
-        self, ctx: discord.Interaction | commands.Context, pages: list[discord.Embed]
+        self,
+        ctx: discord.Interaction | commands.Context,
+        pages: PageSource | Sequence[discord.Embed | Callable[[], discord.Embed]],
     ):
 
-        if isinstance(ctx, discord.Interaction):
-            ctx = await commands.Context.from_interaction(ctx)
-
-        self.pages = pages
-        self.total_page_count = len(pages)
+        self.source = pages if isinstance(pages, PageSource) else ListPageSource(pages)
+        self.total_page_count = self.source.length()
         self.ctx = ctx
         self.current_page = self.InitialPage
 
@@ -81,51 +142,120 @@ class EmbedPaginator(discord.ui.View):
         self.add_item(self.page_counter)
         self.add_item(self.NextButton)
 
-        self.message = await ctx.send(
-            embed=self.pages[self.InitialPage], view=self, ephemeral=self.ephemeral
-        )
-
-    async def previous(self):
-        if self.current_page == 0:
-            self.current_page = self.total_page_count - 1
+        embed = await self.page(self.current_page)
+        if isinstance(ctx, commands.Context):
+            self.author = ctx.author
+            self.message = await ctx.send(
+                embed=embed, view=self, ephemeral=self.ephemeral
+            )
+        elif ctx.response.is_done():
+            # deferした後 (/cnews など) はフォローアップで送信する
+            self.author = ctx.user
+            self.message = await ctx.followup.send(
+                embed=embed, view=self, ephemeral=self.ephemeral, wait=True
+            )
         else:
-            self.current_page -= 1
+            self.author = ctx.user
+            await ctx.response.send_message(
+                embed=embed, view=self, ephemeral=self.ephemeral
+            )
+            self.message = await ctx.original_response()
+        self.prefetch(self.current_page + 1)
+
+    async def page(self, index: int) -> Optional[discord.Embed]:
+        """ページを返します。作成済みのページは作成し直しません。"""
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
 
-        self.page_counter.label = f"{self.current_page + 1}/{self.total_page_count}"
-        await self.message.edit(embed=self.pages[self.current_page], view=self)
+        embed = await self.source.get_page(index)
+        if embed is None:
+            # ページ数が分からない場合は、ページが無かった時点で最後のページが決まる
+            if self.total_page_count is None and index > 0:
+                self.total_page_count = index
+            return None
+        self._cache[index] = embed
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return embed
 
-    async def next(self):
-        if self.current_page == self.total_page_count - 1:
-            self.current_page = 0
+    def prefetch(self, index: int):
+        """次に表示されそうなページを裏で作成しておきます。"""
+        if index in self._cache or index < 0:
+            return
+        if self.total_page_count is not None and index >= self.total_page_count:
+            return
+        if self._prefetch is not None and not self._prefetch.done():
+            return
+        self._prefetch = asyncio.create_task(self.page(index))
+
+    def update_counter(self):
+        total = self.total_page_count if self.total_page_count is not None else "?"
+        self.page_counter.label = f"{self.current_page + 1}/{total}"
+
+    async def on_timeout(self):
+        # 操作できなくなったボタンを無効にしておく
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    async def show(self, interaction: discord.Interaction, index: int):
+        if self._prefetch is not None and not self._prefetch.done():
+            await self._prefetch
+
+        embed = await self.page(index)
+        if embed is None:
+            index = 0
+            embed = await self.page(index)
+
+        # 進んでいる方向の次のページを先に作成しておく
+        step = -1 if index < self.current_page else 1
+        self.current_page = index
+        self.update_counter()
+        await interaction.response.edit_message(embed=embed, view=self)
+        self.prefetch(index + step)
+
+    async def previous(self, interaction: discord.Interaction):
+        if self.current_page > 0:
+            await self.show(interaction, self.current_page - 1)
+        elif self.total_page_count is not None:
+            await self.show(interaction, self.total_page_count - 1)
         else:
-            self.current_page += 1
+            # 最後のページが分からないため先頭から戻れない
+            await interaction.response.defer()
 
-        self.page_counter.label = f"{self.current_page + 1}/{self.total_page_count}"
-        await self.message.edit(embed=self.pages[self.current_page], view=self)
+    async def next(self, interaction: discord.Interaction):
+        if self.total_page_count is not None and (
+            self.current_page >= self.total_page_count - 1
+        ):
+            await self.show(interaction, 0)
+        else:
+            await self.show(interaction, self.current_page + 1)
+
+    async def check_author(self, interaction: discord.Interaction) -> bool:
+        if self.AllowExtInput or interaction.user == self.author:
+            return True
+        embed = discord.Embed(
+            description="You cannot control this pagination because you did not execute it.",
+            color=discord.Colour.red(),
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return False
 
     async def next_button_callback(self, interaction: discord.Interaction):
-        if interaction.user != self.ctx.author and self.AllowExtInput:
-            embed = discord.Embed(
-                description="You cannot control this pagination because you did not execute it.",
-                color=discord.Colour.red(),
-            )
-            return await interaction.response.send_message(embed=embed, ephemeral=True)
-        await self.next()
-        await interaction.response.defer()
+        if await self.check_author(interaction):
+            await self.next(interaction)
 
     async def previous_button_callback(self, interaction: discord.Interaction):
-        if interaction.user != self.ctx.author and self.AllowExtInput:
-            embed = discord.Embed(
-                description="You cannot control this pagination because you did not execute it.",
-                color=discord.Colour.red(),
-            )
-            return await interaction.response.send_message(embed=embed, ephemeral=True)
-        await self.previous()
-        await interaction.response.defer()
+        if await self.check_author(interaction):
+            await self.previous(interaction)
 
 
 class SimplePaginatorPageCounter(discord.ui.Button):
     def __init__(self, style: discord.ButtonStyle, TotalPages, InitialPage):
-        super().__init__(
-            label=f"{InitialPage + 1}/{TotalPages}", style=style, disabled=True
-        )
+        total = TotalPages if TotalPages is not None else "?"
+        super().__init__(label=f"{InitialPage + 1}/{total}", style=style, disabled=True)
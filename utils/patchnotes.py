@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import aiohttp
+from markdownify import markdownify as md
+
+from config.config import config
+from schemas.patch_note import PatchNote, PatchNoteEntry
+from utils.metrics import trace_config
+
+logger = logging.getLogger("PatchNotes")
+
+JAVA_PATCH_NOTES = config.endpoints.launcher_content + "/javaPatchNotes.json"
+# パッチノートの一覧の更新を確認する間隔 (秒)
+REFRESH_INTERVAL = 10 * 60
+# 1ページ (Embedの説明文) に収める文字数
+PAGE_LENGTH = 4000
+# 変換結果を保持するバージョン数
+PAGE_CACHE_SIZE = 32
+
+_HEADING = re.compile(r"^#{1,6} ", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _split_long(section: str, limit: int) -> list[str]:
+    """limit 文字を超える部分を行の区切りで分割します。"""
+    if len(section) <= limit:
+        return [section]
+    chunks: list[str] = []
+    current = ""
+    for line in section.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if current and len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_pages(text: str, limit: int = PAGE_LENGTH) -> list[str]:
+    """Markdownを見出しの位置で区切り、limit 文字以内のページにまとめます。"""
+    starts = [0, *(m.start() for m in _HEADING.finditer(text)), len(text)]
+    pages: list[str] = []
+    current = ""
+    for start, end in zip(starts, starts[1:]):
+        for chunk in _split_long(text[start:end], limit):
+            if current.strip() and len(current) + len(chunk) > limit:
+                pages.append(current.strip())
+                current = ""
+            current += chunk
+    if current.strip():
+        pages.append(current.strip())
+    return pages or [""]
+
+
+def to_pages(body: str) -> list[str]:
+    text = md(body, heading_style="ATX")
+    return split_pages(_BLANK_LINES.sub("\n\n", text).strip())
+
+
+class PatchNoteService:
+    """
+    javaPatchNotes.json を全員で共有し、本文はバージョンごとに一度だけMarkdownに変換します。
+
+    一覧は REFRESH_INTERVAL 秒ごとにETagを使って更新を確認します。
+    """
+
+    def __init__(self):
+        self.notes: Optional[PatchNote] = None
+        self.entries: dict[str, PatchNoteEntry] = {}
+        self.etag: Optional[str] = None
+        self.checked = 0.0
+        # バージョン -> (変換元の本文, ページ)
+        self.pages: OrderedDict[str, tuple[str, list[str]]] = OrderedDict()
+        self._converting: dict[str, asyncio.Future[list[str]]] = {}
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return (
+            self.notes is not None
+            and time.monotonic() - self.checked < REFRESH_INTERVAL
+        )
+
+    async def fetch(self) -> PatchNote:
+        if self._fresh():
+            return self.notes
+
+        async with self._lock:
+            if self._fresh():
+                return self.notes
+            headers = {}
+            if self.notes is not None and self.etag is not None:
+                headers["If-None-Match"] = self.etag
+            async with aiohttp.ClientSession(trace_configs=[trace_config()]) as client:
+                async with client.get(JAVA_PATCH_NOTES, headers=headers) as resp:
+                    if resp.status != 304:
+                        resp.raise_for_status()
+                        raw = await resp.read()
+                        self.notes = await asyncio.to_thread(
+                            PatchNote.model_validate_json, raw
+                        )
+                        self.entries = {e.version: e for e in self.notes.entries}
+                        self.etag = resp.headers.get("ETag")
+                        logger.info(f"パッチノートを{len(self.entries)}件読み込みました")
+            self.checked = time.monotonic()
+            return self.notes
+
+    def invalidate(self):
+        """次に使うときにパッチノートの一覧の更新を確認させます。"""
+        self.checked = 0.0
+
+    async def get_pages(
+        self, version: str
+    ) -> Optional[tuple[PatchNoteEntry, list[str]]]:
+        """パッチノートと、本文をページに分けたものを返します。"""
+        await self.fetch()
+        entry = self.entries.get(version)
+        if entry is None:
+            return None
+
+        cached = self.pages.get(version)
+        if cached is not None and cached[0] == entry.body:
+            self.pages.move_to_end(version)
+            return entry, cached[1]
+
+        # 同時に呼ばれた場合も変換は1回だけ行う
+        future = self._converting.get(version)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(to_pages, entry.body))
+            self._converting[version] = future
+            future.add_done_callback(lambda _: self._converting.pop(version, None))
+        # 待っている1人がキャンセルされても、共有している変換は止めない
+        pages = await asyncio.shield(future)
+
+        self.pages[version] = (entry.body, pages)
+        self.pages.move_to_end(version)
+        while len(self.pages) > PAGE_CACHE_SIZE:
+            self.pages.popitem(last=False)
+        return entry, pages
+
+
+patch_notes = PatchNoteService()
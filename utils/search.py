@@ -0,0 +1,108 @@
+import heapq
+import logging
+import unicodedata
+from collections import defaultdict
+from typing import Iterable
+
+logger = logging.getLogger("Search")
+
+MAX_RESULTS = 25
+
+
+def normalize(text: str) -> str:
+    """全角半角・大文字小文字・ひらがなカタカナの違いを吸収します。"""
+    text = unicodedata.normalize("NFKC", text).lower().replace("minecraft:", "")
+    return "".join(
+        chr(ord(c) + 0x60) if "ぁ" <= c <= "ゖ" else c
+        for c in text
+        if not c.isspace() and c != "_"
+    )
+
+
+def ngrams(text: str) -> set[str]:
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class SearchEntry:
+    __slots__ = ("id", "label", "keys", "grams")
+
+    def __init__(self, id: str, label: str, keys: list[str]):
+        self.id = id
+        self.label = label
+        self.keys = keys
+        self.grams = set().union(*(ngrams(k) for k in keys))
+
+
+class SearchIndex:
+    """IDと日本語名のbigramによるあいまい検索"""
+
+    def __init__(self, entries: Iterable[tuple[str, str, list[str]]]):
+        self.entries: list[SearchEntry] = []
+        self.postings: dict[str, list[int]] = defaultdict(list)
+        self.chars: dict[str, list[int]] = defaultdict(list)
+
+        for id, label, keys in entries:
+            entry = SearchEntry(id, label, [normalize(k) for k in keys if k])
+            index = len(self.entries)
+            self.entries.append(entry)
+            for gram in entry.grams:
+                self.postings[gram].append(index)
+            for c in set("".join(entry.keys)):
+                self.chars[c].append(index)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _score(
+        self, entry: SearchEntry, query: str, grams: set[str], hits: int
+    ) -> float:
+        score = hits / (len(grams) + len(entry.grams) - hits)
+        for key in entry.keys:
+            if key == query:
+                return score + 3
+            if key.startswith(query):
+                score = max(score, hits / len(grams) + 2 - len(key) / 1000)
+            elif query in key:
+                score = max(score, hits / len(grams) + 1 - len(key) / 1000)
+        return score
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> list[SearchEntry]:
+        query = normalize(query)
+        if not query:
+            return self.entries[:limit]
+
+        candidates: dict[int, int] = defaultdict(int)
+        if len(query) == 1:
+            grams = {query}
+            for i in self.chars.get(query, []):
+                candidates[i] = 1
+        else:
+            grams = ngrams(query)
+            for gram in grams:
+                for i in self.postings.get(gram, []):
+                    candidates[i] += 1
+
+        # 同点の場合は元の順番を優先する
+        scored = (
+            (self._score(self.entries[i], query, grams, hits), -i)
+            for i, hits in candidates.items()
+        )
+        return [self.entries[-neg] for _, neg in heapq.nlargest(limit, scored)]
+
+
+def build_item_index(dataset) -> SearchIndex:
+    """データセットのアイテムをIDと日本語名で検索できるようにします。"""
+    entries = []
+    for item in dataset.items:
+        namespace = "block" if dataset.is_block(item.name) else "item"
+        name = dataset.lang.name(namespace, item.name) or item.displayName
+        entries.append(
+            (item.name, f"{name} (minecraft:{item.name})", [item.name, name])
+        )
+    index = SearchIndex(entries)
+    logger.info(
+        f"バージョン{dataset.version}の検索インデックスを作成しました ({len(index)}件)"
+    )
+    return index
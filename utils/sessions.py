@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+from pydantic import TypeAdapter
+
+from utils.metrics import metrics
+
+logger = logging.getLogger("Sessions")
+
+SESSION_DIR = "./tmp/sessions"
+
+T = TypeVar("T")
+
+metrics.help.update(
+    {
+        "commandlab_sessions": "保持している編集中のセッション数",
+        "commandlab_sessions_expired_total": "期限切れまたは上限超過で破棄したセッション数",
+    }
+)
+
+
+class SessionStore(Generic[T]):
+    """
+    ボタンやセレクトメニューで編集する画面の状態を保持します。
+
+    View自体は保持せず、custom_id にセッションIDを含めて押されたときに状態を取り出します。
+    最後に使われてから idle_timeout 秒経つか、max_sessions を超えると古いものから破棄します。
+    path を指定すると再起動後も状態を引き継ぎます。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        adapter: TypeAdapter[T],
+        max_sessions: int = 1000,
+        idle_timeout: float = 24 * 60 * 60,
+        persist: bool = True,
+    ):
+        self.name = name
+        self.adapter = adapter
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.path = f"{SESSION_DIR}/{name}.json" if persist else None
+        # セッションID -> (最後に使われた時刻, 状態)。古いものが先頭
+        self.sessions: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __contains__(self, id: str) -> bool:
+        return self.get(id) is not None
+
+    def create(self, state: T) -> str:
+        id = secrets.token_hex(6)
+        self.put(id, state)
+        return id
+
+    def get(self, id: str) -> Optional[T]:
+        self.expire()
+        entry = self.sessions.get(id)
+        if entry is None:
+            return None
+        self.put(id, entry[1])
+        return entry[1]
+
+    def put(self, id: str, state: T):
+        """状態を保存し、最後に使われた時刻を更新します。"""
+        self.sessions[id] = (time.time(), state)
+        self.sessions.move_to_end(id)
+        self._dirty = True
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            metrics.inc("commandlab_sessions_expired_total", store=self.name)
+        metrics.set("commandlab_sessions", len(self.sessions), store=self.name)
+
+    def remove(self, id: str):
+        if self.sessions.pop(id, None) is not None:
+            self._dirty = True
+            metrics.set("commandlab_sessions", len(self.sessions), store=self.name)
+
+    def expire(self):
+        deadline = time.time() - self.idle_timeout
+        while self.sessions:
+            id, (used, _) = next(iter(self.sessions.items()))
+            if used >= deadline:
+                break
+            del self.sessions[id]
+            self._dirty = True
+            metrics.inc("commandlab_sessions_expired_total", store=self.name)
+        metrics.set("commandlab_sessions", len(self.sessions), store=self.name)
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, mode="rb") as fp:
+                raw = json.load(fp)
+            for id, (used, state) in raw.items():
+                self.sessions[id] = (used, self.adapter.validate_python(state))
+        except Exception as e:
+            logger.warning(f"セッション {self.name} を読み込めませんでした: {e}")
+            self.sessions.clear()
+        self.expire()
+        self._dirty = False
+        logger.info(f"セッション {self.name} を{len(self.sessions)}件読み込みました")
+
+    def save(self):
+        """変更があった場合のみファイルに書き込みます。別スレッドから呼び出せます。"""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            self._dirty = False
+            data = {
+                id: (used, self.adapter.dump_python(state, mode="json"))
+                for id, (used, state) in list(self.sessions.items())
+            }
+            os.makedirs(SESSION_DIR, exist_ok=True)
+            with open(self.path + ".part", mode="w") as fp:
+                json.dump(data, fp, ensure_ascii=False)
+            os.replace(self.path + ".part", self.path)
@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Callable, TypeVar
+
+import pydantic
+
+logger = logging.getLogger("Snapshot")
+
+SNAPSHOT_DIR = "./tmp/snapshot"
+# 保存する形式を変えたら上げる
+SNAPSHOT_FORMAT = 1
+
+T = TypeVar("T")
+
+
+def source_key(sources: list[bytes]) -> str:
+    """元のファイルの内容とPython/pydanticのバージョンから作るキー"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(
+        f"{SNAPSHOT_FORMAT}:{sys.version_info[:2]}:{pydantic.VERSION}".encode()
+    )
+    for data in sources:
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def snapshot_path(name: str) -> str:
+    return f"{SNAPSHOT_DIR}/{name.replace('/', '_')}.pickle"
+
+
+def load_or_build(name: str, paths: list[str], build: Callable[[list[bytes]], T]) -> T:
+    """
+    検証済みのデータをスナップショットから読み込みます。
+
+    元のファイルのどれかが変わっている場合は build で作り直して保存します。
+    """
+    sources = []
+    for path in paths:
+        with open(path, mode="rb") as fp:
+            sources.append(fp.read())
+    key = source_key(sources)
+    file = snapshot_path(name)
+
+    try:
+        with open(file, mode="rb") as fp:
+            # 先頭のキーだけを読んで、一致した場合のみ本体を読み込む
+            if pickle.load(fp) == key:
+                return pickle.load(fp)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"スナップショット {name} を読み込めませんでした: {e}")
+
+    value = build(sources)
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(file + ".part", mode="wb") as fp:
+        pickle.dump(key, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(file + ".part", file)
+    logger.info(f"スナップショット {name} を作成しました")
+    return value
+
+
+async def cached(
+    name: str, paths: list[str], build: Callable[[list[bytes]], T]
+) -> T:
+    """load_or_build をイベントループを止めないように別スレッドで実行します。"""
+    return await asyncio.to_thread(load_or_build, name, paths, build)
@@ -0,0 +1,213 @@
+import json
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+# チャット欄から実行できるコマンドの長さ
+CHAT_LIMIT = 256
+# コマンドブロックに入力できるコマンドの長さ
+COMMAND_BLOCK_LIMIT = 32500
+
+DEFAULT_COLOR = "reset"
+
+
+class Style(NamedTuple):
+    color: str = DEFAULT_COLOR
+    bold: bool = False
+    italic: bool = False
+    underline: bool = False
+    strikethrough: bool = False
+    obfuscated: bool = False
+
+
+DEFAULT_STYLE = Style()
+_FLAGS = Style._fields[1:]
+
+
+def merge_runs(runs: Iterable[tuple[str, Style]]) -> list[tuple[str, Style]]:
+    """空のテキストを取り除き、同じスタイルが続く部分を1つにまとめます。"""
+    merged: list[tuple[list[str], Style]] = []
+    for text, style in runs:
+        if not text:
+            continue
+        if merged and merged[-1][1] == style:
+            merged[-1][0].append(text)
+        else:
+            merged.append(([text], style))
+    return [("".join(texts), style) for texts, style in merged]
+
+
+@lru_cache(maxsize=4096)
+def _string(text: str) -> str:
+    return json.dumps(text, ensure_ascii=False)
+
+
+@lru_cache(maxsize=4096)
+def serialize(text: str, style: Style, parent: Style = DEFAULT_STYLE) -> str:
+    """
+    parent のスタイルを継承するコンポーネントを、差分だけを含む最短の形で返します。
+
+    結果はキャッシュされるため、変更のないセクションは再度シリアライズされません。
+    """
+    members: list[str] = []
+    if style.color != parent.color:
+        # 親の色を打ち消す場合は既定の色 (白) を指定する
+        color = "white" if style.color == DEFAULT_COLOR else style.color
+        members.append(f'"color":{_string(color)}')
+    for flag in _FLAGS:
+        value = getattr(style, flag)
+        if value != getattr(parent, flag):
+            members.append(f'"{flag}":{"true" if value else "false"}')
+    if not members:
+        return _string(text)
+    return "{" + ",".join([f'"text":{_string(text)}', *members]) + "}"
+
+
+def _most_common(runs: list[tuple[str, Style]]) -> Style:
+    return Counter(style for _, style in runs).most_common(1)[0][0]
+
+
+def compile_component(runs: Iterable[tuple[str, Style]]) -> str:
+    """
+    テキストとスタイルの組からJSONテキストコンポーネントを作成します。
+
+    同じスタイルが続く部分はまとめ、スタイルのないものは文字列のまま出力します。
+    複数ある場合は配列の先頭 (extraの親と同じ扱い) のスタイルが後続に継承されるため、
+    先頭・既定・最も多いスタイルを親にした場合を比べて最も短いものを返します。
+    """
+    merged = merge_runs(runs)
+    if not merged:
+        return '""'
+    if len(merged) == 1:
+        return serialize(*merged[0])
+
+    head_text, head = merged[0]
+    candidates = [
+        [serialize(head_text, head), *(serialize(t, s, head) for t, s in merged[1:])]
+    ]
+    for parent in dict.fromkeys([DEFAULT_STYLE, _most_common(merged)]):
+        candidates.append(
+            [serialize("", parent), *(serialize(t, s, parent) for t, s in merged)]
+        )
+
+    best = min(candidates, key=lambda c: sum(map(len, c)) + len(c))
+    return f"[{','.join(best)}]"
+
+
+def gradient(text: str, stops: list[tuple[int, int, int]]) -> list[tuple[str, str]]:
+    """
+    文字ごとに stops の色を補間し、(テキスト, "#rrggbb") の組を返します。
+
+    空白は色が見えないため直前の文字の色を引き継ぎ、同じ色が続く部分は1つにまとめます。
+    """
+    if not text:
+        return []
+    chars = np.array(list(text))
+    visible = ~np.char.isspace(chars)
+    count = max(int(visible.sum()), 1)
+
+    # 空白以外の文字の位置を0〜1に並べて各チャンネルを線形補間する
+    t = np.linspace(0.0, 1.0, count)
+    points = np.linspace(0.0, 1.0, len(stops))
+    rgb = np.asarray(stops, dtype=np.float64)
+    channels = [
+        np.rint(np.interp(t, points, rgb[:, i])).astype(np.int64) for i in range(3)
+    ]
+    codes = channels[0] << 16 | channels[1] << 8 | channels[2]
+
+    # 各文字が何番目の見える文字の色を使うか (先頭の空白は最初の文字の色)
+    index = np.maximum(np.cumsum(visible) - 1, 0)
+    per_char = codes[index]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(per_char)) + 1))
+    ends = np.append(starts[1:], len(text))
+    return [
+        (text[start:end], f"#{int(per_char[start]):06x}")
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+
+
+# 読み込めるコンポーネントの入れ子の深さと、展開後のテキストの数
+MAX_DEPTH = 32
+MAX_RUNS = 1000
+
+
+def _apply_style(node: dict, inherited: Style) -> Style:
+    color = node.get("color", inherited.color)
+    return Style(
+        color if isinstance(color, str) else inherited.color,
+        *(
+            value if isinstance(value := node.get(flag), bool) else inherited[i]
+            for i, flag in enumerate(_FLAGS, start=1)
+        ),
+    )
+
+
+def _own_style(node: object, inherited: Style) -> Style:
+    """配列の場合は先頭の要素のスタイルが全体のスタイルになる"""
+    depth = 0
+    while isinstance(node, list) and node:
+        node = node[0]
+        depth += 1
+        if depth > MAX_DEPTH:
+            raise ValueError("入れ子が深すぎます")
+    return _apply_style(node, inherited) if isinstance(node, dict) else inherited
+
+
+def _node_text(node: dict) -> str:
+    for key in ("text", "translate", "keybind", "selector"):
+        value = node.get(key)
+        if isinstance(value, str):
+            return value
+    score = node.get("score")
+    if isinstance(score, dict):
+        return f"{{{score.get('name', '')}:{score.get('objective', '')}}}"
+    return ""
+
+
+def parse_component(raw: str) -> list[tuple[str, Style]]:
+    """
+    JSONテキストコンポーネントを継承後のスタイルを持つ (テキスト, スタイル) の組に展開します。
+
+    配列の先頭とextraによるスタイルの継承に対応しています。再帰を使わずに展開するため、
+    処理時間は入力の長さに比例し、入れ子の深さと展開後の数は上限を超えるとValueErrorになります。
+    """
+    try:
+        root = json.loads(raw)
+    except (json.JSONDecodeError, RecursionError) as e:
+        raise ValueError("JSONとして読み込めませんでした") from e
+
+    runs: list[tuple[str, Style]] = []
+    stack: list[tuple[object, Style, int]] = [(root, DEFAULT_STYLE, 0)]
+    while stack:
+        node, inherited, depth = stack.pop()
+        if depth > MAX_DEPTH:
+            raise ValueError("入れ子が深すぎます")
+
+        if isinstance(node, list):
+            if not node:
+                continue
+            # 2番目以降の要素は先頭の要素のスタイルを継承する
+            style = _own_style(node, inherited)
+            stack.extend((child, style, depth + 1) for child in reversed(node[1:]))
+            stack.append((node[0], inherited, depth + 1))
+            continue
+
+        if isinstance(node, dict):
+            style = _apply_style(node, inherited)
+            text = _node_text(node)
+            extra = node.get("extra")
+            if isinstance(extra, list):
+                stack.extend((child, style, depth + 1) for child in reversed(extra))
+        elif isinstance(node, (str, int, float)):
+            style = inherited
+            text = str(node).lower() if isinstance(node, bool) else str(node)
+        else:
+            continue
+
+        if text:
+            runs.append((text, style))
+            if len(runs) > MAX_RUNS:
+                raise ValueError(f"テキストが{MAX_RUNS}個を超えています")
+    return merge_runs(runs)
@@ -0,0 +1,352 @@
+import functools
+import io
+import json
+import logging
+import random
+import zipfile
+from typing import NamedTuple, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.download import client_path
+
+logger = logging.getLogger("TextRender")
+
+# 描画解像度 (フォントの1ピクセルあたりのピクセル数)
+UNIT = 2
+LINE_HEIGHT = 9
+# チャット欄の幅 (これより長い行は折り返す)
+MAX_LINE_WIDTH = 320
+PADDING = 4
+# アクセント付き文字などがベースラインより上にはみ出す分
+ASCENT_MARGIN = 3
+BACKGROUND = (0, 0, 0, 128)
+# 隠し文字のアニメーション
+OBFUSCATED_FRAMES = 8
+OBFUSCATED_FRAME_MS = 50
+
+# フォントに無い文字 (日本語など) に使うフォント
+FALLBACK_FONT_PATH = "./assets/unifont-15.1.05.otf"
+FALLBACK_FONT_SIZE = 16
+
+
+class Glyph(NamedTuple):
+    # UNIT倍した大きさの形状 (True が描画するピクセル)
+    mask: np.ndarray
+    # 行の上端からの位置 (フォントのピクセル単位)
+    top: float
+    # 次の文字までの幅 (フォントのピクセル単位)
+    advance: float
+
+
+class Segment(NamedTuple):
+    text: str
+    color: tuple[int, int, int]
+    bold: bool = False
+    italic: bool = False
+    underline: bool = False
+    strikethrough: bool = False
+    obfuscated: bool = False
+
+
+def _resource_path(id: str, kind: str, ext: str) -> str:
+    namespace, _, path = id.rpartition(":")
+    return f"assets/{namespace or 'minecraft'}/{kind}/{path}{ext}"
+
+
+class BitmapFont:
+    """
+    client.jarの font/default.json から読み込んだフォント
+
+    bitmap (ascii.png など) と space の定義に対応しています。それ以外の文字はunifontで描画します。
+    """
+
+    def __init__(self, glyphs: dict[str, Glyph], fallback: ImageFont.FreeTypeFont):
+        self.glyphs = glyphs
+        self.fallback = fallback
+        # 隠し文字で置き換える候補 (同じ幅の文字)
+        self.by_advance: dict[float, list[str]] = {}
+        for char, glyph in glyphs.items():
+            if glyph.mask.any():
+                self.by_advance.setdefault(glyph.advance, []).append(char)
+
+    @classmethod
+    def from_jar(cls, path: Optional[str]) -> "BitmapFont":
+        fallback = ImageFont.truetype(FALLBACK_FONT_PATH, FALLBACK_FONT_SIZE)
+        glyphs: dict[str, Glyph] = {}
+        try:
+            with zipfile.ZipFile(path) as jar:
+                cls._load_providers(jar, "minecraft:default", glyphs)
+        except (OSError, KeyError, TypeError) as e:
+            logger.warning(f"client.jarのフォントを読み込めませんでした。unifontのみを使用します: {e}")
+        glyphs.setdefault(" ", Glyph(np.zeros((0, 0), dtype=bool), 0, 4))
+        return cls(glyphs, fallback)
+
+    @classmethod
+    def _load_providers(cls, jar: zipfile.ZipFile, id: str, glyphs: dict[str, Glyph]):
+        definition = json.loads(jar.read(_resource_path(id, "font", ".json")))
+        for provider in definition.get("providers", []):
+            kind = provider.get("type")
+            if kind == "reference":
+                cls._load_providers(jar, provider["id"], glyphs)
+            elif kind == "space":
+                for char, advance in provider.get("advances", {}).items():
+                    glyphs.setdefault(
+                        char, Glyph(np.zeros((0, 0), dtype=bool), 0, advance)
+                    )
+            elif kind == "bitmap":
+                cls._load_bitmap(jar, provider, glyphs)
+
+    @staticmethod
+    def _load_bitmap(jar: zipfile.ZipFile, provider: dict, glyphs: dict[str, Glyph]):
+        image = Image.open(
+            io.BytesIO(jar.read(_resource_path(provider["file"], "textures", "")))
+        )
+        alpha = np.asarray(image.convert("RGBA"))[:, :, 3] > 0
+        rows: list[str] = provider["chars"]
+        cell_h = alpha.shape[0] // len(rows)
+        height = provider.get("height", 8)
+        scale = height / cell_h
+
+        for y, row in enumerate(rows):
+            cell_w = alpha.shape[1] // len(row)
+            for x, char in enumerate(row):
+                if char in ("\0", " ") or char in glyphs:
+                    continue
+                cell = alpha[y * cell_h : (y + 1) * cell_h, x * cell_w : (x + 1) * cell_w]
+                columns = np.flatnonzero(cell.any(axis=0))
+                width = int(columns[-1]) + 1 if len(columns) else 0
+                mask = cell[:, :width]
+                size = (round(width * scale * UNIT), round(cell_h * scale * UNIT))
+                if width and size != (width, cell_h):
+                    mask = (
+                        np.asarray(
+                            Image.fromarray(mask).resize(size, Image.Resampling.NEAREST)
+                        )
+                        > 0
+                    )
+                glyphs[char] = Glyph(
+                    mask, 7 - provider["ascent"], width * scale + 1
+                )
+
+    def glyph(self, char: str) -> Glyph:
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self._fallback_glyph(char)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def _fallback_glyph(self, char: str) -> Glyph:
+        # unifontは16ピクセルの文字を半分の大きさで描画する
+        size = FALLBACK_FONT_SIZE
+        image = Image.new("L", (size * 2, size))
+        ImageDraw.Draw(image).text((0, 0), char, fill=255, font=self.fallback)
+        mask = np.asarray(image) > 127
+        columns = np.flatnonzero(mask.any(axis=0))
+        width = int(columns[-1]) + 1 if len(columns) else size // 2
+        mask = mask[:, :width]
+        if UNIT != 2:
+            mask = (
+                np.asarray(
+                    Image.fromarray(mask).resize(
+                        (round(width * UNIT / 2), round(size * UNIT / 2)),
+                        Image.Resampling.NEAREST,
+                    )
+                )
+                > 0
+            )
+        return Glyph(mask, 0, width / 2 + 1)
+
+    def advance(self, char: str, bold: bool) -> float:
+        return self.glyph(char).advance + (1 if bold else 0)
+
+
+class TextRenderer:
+    """tellraw/titleのテキストをMinecraftのフォントで描画します。"""
+
+    def __init__(self, font: BitmapFont):
+        self.font = font
+        self._run_mask = functools.lru_cache(maxsize=2048)(self._build_run_mask)
+
+    def _styled_mask(self, char: str, bold: bool, italic: bool) -> tuple[np.ndarray, int]:
+        """太字・斜体を適用した形状と、文字の左端からのずれを返します。"""
+        glyph = self.font.glyph(char)
+        mask = glyph.mask
+        offset = 0
+        if italic and mask.size:
+            # 上端を右に1ピクセル、下端を左に1ピクセルずらす
+            h, w = mask.shape
+            shifts = np.round(
+                (1 - 0.25 * (glyph.top + np.arange(h) / UNIT)) * UNIT
+            ).astype(int)
+            offset = int(shifts.min())
+            sheared = np.zeros((h, w + int(shifts.max()) - offset), dtype=bool)
+            for row, shift in enumerate(shifts - offset):
+                sheared[row, shift : shift + w] = mask[row]
+            mask = sheared
+        if bold and mask.size:
+            bolded = np.zeros((mask.shape[0], mask.shape[1] + UNIT), dtype=bool)
+            bolded[:, : mask.shape[1]] = mask
+            bolded[:, UNIT:] |= mask
+            mask = bolded
+        return mask, offset
+
+    def _build_run_mask(self, text: str, bold: bool, italic: bool) -> np.ndarray:
+        """同じ装飾の文字列全体の形状 (ベースライン付近の1行分) を作成します。"""
+        width = sum(self.font.advance(c, bold) for c in text)
+        height = (LINE_HEIGHT + ASCENT_MARGIN) * UNIT
+        margin = UNIT * 2
+        mask = np.zeros((height, round(width * UNIT) + margin * 2), dtype=bool)
+        x = 0.0
+        for char in text:
+            glyph_mask, offset = self._styled_mask(char, bold, italic)
+            if glyph_mask.size:
+                top = round((self.font.glyph(char).top + ASCENT_MARGIN) * UNIT)
+                left = round(x * UNIT) + offset + margin
+                h = min(glyph_mask.shape[0], height - top)
+                w = min(glyph_mask.shape[1], mask.shape[1] - left)
+                mask[top : top + h, left : left + w] |= glyph_mask[:h, :w]
+            x += self.font.advance(char, bold)
+        return mask
+
+    def _obfuscate(self, text: str, rng: random.Random) -> str:
+        chars = []
+        for char in text:
+            candidates = self.font.by_advance.get(self.font.glyph(char).advance)
+            chars.append(rng.choice(candidates) if candidates else char)
+        return "".join(chars)
+
+    def layout(self, segments: list[Segment]) -> list[list[tuple[float, Segment, str]]]:
+        """改行と折り返しで分けた行ごとに (x座標, セグメント, 文字列) を返します。"""
+        lines: list[list[tuple[float, Segment, str]]] = [[]]
+        cursor = 0.0
+        for segment in segments:
+            for i, part in enumerate(segment.text.split("\n")):
+                if i > 0:
+                    lines.append([])
+                    cursor = 0.0
+                start = 0
+                run_x = cursor
+                for j, char in enumerate(part):
+                    advance = self.font.advance(char, segment.bold)
+                    if cursor + advance > MAX_LINE_WIDTH and cursor > 0:
+                        if j > start:
+                            lines[-1].append((run_x, segment, part[start:j]))
+                        lines.append([])
+                        cursor = 0.0
+                        start = j
+                        run_x = 0.0
+                    cursor += advance
+                if len(part) > start:
+                    lines[-1].append((run_x, segment, part[start:]))
+        return lines
+
+    def _draw_frame(
+        self,
+        lines: list[list[tuple[float, Segment, str]]],
+        size: tuple[int, int],
+        rng: Optional[random.Random],
+    ) -> np.ndarray:
+        canvas = np.empty((size[1], size[0], 4), dtype=np.uint8)
+        canvas[:] = BACKGROUND
+        margin = UNIT * 2
+        for row, line in enumerate(lines):
+            line_top = round((PADDING + row * LINE_HEIGHT) * UNIT)
+            for x, segment, text in line:
+                if segment.obfuscated and rng is not None:
+                    text = self._obfuscate(text, rng)
+                mask = self._run_mask(text, segment.bold, segment.italic)
+                width = round(
+                    sum(self.font.advance(c, segment.bold) for c in text) * UNIT
+                )
+                # 装飾の線は形状に含めて影と一緒に描画する
+                if segment.underline or segment.strikethrough:
+                    mask = mask.copy()
+                    base = ASCENT_MARGIN * UNIT
+                    if segment.underline:
+                        mask[base + 8 * UNIT : base + 9 * UNIT, margin - UNIT : margin + width] = True
+                    if segment.strikethrough:
+                        y = base + round(3.5 * UNIT)
+                        mask[y : y + UNIT, margin - UNIT : margin + width] = True
+
+                top = line_top - ASCENT_MARGIN * UNIT
+                left = round((PADDING + x) * UNIT) - margin
+                shadow = tuple(c // 4 for c in segment.color) + (255,)
+                for dx, dy, color in (
+                    (UNIT, UNIT, shadow),
+                    (0, 0, segment.color + (255,)),
+                ):
+                    y0, x0 = top + dy, left + dx
+                    h = min(mask.shape[0], canvas.shape[0] - y0)
+                    w = min(mask.shape[1], canvas.shape[1] - x0)
+                    canvas[y0 : y0 + h, x0 : x0 + w][mask[:h, :w]] = color
+        return canvas
+
+    def render(self, segments: list[Segment]) -> tuple[bytes, str]:
+        """
+        画像のデータと拡張子を返します。
+
+        隠し文字を含む場合はアニメーションGIF、それ以外はWEBPになります。
+        """
+        lines = self.layout(segments)
+        width = max(
+            (
+                x + sum(self.font.advance(c, s.bold) for c in text) + (1 if s.italic else 0)
+                for line in lines
+                for x, s, text in line
+            ),
+            default=0,
+        )
+        size = (
+            round((width + PADDING * 2 + 1) * UNIT),
+            round((len(lines) * LINE_HEIGHT + PADDING * 2) * UNIT),
+        )
+
+        stream = io.BytesIO()
+        if not any(s.obfuscated for s in segments):
+            frame = Image.fromarray(self._draw_frame(lines, size, None), "RGBA")
+            # 圧縮率よりも速度を優先する (method=0)
+            frame.save(stream, "WEBP", lossless=True, method=0)
+            return stream.getvalue(), "webp"
+
+        rng = random.Random(0)
+        frames = [
+            Image.fromarray(self._draw_frame(lines, size, rng), "RGBA").convert("RGB")
+            for _ in range(OBFUSCATED_FRAMES)
+        ]
+        frames[0].save(
+            stream,
+            "GIF",
+            save_all=True,
+            append_images=frames[1:],
+            duration=OBFUSCATED_FRAME_MS,
+            loop=0,
+        )
+        return stream.getvalue(), "gif"
+
+
+class FontStore:
+    """バージョンごとのフォントを一度だけ読み込みます。"""
+
+    def __init__(self):
+        self.renderers: dict[str, TextRenderer] = {}
+
+    def get(self, version: str) -> TextRenderer:
+        renderer = self.renderers.get(version)
+        if renderer is None:
+            renderer = TextRenderer(BitmapFont.from_jar(client_path(version)))
+            self.renderers[version] = renderer
+            logger.info(
+                f"バージョン{version}のフォントを読み込みました ({len(renderer.font.glyphs)}文字)"
+            )
+        return renderer
+
+    def invalidate(self, version: Optional[str] = None):
+        if version is None:
+            self.renderers.clear()
+        else:
+            self.renderers.pop(version, None)
+
+
+fonts = FontStore()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Optional
+
+from utils.metrics import metrics, running_spans
+
+logger = logging.getLogger("Watchdog")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+metrics.help.update(
+    {
+        "commandlab_event_loop_lag_seconds": "イベントループの遅延",
+        "commandlab_event_loop_lag_max_seconds": "起動してからのイベントループの最大遅延",
+        "commandlab_event_loop_blocked_total": "イベントループが閾値以上ブロックされた回数",
+        "commandlab_gateway_latency_seconds": "Gatewayのハートビート遅延 (bot.latency)",
+    }
+)
+
+
+class BlockReport:
+    def __init__(self, source: str, stack: str, detected_at: float):
+        self.source = source
+        self.stack = stack
+        self.detected_at = detected_at
+        self.duration = 0.0
+
+
+class LoopWatchdog:
+    """
+    イベントループの遅延を常に計測し、閾値以上ループが止まった場合は
+    その時点のスタックと原因となったコマンド/リスナーを記録します。
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        latency: Optional[Callable[[], float]] = None,
+        max_reports: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.latency = latency
+        self.reports: deque[BlockReport] = deque(maxlen=max_reports)
+        self.blocked_total = 0
+        self.max_lag = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.perf_counter()
+        self._pending: Optional[BlockReport] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._heartbeat(), name="LoopWatchdog")
+        self._thread = threading.Thread(
+            target=self._monitor, name="LoopWatchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("commandlab_event_loop_lag_seconds", lag)
+            metrics.set("commandlab_event_loop_lag_max_seconds", self.max_lag)
+
+            if self.latency is not None:
+                latency = self.latency()
+                if not math.isinf(latency) and not math.isnan(latency):
+                    metrics.set("commandlab_gateway_latency_seconds", latency)
+
+            # 監視スレッドが検出したブロックはループ側で集計する
+            report, self._pending = self._pending, None
+            if report is not None:
+                report.duration = lag
+                self.reports.append(report)
+                self.blocked_total += 1
+                metrics.inc("commandlab_event_loop_blocked_total", source=report.source)
+                logger.warning(
+                    f"イベントループが{lag:.3f}秒ブロックされました ({report.source})\n"
+                    + report.stack
+                )
+
+    def _monitor(self):
+        while not self._stop.wait(self.interval):
+            if self._pending is not None:
+                continue
+            blocked = time.perf_counter() - self._last_beat - self.interval
+            if blocked >= self.threshold:
+                self._pending = self._capture()
+
+    def _capture(self) -> BlockReport:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+
+        source = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None and (span := running_spans.get(task)) is not None:
+            source = f"/{span.command}"
+
+        if source is None:
+            source = _describe_frame(frame)
+
+        return BlockReport(source, stack, time.time())
+
+
+def _describe_frame(frame) -> str:
+    """スタックの中からリポジトリ内で最も内側の呼び出し元を探します。"""
+    found = None
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(ROOT) and "site-packages" not in filename:
+            found = f"{os.path.relpath(filename, ROOT)}:{frame.f_code.co_name}"
+            break
+        frame = frame.f_back
+    return found or "unknown"